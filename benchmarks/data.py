@@ -0,0 +1,53 @@
+# benchmarks/data.py
+
+import random
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from src.primitive_db.core import parse_column_definition, validate_column_definition
+
+DEFAULT_SCHEMA = ("name:str", "age:int", "is_active:bool")
+
+WORDS = (
+    "alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel",
+    "india", "juliet", "kilo", "lima", "mike", "november", "oscar", "papa",
+)
+
+
+def parse_schema(columns_defs: Sequence[str]) -> List[Tuple[str, str]]:
+    """Столбцы (имя, тип) из определений create_table, без ID."""
+    schema = []
+    for col_def in columns_defs:
+        if not validate_column_definition(col_def):
+            raise ValueError(f"Некорректное определение столбца: '{col_def}'")
+        schema.append(parse_column_definition(col_def))
+    return schema
+
+
+def make_value(rng: random.Random, col_type: str, size: int) -> Any:
+    """Случайное значение типа столбца; int - равномерно в [0, size)."""
+    if col_type == 'int':
+        return rng.randrange(max(size, 1))
+    if col_type == 'bool':
+        return rng.random() < 0.5
+    return f"{rng.choice(WORDS)}_{rng.randrange(max(size, 1))}"
+
+
+def generate_rows(
+    schema: List[Tuple[str, str]], count: int, size: int, seed: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """Воспроизводимые строки: одинаковый seed дает одинаковые данные.
+
+    size задает диапазон значений int, чтобы доля строк в диапазоне
+    BETWEEN не зависела от размера таблицы.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield {name: make_value(rng, col_type, size) for name, col_type in schema}
+
+
+def command_values(row: Dict[str, Any], schema: List[Tuple[str, str]]) -> List[str]:
+    """Значения строки в виде аргументов команды insert."""
+    return [
+        str(row[name]).lower() if col_type == 'bool' else str(row[name])
+        for name, col_type in schema
+    ]
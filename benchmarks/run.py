@@ -0,0 +1,276 @@
+# benchmarks/run.py
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    from decorators import auto_confirm
+except ImportError:
+    from src.decorators import auto_confirm
+
+from src.primitive_db import core
+from src.primitive_db.api import Database
+from src.primitive_db.commands import compile_command
+from src.primitive_db.metrics import Timer
+from src.primitive_db.parser import parse_where_clause
+
+from .data import DEFAULT_SCHEMA, command_values, generate_rows, parse_schema
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_OPS = 200
+DEFAULT_THRESHOLD = 0.25
+LOAD_BATCH = 10_000
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def check(result: tuple) -> tuple:
+    """Бенчмарк не должен молча мерить ошибку."""
+    if not result[0]:
+        raise RuntimeError(result[1])
+    return result
+
+
+def measure(
+    func: Callable[[Any], Any],
+    inputs: Sequence[Any],
+    prepare: Optional[Callable[[], None]] = None,
+    rows: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Задержка каждого вызова func(x) по inputs; prepare - вне замера.
+
+    ops_per_s - вызовов в секунду, или строк в секунду, если задано
+    общее число строк rows.
+    """
+    timer = Timer()
+    for value in inputs:
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter()
+        func(value)
+        timer.add(time.perf_counter() - start)
+    summary = timer.summary()
+    total = summary["total_ms"] / 1000
+    count = timer.count if rows is None else rows
+    summary["ops_per_s"] = count / total if total else 0.0
+    return summary
+
+
+def run_size(size: int, args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Все бенчмарки на одной таблице из size строк."""
+    schema = parse_schema(args.schema)
+    table_name = f"bench_{size}"
+    int_column = next((name for name, t in schema if t == 'int'), None)
+    rng = random.Random(args.seed)
+    ops = min(args.ops, size)
+    results = {}
+
+    check(core.create_table(table_name, list(args.schema)))
+    for col_def in args.index:
+        column, _, kind = col_def.partition(':')
+        check(core.create_index(table_name, column, kind or 'hash'))
+
+    single_rows = list(generate_rows(schema, ops, size, args.seed))
+    results["insert.single"] = measure(
+        lambda row: check(core.insert(table_name, command_values(row, schema))),
+        single_rows,
+    )
+
+    table = Database().table(table_name)
+    bulk = generate_rows(schema, size - ops, size, args.seed + 1)
+    batches = []
+    while True:
+        batch = [row for _, row in zip(range(LOAD_BATCH), bulk)]
+        if not batch:
+            break
+        batches.append(batch)
+    if batches:
+        results["insert.batch"] = measure(
+            table.insert_many, batches, rows=size - ops
+        )
+    if args.format != core.DEFAULT_TABLE_FORMAT:
+        check(core.convert_table(table_name, args.format))
+    if args.compression != "none":
+        check(core.compress_table(table_name, args.compression))
+
+    invalidate = core.select_cacher.invalidate
+    ids = rng.sample(range(1, size + 1), ops)
+    results["select.point"] = measure(
+        lambda record_id: check(core.select(table_name, {"ID": record_id})),
+        ids,
+        prepare=invalidate,
+    )
+
+    if int_column is not None:
+        width = max(size // 100, 1)
+        ranges = [rng.randrange(size) for _ in range(ops)]
+        results["select.range"] = measure(
+            lambda low: check(core.select(
+                table_name,
+                parse_where_clause(
+                    f"{int_column} between {low} and {low + width}"
+                ),
+            )),
+            ranges,
+            prepare=invalidate,
+        )
+
+    column, col_type = schema[0]
+    new_value = {"int": "1", "bool": "true", "str": "updated"}[col_type]
+    results["update.point"] = measure(
+        lambda record_id: check(
+            core.update(table_name, {column: new_value}, {"ID": record_id})
+        ),
+        ids,
+    )
+
+    with auto_confirm():
+        results["delete.point"] = measure(
+            lambda record_id: check(core.delete(table_name, {"ID": record_id})),
+            ids,
+        )
+
+    lines = [
+        f"select {table_name} where {int_column or 'ID'} > {value} and ID < {size}"
+        for value in range(ops)
+    ]
+    results["parse.cold"] = measure(compile_command, lines)
+    results["parse.cached"] = measure(compile_command, [lines[0]] * ops)
+
+    with auto_confirm():
+        check(core.drop_table(table_name))
+    return results
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Регрессии: p50 хуже базового больше чем на threshold (доля)."""
+    regressions = []
+    for size, benches in results["results"].items():
+        for name, current in benches.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if base is None or not base["p50_ms"]:
+                continue
+            change = current["p50_ms"] / base["p50_ms"] - 1
+            if change > threshold:
+                regressions.append(
+                    f"{size} {name}: p50 {base['p50_ms']:.3f} -> "
+                    f"{current['p50_ms']:.3f} мс (+{change:.0%})"
+                )
+    return regressions
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    for size, benches in results["results"].items():
+        print(f"\nСтрок: {size}")
+        for name, summary in benches.items():
+            print(
+                f"  {name:<14} p50 {summary['p50_ms']:9.3f} мс"
+                f"  p95 {summary['p95_ms']:9.3f} мс"
+                f"  p99 {summary['p99_ms']:9.3f} мс"
+                f"  {summary['ops_per_s']:12.0f} оп/с"
+            )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+        help="размеры таблиц (строк)",
+    )
+    parser.add_argument(
+        "--schema", nargs="+", default=list(DEFAULT_SCHEMA),
+        help="столбцы таблицы как в create_table",
+    )
+    parser.add_argument(
+        "--index", nargs="*", default=[],
+        help="индексы вида столбец[:hash|sorted]",
+    )
+    parser.add_argument("--format", default=core.DEFAULT_TABLE_FORMAT)
+    parser.add_argument(
+        "--compression", default="none", help="сжатие снимка: zlib|lzma|bz2|none"
+    )
+    parser.add_argument(
+        "--ops", type=int, default=DEFAULT_OPS,
+        help="замеров на каждую точечную операцию",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="сохранить результаты в JSON")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument(
+        "--save-baseline", action="store_true",
+        help="записать результаты как новую базу",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="допустимое ухудшение p50 (0.25 = 25%%)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "schema": args.schema,
+            "index": args.index,
+            "format": args.format,
+            "compression": args.compression,
+            "ops": args.ops,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    cwd = os.getcwd()
+    baseline_path = os.path.abspath(args.baseline)
+    output_path = os.path.abspath(args.output) if args.output else None
+    with tempfile.TemporaryDirectory(prefix="primitive_db_bench_") as workdir:
+        # Файлы БД относительны текущего каталога
+        os.chdir(workdir)
+        try:
+            for size in args.sizes:
+                print(f"Таблица на {size} строк...", file=sys.stderr)
+                results["results"][str(size)] = run_size(size, args)
+            core.db.close()
+        finally:
+            os.chdir(cwd)
+
+    print_results(results)
+    if output_path is not None:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nБаза сохранена в {baseline_path}")
+        return 0
+    if not os.path.exists(baseline_path):
+        print("\nБазы для сравнения нет (--save-baseline создаст ее)")
+        return 0
+
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    for key in ("schema", "index", "format", "compression", "ops", "seed"):
+        if baseline.get("meta", {}).get(key) != results["meta"][key]:
+            print(f"\nВнимание: база снята с другим параметром {key}")
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nРегрессии (порог {args.threshold:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nРегрессий относительно базы нет (порог {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
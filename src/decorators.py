@@ -1,8 +1,13 @@
 # src/decorators.py
 
 import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from functools import wraps
-from typing import Any, Callable
+from typing import Any, Callable, Iterator, Optional
+
+_confirm_state = {"auto": False}
+_timing_state = {"quiet": True, "observer": None}
 
 
 def handle_db_errors(func: Callable) -> Callable:
@@ -33,10 +38,23 @@ def handle_db_errors(func: Callable) -> Callable:
     return wrapper
 
 
+@contextmanager
+def auto_confirm() -> Iterator[None]:
+    """Подтверждает действия confirm_action без вопроса (неинтерактивный режим)."""
+    previous = _confirm_state["auto"]
+    _confirm_state["auto"] = True
+    try:
+        yield
+    finally:
+        _confirm_state["auto"] = previous
+
+
 def confirm_action(action_name: str) -> Callable:
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
+            if _confirm_state["auto"]:
+                return func(*args, **kwargs)
             message = f'Вы уверены, что хотите выполнить "{action_name}"? [y/n]: '
             print(message, end="")
             response = input().strip().lower()
@@ -52,30 +70,90 @@ def confirm_action(action_name: str) -> Callable:
     return decorator
 
 
+def set_timing_observer(observer: Optional[Callable[[str, float], None]]) -> None:
+    """Задает получателя замеров log_time: observer(имя функции, секунды)."""
+    _timing_state["observer"] = observer
+
+
+def set_timing_output(enabled: bool) -> None:
+    """Включает или выключает печать времени выполнения в консоль."""
+    _timing_state["quiet"] = not enabled
+
+
+@contextmanager
+def quiet_timing() -> Iterator[None]:
+    """Отключает вывод log_time (пакетный режим)."""
+    previous = _timing_state["quiet"]
+    _timing_state["quiet"] = True
+    try:
+        yield
+    finally:
+        _timing_state["quiet"] = previous
+
+
 def log_time(func: Callable) -> Callable:
+    """Замеряет время вызова и передает его получателю метрик.
+
+    Печать в консоль включается set_timing_output(True).
+    """
     @wraps(func)
     def wrapper(*args, **kwargs) -> Any:
-        start_time = time.monotonic()
-        result = func(*args, **kwargs)
-        end_time = time.monotonic()
-        elapsed = end_time - start_time
-        
-        print(f"Функция {func.__name__} выполнилась за {elapsed:.3f} секунд")
-        return result
+        start_time = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            observer = _timing_state["observer"]
+            if observer is not None:
+                observer(func.__name__, elapsed)
+            if not _timing_state["quiet"]:
+                print(f"Функция {func.__name__} выполнилась за {elapsed:.3f} секунд")
     return wrapper
 
 
-def create_cacher() -> Callable:
-    cache = {}
+def create_cacher(
+    max_entries: int = 128,
+    max_size: int = 100_000,
+    size_of: Optional[Callable[[Any], int]] = None,
+) -> Callable:
+    """Создает LRU-кэш с ограничением по числу записей и суммарному размеру."""
+    cache = OrderedDict()
+    stats = {"hits": 0, "misses": 0, "evictions": 0, "size": 0}
+    
+    def measure(value: Any) -> int:
+        return size_of(value) if size_of is not None else 1
+    
+    def evict_one() -> None:
+        _, (_, size) = cache.popitem(last=False)
+        stats["size"] -= size
+        stats["evictions"] += 1
     
     def cache_result(key: Any, value_func: Callable) -> Any:
         if key in cache:
-            print(f"Используется кэш для ключа: {key}")
-            return cache[key]
+            cache.move_to_end(key)
+            stats["hits"] += 1
+            return cache[key][0]
         
+        stats["misses"] += 1
         result = value_func()
-        cache[key] = result
-        print(f"Сохранено в кэш для ключа: {key}")
+        size = measure(result)
+        if size > max_size:
+            return result
+        
+        cache[key] = (result, size)
+        stats["size"] += size
+        while len(cache) > max_entries or stats["size"] > max_size:
+            evict_one()
         return result
     
-    return cache_result
\ No newline at end of file
+    def invalidate(predicate: Optional[Callable[[Any], bool]] = None) -> None:
+        for key in [k for k in cache if predicate is None or predicate(k)]:
+            _, size = cache.pop(key)
+            stats["size"] -= size
+    
+    def get_stats() -> dict:
+        return {**stats, "entries": len(cache)}
+    
+    cache_result.invalidate = invalidate
+    cache_result.stats = get_stats
+    return cache_result
@@ -0,0 +1,221 @@
+# src/primitive_db/aggregate.py
+
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Union
+
+AGGREGATE_FUNCS = {'count', 'sum', 'avg', 'min', 'max'}
+NUMERIC_FUNCS = {'sum', 'avg'}
+
+_AGGREGATE_RE = re.compile(r"^(\w+)\(\s*(\*|[^\s()*]+)\s*\)$")
+
+
+class Aggregate(NamedTuple):
+    """Агрегатная функция; column = None означает count(*)."""
+    func: str
+    column: Optional[str]
+
+    @property
+    def label(self) -> str:
+        return f"{self.func}({self.column or '*'})"
+
+
+SelectItem = Union[str, Aggregate]
+
+
+def parse_select_item(text: str) -> SelectItem:
+    """Элемент списка select: имя столбца или агрегат вида func(col)."""
+    match = _AGGREGATE_RE.match(text)
+    if match is None:
+        if not re.fullmatch(r"[^\s(),*]+", text):
+            raise ValueError(f"Некорректный элемент списка select: '{text}'")
+        return text
+    func, column = match.group(1).lower(), match.group(2)
+    if func not in AGGREGATE_FUNCS:
+        funcs = ", ".join(sorted(AGGREGATE_FUNCS))
+        raise ValueError(f"Неизвестная функция '{func}'. Доступны: {funcs}")
+    if column == '*':
+        if func != 'count':
+            raise ValueError(f"'*' допустима только в count(*), а не в {func}")
+        return Aggregate(func, None)
+    return Aggregate(func, column)
+
+
+def bind_aggregates(
+    items: List[SelectItem],
+    schema: Dict[str, str],
+    group_by: Optional[str],
+) -> None:
+    """Проверяет столбцы и типы списка select по схеме таблицы."""
+    if group_by is not None and group_by not in schema:
+        raise ValueError(f"Столбец GROUP BY '{group_by}' не существует")
+    for item in items:
+        if isinstance(item, str):
+            if item != group_by:
+                raise ValueError(
+                    f"Столбец '{item}' должен быть в GROUP BY или внутри агрегата"
+                )
+            continue
+        if item.column is None:
+            continue
+        if item.column not in schema:
+            raise ValueError(f"Столбец '{item.column}' не существует")
+        if item.func in NUMERIC_FUNCS and schema[item.column] not in ('int', 'bool'):
+            raise ValueError(f"{item.func} применима только к столбцам int и bool")
+
+
+class _Count:
+    __slots__ = ('column', 'value')
+
+    def __init__(self, column: Optional[str]):
+        self.column = column
+        self.value = 0
+
+    def add(self, row: dict) -> None:
+        if self.column is None or row.get(self.column) is not None:
+            self.value += 1
+
+    def result(self) -> int:
+        return self.value
+
+
+class _Sum:
+    __slots__ = ('column', 'value', 'count')
+
+    def __init__(self, column: str):
+        self.column = column
+        self.value = 0
+        self.count = 0
+
+    def add(self, row: dict) -> None:
+        value = row.get(self.column)
+        if value is not None:
+            self.value += value
+            self.count += 1
+
+    def result(self) -> Optional[int]:
+        return self.value if self.count else None
+
+
+class _Avg(_Sum):
+    __slots__ = ()
+
+    def result(self) -> Optional[float]:
+        return self.value / self.count if self.count else None
+
+
+class _Min:
+    __slots__ = ('column', 'value')
+
+    def __init__(self, column: str):
+        self.column = column
+        self.value = None
+
+    def add(self, row: dict) -> None:
+        value = row.get(self.column)
+        if value is not None and (self.value is None or value < self.value):
+            self.value = value
+
+    def result(self) -> Any:
+        return self.value
+
+
+class _Max(_Min):
+    __slots__ = ()
+
+    def add(self, row: dict) -> None:
+        value = row.get(self.column)
+        if value is not None and (self.value is None or value > self.value):
+            self.value = value
+
+
+ACCUMULATORS = {'count': _Count, 'sum': _Sum, 'avg': _Avg, 'min': _Min, 'max': _Max}
+
+
+def _output(items: List[SelectItem], key: Any, values: List[Any]) -> dict:
+    row = {}
+    aggregated = iter(values)
+    for item in items:
+        if isinstance(item, str):
+            row[item] = key
+        else:
+            row[item.label] = next(aggregated)
+    return row
+
+
+def _sorted_groups(groups: Dict[Any, Any]) -> List[Any]:
+    try:
+        return sorted(groups)
+    except TypeError:
+        return list(groups)
+
+
+def hash_aggregate(
+    records: Iterable[dict],
+    items: List[SelectItem],
+    group_by: Optional[str] = None,
+) -> List[dict]:
+    """Один проход по строкам: аккумуляторы по группам в хеш-таблице."""
+    aggregates = [item for item in items if isinstance(item, Aggregate)]
+
+    def new_group() -> list:
+        return [ACCUMULATORS[agg.func](agg.column) for agg in aggregates]
+
+    groups: Dict[Any, list] = {}
+    if group_by is None:
+        groups[None] = new_group()
+    for row in records:
+        key = row.get(group_by) if group_by is not None else None
+        accumulators = groups.get(key)
+        if accumulators is None:
+            accumulators = groups[key] = new_group()
+        for accumulator in accumulators:
+            accumulator.add(row)
+
+    return [
+        _output(items, key, [acc.result() for acc in groups[key]])
+        for key in _sorted_groups(groups)
+    ]
+
+
+def index_aggregate(
+    row_count: int,
+    indexes: Dict[str, Any],
+    items: List[SelectItem],
+    group_by: Optional[str] = None,
+) -> Optional[List[dict]]:
+    """Результат без просмотра строк (запрос без WHERE) или None.
+
+    count(*) берется из числа строк таблицы, min/max - с краев
+    sorted-индекса, а группы для count(*) - из ключей индекса столбца
+    GROUP BY.
+    """
+    aggregates = [item for item in items if isinstance(item, Aggregate)]
+    if group_by is not None:
+        index = indexes.get(group_by)
+        if index is None or any(agg.label != 'count(*)' for agg in aggregates):
+            return None
+        if index.kind == 'hash':
+            counts = {value: len(ids) for value, ids in index.entries.items()}
+        else:
+            counts = {}
+            for value, _ in index.entries:
+                counts[value] = counts.get(value, 0) + 1
+        return [
+            _output(items, key, [counts[key]] * len(aggregates))
+            for key in _sorted_groups(counts)
+        ]
+
+    values = []
+    for agg in aggregates:
+        if agg.label == 'count(*)':
+            values.append(row_count)
+            continue
+        index = indexes.get(agg.column)
+        if agg.func not in ('min', 'max') or index is None or index.kind != 'sorted':
+            return None
+        if not index.entries:
+            values.append(None)
+        else:
+            edge = index.entries[0] if agg.func == 'min' else index.entries[-1]
+            values.append(edge[0])
+    return [_output(items, None, values)]
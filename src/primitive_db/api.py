@@ -0,0 +1,344 @@
+# src/primitive_db/api.py
+
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .core import (
+    bump_table_version,
+    coerce_value,
+    db,
+    find_records,
+    parse_column_definition,
+    parse_value,
+    query_records,
+    validate_column_definition,
+)
+from .database import Database as Session
+from .predicate import Expr, WhereClause, bind, ensure_expr, parse_predicate
+from .rows import to_dict
+
+Row = Union[Mapping[str, Any], Sequence[Any]]
+Where = Union[str, WhereClause, None]
+
+
+class DatabaseError(Exception):
+    """Ошибка встроенного API БД."""
+
+
+class TableNotFoundError(DatabaseError, KeyError):
+    def __init__(self, table_name: str):
+        super().__init__(f"Таблица '{table_name}' не существует")
+        self.table_name = table_name
+
+    def __str__(self) -> str:
+        return self.args[0]
+
+
+class ValidationError(DatabaseError, ValueError):
+    """Значение, столбец или условие не соответствуют схеме таблицы."""
+
+
+def convert_value(value: Any, col_type: str) -> Any:
+    """Значение Python для столбца: строки str сохраняются как есть."""
+    if col_type == 'str' and isinstance(value, str):
+        return value
+    return coerce_value(value, col_type)
+
+
+class Table:
+    """Таблица встроенного API: операции над пачками строк без REPL.
+
+    Ошибки поднимаются исключениями (TableNotFoundError,
+    ValidationError), ничего не печатается и не спрашивается. Каждая
+    пакетная операция один раз берет блокировку, один раз проверяет
+    пачку по схеме и одной записью журнала фиксирует ее на диск.
+    """
+
+    def __init__(self, session: Session, name: str):
+        self._db = session
+        self.name = name
+
+    def _meta(self) -> dict:
+        meta = self._db.table_meta(self.name)
+        if meta is None:
+            raise TableNotFoundError(self.name)
+        return meta
+
+    @property
+    def columns(self) -> List[Tuple[str, str]]:
+        """Столбцы (имя, тип), включая ID."""
+        return [
+            ("ID", "int") if col_def == "ID:int" else parse_column_definition(col_def)
+            for col_def in self._meta()["columns"]
+        ]
+
+    @property
+    def schema(self) -> Dict[str, str]:
+        return dict(self.columns)
+
+    def _where(self, where: Where, schema: Dict[str, str]) -> Optional[Expr]:
+        try:
+            expr = parse_predicate(where) if isinstance(where, str) else where
+            return bind(ensure_expr(expr), schema, parse_value)
+        except ValueError as e:
+            raise ValidationError(str(e)) from None
+
+    def _record(self, row: Row, user_columns: List[Tuple[str, str]]) -> dict:
+        if isinstance(row, Mapping):
+            unknown = set(row) - {name for name, _ in user_columns} - {"ID"}
+            if unknown:
+                raise ValidationError(f"Неизвестные столбцы: {sorted(unknown)}")
+            values = [row.get(name) for name, _ in user_columns]
+        else:
+            values = list(row)
+            if len(values) != len(user_columns):
+                raise ValidationError(
+                    f"Ожидается {len(user_columns)} значений, получено {len(values)}"
+                )
+        record = {"ID": None}
+        for (name, col_type), value in zip(user_columns, values):
+            try:
+                record[name] = convert_value(value, col_type)
+            except ValueError as e:
+                raise ValidationError(f"Столбец '{name}': {e}") from None
+        return record
+
+    def _changes(self, changes: Mapping[str, Any], schema: Dict[str, str]) -> dict:
+        converted = {}
+        for name, value in changes.items():
+            if name not in schema or name == "ID":
+                raise ValidationError(f"Столбец '{name}' нельзя изменить")
+            try:
+                converted[name] = convert_value(value, schema[name])
+            except ValueError as e:
+                raise ValidationError(f"Столбец '{name}': {e}") from None
+        return converted
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        with self._db.writing():
+            try:
+                yield
+            finally:
+                self._db.autocommit()
+
+    def _write(self, records: List[dict]) -> None:
+        self._db.write(self.name, records)
+        bump_table_version(self.name)
+
+    def insert(self, row: Row) -> int:
+        """Добавляет строку (словарь или значения по порядку); возвращает ID."""
+        return self.insert_many([row])[0]
+
+    def insert_many(self, rows: Iterable[Row]) -> List[int]:
+        """Добавляет строки одной пачкой; при ошибке не добавляется ни одна."""
+        with self._writing():
+            user_columns = self.columns[1:]
+            records = [self._record(row, user_columns) for row in rows]
+            if not records:
+                return []
+            first_id = self._db.reserve_ids(self.name, len(records))
+            for new_id, record in enumerate(records, first_id):
+                record["ID"] = new_id
+            self._write([{"op": "insert_many", "rows": records}])
+            return [record["ID"] for record in records]
+
+    def update_where(self, changes: Mapping[str, Any], where: Where = None) -> int:
+        """Меняет значения в строках по условию; возвращает число строк."""
+        with self._writing():
+            schema = self.schema
+            converted = self._changes(changes, schema)
+            expr = self._where(where, schema)
+            matched = find_records(self._db.table(self.name), expr)
+            if matched and converted:
+                self._write([
+                    {"op": "update", "id": record["ID"], "set": converted}
+                    for record in matched
+                ])
+            return len(matched)
+
+    def update_many(
+        self, updates: Union[Mapping[int, Mapping[str, Any]], Iterable[tuple]]
+    ) -> int:
+        """Изменения по ID ({ID: {столбец: значение}} или пары) одной пачкой.
+
+        Несуществующие ID пропускаются; возвращает число обновленных строк.
+        """
+        if isinstance(updates, Mapping):
+            updates = updates.items()
+        with self._writing():
+            schema = self.schema
+            rows = self._db.table(self.name).rows
+            log_records = [
+                {"op": "update", "id": record_id, "set": self._changes(changes, schema)}
+                for record_id, changes in updates
+            ]
+            log_records = [record for record in log_records if record["id"] in rows]
+            if log_records:
+                self._write(log_records)
+            return len(log_records)
+
+    def delete_where(self, where: Where) -> int:
+        """Удаляет строки по условию; для всех строк есть clear()."""
+        if not where:
+            raise ValidationError("Условие удаления не задано, используйте clear()")
+        with self._writing():
+            expr = self._where(where, self.schema)
+            matched = find_records(self._db.table(self.name), expr)
+            ids = [record["ID"] for record in matched]
+            if ids:
+                self._write([{"op": "delete", "ids": ids}])
+            return len(ids)
+
+    def clear(self) -> None:
+        with self._writing():
+            self._meta()
+            self._write([{"op": "clear"}])
+
+    def get(self, record_id: int) -> Optional[dict]:
+        with self._db.reading():
+            self._meta()
+            row = self._db.table(self.name).rows.get(record_id)
+            return to_dict(row) if row is not None else None
+
+    def scan(
+        self,
+        where: Where = None,
+        columns: Optional[List[str]] = None,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Iterator[dict]:
+        """Строки по условию генератором, по мере просмотра таблицы.
+
+        Условие - текст WHERE, словарь равенств или выражение predicate.
+        Генератор нужно дочитать до следующего изменения таблицы.
+        """
+        with self._db.reading():
+            schema = self.schema
+            for column in [*(columns or ()), *([order_by] if order_by else [])]:
+                if column not in schema:
+                    raise ValidationError(f"Столбец '{column}' не существует")
+            if (limit is not None and limit < 0) or offset < 0:
+                raise ValidationError("LIMIT и OFFSET не могут быть отрицательными")
+            expr = self._where(where, schema)
+            state = self._db.table(self.name)
+            records = query_records(
+                state, expr, order_by, descending, limit, offset, lazy=True
+            )
+        if columns:
+            return (
+                {column: record[column] for column in columns} for record in records
+            )
+        return map(to_dict, records)
+
+    def count(self, where: Where = None) -> int:
+        with self._db.reading():
+            expr = self._where(where, self.schema)
+            state = self._db.table(self.name)
+            if expr is None:
+                return len(state.rows)
+            return len(find_records(state, expr))
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __iter__(self) -> Iterator[dict]:
+        return self.scan()
+
+    def __repr__(self) -> str:
+        return f"Table({self.name!r})"
+
+
+class Database:
+    """Встроенный API БД для использования из кода Python.
+
+        with Database() as database:
+            users = database.create_table("users", {"name": "str", "age": "int"})
+            users.insert_many([{"name": "Bob", "age": 30}, ("Ann", 25)])
+            adults = list(users.scan("age >= 18", order_by="age"))
+
+    Работает с той же сессией, что REPL и сервер (по умолчанию core.db).
+    """
+
+    def __init__(self, session: Optional[Session] = None):
+        self._db = session if session is not None else db
+
+    def table(self, name: str) -> Table:
+        if self._db.table_meta(name) is None:
+            raise TableNotFoundError(name)
+        return Table(self._db, name)
+
+    __getitem__ = table
+
+    def tables(self) -> List[str]:
+        return list(self._db.metadata())
+
+    def create_table(
+        self, name: str, columns: Union[Mapping[str, str], Sequence[str]]
+    ) -> Table:
+        """Создает таблицу; columns - {имя: тип} или ["имя:тип", ...]."""
+        if isinstance(columns, Mapping):
+            columns = [f"{column}:{col_type}" for column, col_type in columns.items()]
+        validated = ["ID:int"]
+        for col_def in columns:
+            if not validate_column_definition(col_def):
+                raise ValidationError(f"Некорректное определение столбца: '{col_def}'")
+            validated.append("{}:{}".format(*parse_column_definition(col_def)))
+        with self._db.writing():
+            try:
+                metadata = self._db.metadata()
+                if name in metadata:
+                    raise DatabaseError(f"Таблица '{name}' уже существует")
+                metadata[name] = {"columns": validated, "next_id": 1}
+                self._db.save_metadata(metadata)
+                self._db.create_table(name)
+                bump_table_version(name)
+            finally:
+                self._db.autocommit()
+        return Table(self._db, name)
+
+    def drop_table(self, name: str) -> None:
+        with self._db.writing():
+            try:
+                metadata = self._db.metadata()
+                if name not in metadata:
+                    raise TableNotFoundError(name)
+                del metadata[name]
+                self._db.save_metadata(metadata)
+                self._db.drop_table(name)
+                bump_table_version(name)
+            finally:
+                self._db.autocommit()
+
+    @contextmanager
+    def transaction(self) -> Iterator["Database"]:
+        """begin ... commit; при исключении изменения отменяются."""
+        self._db.begin()
+        try:
+            yield self
+        except BaseException:
+            self._db.rollback()
+            raise
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "Database":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,75 @@
+# src/primitive_db/client.py
+
+import json
+import socket
+from typing import Any, Dict, List, Optional
+
+from .constants import SERVER_HOST, SERVER_PORT
+
+
+class ServerError(Exception):
+    """Команда выполнена сервером с ошибкой (ok = false)."""
+
+    def __init__(self, result: Dict[str, Any]):
+        super().__init__(result.get("message", ""))
+        self.result = result
+
+
+class Client:
+    """Тонкий клиент сервера БД: одна команда - один JSON-ответ.
+
+        with Client(port=8765) as client:
+            client.execute("insert users Bob 30 true")
+            rows = client.select("users where age > 18")
+    """
+
+    def __init__(
+        self,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        socket_path: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        if socket_path is not None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(socket_path)
+        else:
+            self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._sock.makefile("rwb")
+
+    def execute(self, command_line: str) -> Dict[str, Any]:
+        """Отправляет команду и возвращает ответ сервера как словарь."""
+        if "\n" in command_line:
+            raise ValueError("Команда не должна содержать перевод строки")
+        self._file.write(command_line.encode("utf-8") + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Сервер закрыл соединение")
+        return json.loads(line)
+
+    def check(self, command_line: str) -> Dict[str, Any]:
+        """Как execute, но при ok = false поднимает ServerError."""
+        result = self.execute(command_line)
+        if not result["ok"]:
+            raise ServerError(result)
+        return result
+
+    def select(self, query: str) -> List[dict]:
+        return self.check(f"select {query}")["rows"]
+
+    def close(self) -> None:
+        try:
+            self._file.write(b"exit\n")
+            self._file.flush()
+        except OSError:
+            pass
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,691 @@
+# src/primitive_db/commands.py
+
+import shlex
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    from decorators import create_cacher
+except ImportError:
+    from src.decorators import create_cacher
+
+from .aggregate import Aggregate
+from .constants import DEFAULT_TABLE_FORMAT, STATEMENT_CACHE_SIZE
+from .core import (
+    aggregate,
+    begin_transaction,
+    commit_transaction,
+    compress_table,
+    convert_table,
+    create_index,
+    create_table,
+    delete,
+    delete_all,
+    drop_table,
+    explain,
+    export_table,
+    get_metadata,
+    get_table_schema,
+    import_table,
+    insert,
+    rollback_transaction,
+    select,
+    select_cacher,
+    select_stream,
+    table_sizes,
+    update,
+)
+from .metrics import metrics, profile_mode, start_profile, stop_profile
+from .parser import (
+    parse_select_list,
+    parse_set_clause,
+    parse_where_clause,
+)
+from .predicate import (
+    PLACEHOLDER,
+    Expr,
+    Literal,
+    count_params,
+    fill_params,
+    parse_literals,
+)
+
+Result = Dict[str, Any]
+Params = Iterator[Literal]
+
+
+class Quoted(str):
+    """Аргумент, записанный в кавычках (или с экранированием).
+
+    Кавычки снимает shlex, а '?' в кавычках - значение, а не параметр.
+    source - исходный текст аргумента: requote() возвращает его, чтобы
+    кавычки пережили повторный разбор WHERE/SET.
+    """
+
+    def __new__(cls, value: str, source: Optional[str] = None) -> "Quoted":
+        token = super().__new__(cls, value)
+        token.source = source
+        return token
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _split_command(command: str) -> Tuple[str, ...]:
+    """shlex.split, но аргументы, текст которых менялся при разборе, - Quoted."""
+    lexer = shlex.shlex(command, posix=True)
+    lexer.whitespace_split = True
+    lexer.commenters = ''
+    parts = []
+    start = 0
+    for token in lexer:
+        end = lexer.instream.tell()
+        raw = command[start:end].strip()
+        start = end
+        parts.append(token if raw == token else Quoted(token, raw))
+    return tuple(parts)
+
+
+def is_placeholder(arg: str) -> bool:
+    """'?' без кавычек: параметр подготовленной команды."""
+    return arg == PLACEHOLDER.raw and not isinstance(arg, Quoted)
+
+
+def parse_command(command: str, template: bool = False) -> Tuple[str, List[str]]:
+    """Имя команды и аргументы.
+
+    '?' без кавычек - параметр только в шаблоне подготовленной команды
+    (template или сама команда prepare); в обычной команде это значение.
+    """
+    try:
+        parts = _split_command(command.strip())
+        if not parts:
+            return "", []
+        if not template and parts[0] != "prepare":
+            parts = [Quoted(part) if is_placeholder(part) else part for part in parts]
+
+        cmd_name = parts[0]
+        args = list(parts[1:])
+        return cmd_name, args
+    except ValueError as e:
+        raise ValueError(f"Ошибка разбора команды: {e}")
+
+
+def requote(token: str) -> str:
+    """Возвращает кавычки, снятые shlex.split: значению с пробелами и Quoted."""
+    if isinstance(token, Quoted):
+        # Экранирование \ грамматики WHERE/SET не знают - тогда кавычки заново
+        if token.source and '\\' not in token.source:
+            return token.source
+    elif not any(char.isspace() for char in token):
+        return token
+    quote = "'" if "'" not in token else '"'
+    return f"{quote}{token}{quote}"
+
+
+def extract_where_clause(args: List[str]) -> Tuple[List[str], Optional[Expr]]:
+    """Извлекает условие WHERE из аргументов."""
+    where_clause = None
+    if 'where' in args:
+        where_index = args.index('where')
+        where_str = ' '.join(requote(arg) for arg in args[where_index + 1:])
+        args = args[:where_index]
+
+        try:
+            where_clause = parse_where_clause(where_str)
+        except ValueError as e:
+            raise ValueError(f"Ошибка в условии WHERE: {e}")
+
+    return args, where_clause
+
+
+def extract_set_clause(args: List[str]) -> Tuple[List[str], dict]:
+    """Извлекает условие SET из аргументов."""
+    set_clause = {}
+    if 'set' in args:
+        set_index = args.index('set')
+        if 'where' in args[set_index:]:
+            where_index = args.index('where', set_index)
+            set_str = ' '.join(requote(arg) for arg in args[set_index + 1:where_index])
+            args = args[:set_index] + args[where_index:]
+        else:
+            set_str = ' '.join(requote(arg) for arg in args[set_index + 1:])
+            args = args[:set_index]
+
+        try:
+            set_clause = parse_set_clause(set_str)
+        except ValueError as e:
+            raise ValueError(f"Ошибка в условии SET: {e}")
+
+    return args, set_clause
+
+
+def make_result(success: bool, message: str, **data: Any) -> Result:
+    """Структурированный результат команды, пригодный для JSON."""
+    return {"ok": success, "message": message, **data}
+
+
+def usage_error(usage: str) -> Result:
+    return make_result(False, f"Неверные аргументы. Использование: {usage}")
+
+
+class Statement:
+    """Разобранная команда: разбор один раз, выполнение - сколько угодно раз.
+
+    run получает итератор значений параметров '?' в порядке их
+    появления в тексте команды; params - их число.
+    """
+
+    __slots__ = ('run', 'params')
+
+    def __init__(self, run: Callable[[Params], Result], params: int = 0):
+        self.run = run
+        self.params = params
+
+    def __call__(self, params: Sequence[Literal] = ()) -> Result:
+        if len(params) != self.params:
+            return make_result(
+                False,
+                f"Ожидалось параметров: {self.params}, передано: {len(params)}",
+            )
+        return self.run(iter(params))
+
+
+def constant(result: Result) -> Statement:
+    """Команда с готовым результатом; из кэша выдается его копия."""
+    return Statement(lambda params: dict(result))
+
+
+def fill_values(values: List[Any], params: Params) -> List[Any]:
+    return [next(params).raw if value is PLACEHOLDER else value for value in values]
+
+
+def fill_set(set_clause: dict, params: Params) -> dict:
+    return {
+        field: next(params).raw if value is PLACEHOLDER else value
+        for field, value in set_clause.items()
+    }
+
+
+def count_values(values: Any) -> int:
+    return sum(1 for value in values if value is PLACEHOLDER)
+
+
+Compiled = Union[Statement, Result]
+COMMANDS: Dict[str, Callable[[List[str]], Compiled]] = {}
+# Команды, умеющие отдавать строки генератором (аргумент stream)
+STREAMING_COMMANDS = set()
+# Команды, получающие текст аргументов целиком, без shlex.split
+RAW_COMMANDS = set()
+
+statement_cache = create_cacher(max_entries=STATEMENT_CACHE_SIZE)
+prepared: Dict[str, Tuple[str, Dict[bool, Statement]]] = {}
+
+
+def command(name: str, streaming: bool = False, raw: bool = False) -> Callable:
+    """Регистрирует обработчик: аргументы -> Statement (или Result с ошибкой)."""
+    def register(func: Callable[[List[str]], Compiled]) -> Callable:
+        COMMANDS[name] = func
+        if streaming:
+            STREAMING_COMMANDS.add(name)
+        if raw:
+            RAW_COMMANDS.add(name)
+        return func
+    return register
+
+
+@command("help")
+def _help(args: List[str]) -> Compiled:
+    return Statement(
+        lambda params: make_result(
+            True, "Доступные команды", commands=sorted(COMMANDS)
+        )
+    )
+
+
+@command("begin")
+def _begin(args: List[str]) -> Compiled:
+    return Statement(lambda params: make_result(*begin_transaction()))
+
+
+@command("commit")
+def _commit(args: List[str]) -> Compiled:
+    return Statement(lambda params: make_result(*commit_transaction()))
+
+
+@command("rollback")
+def _rollback(args: List[str]) -> Compiled:
+    return Statement(lambda params: make_result(*rollback_transaction()))
+
+
+@command("cache_stats")
+def _cache_stats(args: List[str]) -> Compiled:
+    return Statement(lambda params: make_result(
+        True,
+        "Статистика кэша select",
+        stats=select_cacher.stats(),
+        statements=statement_cache.stats(),
+    ))
+
+
+@command("stats")
+def _stats(args: List[str]) -> Compiled:
+    if not args:
+        return Statement(lambda params: make_result(
+            True, "Метрики", metrics=metrics.snapshot(), profile=profile_mode()
+        ))
+    if args == ["reset"]:
+        def reset(params: Params) -> Result:
+            metrics.reset()
+            return make_result(True, "Метрики сброшены")
+        return Statement(reset)
+    if len(args) == 2 and args[0] == "dump":
+        filepath = args[1]
+
+        def dump(params: Params) -> Result:
+            try:
+                metrics.dump(filepath)
+            except OSError as e:
+                return make_result(False, f"Не удалось сохранить метрики: {e}")
+            return make_result(True, f"Метрики сохранены в {filepath}")
+        return Statement(dump)
+    return usage_error("stats [reset | dump <файл.json>]")
+
+
+@command("profile")
+def _profile(args: List[str]) -> Compiled:
+    if len(args) != 1:
+        return usage_error("profile cpu|memory|off")
+    mode = args[0]
+
+    def run(params: Params) -> Result:
+        try:
+            if mode == "off":
+                return make_result(True, "Отчет профилирования", report=stop_profile())
+            start_profile(mode)
+        except ValueError as e:
+            return make_result(False, str(e))
+        return make_result(True, f"Профилирование {mode} включено")
+    return Statement(run)
+
+
+@command("list_tables")
+def _list_tables(args: List[str]) -> Compiled:
+    def run(params: Params) -> Result:
+        tables = list(get_metadata().keys())
+        message = "Список таблиц" if tables else "В базе данных нет таблиц."
+        return make_result(True, message, tables=tables)
+    return Statement(run)
+
+
+@command("create_table")
+def _create_table(args: List[str]) -> Compiled:
+    if len(args) < 2:
+        return usage_error("create_table <имя> <столбец1:тип> ...")
+    table_name, columns = args[0], args[1:]
+    return Statement(lambda params: make_result(*create_table(table_name, columns)))
+
+
+@command("drop_table")
+def _drop_table(args: List[str]) -> Compiled:
+    if len(args) != 1:
+        return usage_error("drop_table <имя_таблицы>")
+    table_name = args[0]
+    return Statement(lambda params: make_result(*drop_table(table_name)))
+
+
+@command("create_index")
+def _create_index(args: List[str]) -> Compiled:
+    if len(args) not in (2, 3):
+        return usage_error("create_index <таблица> <столбец> [hash|sorted]")
+    table_name, column = args[0], args[1]
+    kind = args[2] if len(args) == 3 else 'hash'
+    return Statement(
+        lambda params: make_result(*create_index(table_name, column, kind))
+    )
+
+
+@command("convert_table")
+def _convert_table(args: List[str]) -> Compiled:
+    if len(args) != 2:
+        return usage_error("convert_table <таблица> <json|columnar>")
+    table_name, format_name = args
+    return Statement(
+        lambda params: make_result(*convert_table(table_name, format_name))
+    )
+
+
+@command("compress_table")
+def _compress_table(args: List[str]) -> Compiled:
+    if len(args) != 2:
+        return usage_error("compress_table <таблица> <zlib|lzma|bz2|none>")
+    table_name, codec_name = args
+    return Statement(
+        lambda params: make_result(*compress_table(table_name, codec_name))
+    )
+
+
+@command("describe")
+def _describe(args: List[str]) -> Compiled:
+    if len(args) != 1:
+        return usage_error("describe <имя_таблицы>")
+    table_name = args[0]
+
+    def run(params: Params) -> Result:
+        table_meta = get_metadata().get(table_name)
+        if table_meta is None:
+            return make_result(False, f"Таблица '{table_name}' не существует")
+
+        size, raw_size = table_sizes(table_name)
+        return make_result(
+            True,
+            f"Структура таблицы '{table_name}'",
+            schema=[list(column) for column in get_table_schema(table_name)],
+            format=table_meta.get("format", DEFAULT_TABLE_FORMAT),
+            compression=table_meta.get("compression", "none"),
+            size=size,
+            raw_size=raw_size,
+            indexes=table_meta.get("indexes", {}),
+        )
+    return Statement(run)
+
+
+@command("insert")
+def _insert(args: List[str]) -> Compiled:
+    if len(args) < 2:
+        return usage_error("insert <таблица> <значение1> ...")
+    table_name = args[0]
+    values = [PLACEHOLDER if is_placeholder(arg) else str(arg) for arg in args[1:]]
+    return Statement(
+        lambda params: make_result(*insert(table_name, fill_values(values, params))),
+        count_values(values),
+    )
+
+
+def extract_group_by(args: List[str]) -> Tuple[List[str], Optional[str]]:
+    """Извлекает GROUP BY <столбец> из конца аргументов."""
+    for i in range(len(args) - 1):
+        if args[i].lower() == 'group' and args[i + 1].lower() == 'by':
+            if len(args) != i + 3:
+                raise ValueError("Ожидался один столбец после GROUP BY")
+            return args[:i], args[i + 2]
+    return args, None
+
+
+def extract_order_limit(args: List[str]) -> Tuple[List[str], dict]:
+    """Извлекает ORDER BY <столбец> [asc|desc], LIMIT n и OFFSET m из конца."""
+    words = [arg.lower() for arg in args]
+    start = len(args)
+    for i, word in enumerate(words):
+        if word in ('limit', 'offset') or words[i:i + 2] == ['order', 'by']:
+            start = i
+            break
+
+    options = {"order_by": None, "descending": False, "limit": None, "offset": 0}
+    seen = set()
+    i = start
+    while i < len(args):
+        word = words[i]
+        if word in seen:
+            raise ValueError(f"Повторное {word.upper()}")
+        seen.add(word)
+        if word == 'order' and words[i + 1:i + 2] == ['by'] and i + 2 < len(args):
+            options["order_by"] = args[i + 2]
+            i += 3
+            if i < len(args) and words[i] in ('asc', 'desc'):
+                options["descending"] = words[i] == 'desc'
+                i += 1
+        elif word in ('limit', 'offset') and i + 1 < len(args):
+            try:
+                options[word] = int(args[i + 1])
+            except ValueError:
+                raise ValueError(f"{word.upper()} должно быть целым числом")
+            i += 2
+        else:
+            raise ValueError(f"Неожиданный текст: '{args[i]}'")
+    return args[:start], options
+
+
+def _select_from(args: List[str], stream: bool = False) -> Compiled:
+    from_index = args.index('from')
+    if from_index == 0 or from_index + 1 >= len(args):
+        return usage_error(
+            "select <список> from <таблица> [where условие] [group by столбец] "
+            "[order by столбец [asc|desc]] [limit n] [offset m]"
+        )
+    items = parse_select_list(' '.join(args[:from_index]))
+    table_name = args[from_index + 1]
+    remaining_args, options = extract_order_limit(args[from_index + 2:])
+    remaining_args, group_by = extract_group_by(remaining_args)
+    if remaining_args and remaining_args[0] != 'where':
+        return make_result(False, f"Неожиданный текст: '{remaining_args[0]}'")
+    remaining_args, where_clause = extract_where_clause(remaining_args)
+
+    if group_by is not None or any(isinstance(i, Aggregate) for i in items):
+        def run(params: Params) -> Result:
+            where = fill_params(where_clause, params)
+            success, message, data = aggregate(
+                table_name, items, where, group_by, **options
+            )
+            return make_result(success, message, rows=data)
+    else:
+        action = select_stream if stream else select
+
+        def run(params: Params) -> Result:
+            where = fill_params(where_clause, params)
+            success, message, data = action(
+                table_name, where, items or None, **options
+            )
+            return make_result(success, message, rows=data)
+    return Statement(run, count_params(where_clause))
+
+
+@command("select", streaming=True)
+def _select(args: List[str], stream: bool = False) -> Compiled:
+    if len(args) < 1:
+        return usage_error("select <таблица> [where условие]")
+    if 'from' in args:
+        return _select_from(args, stream)
+    remaining_args, options = extract_order_limit(args[1:])
+    remaining_args, where_clause = extract_where_clause(remaining_args)
+    if remaining_args:
+        return make_result(False, f"Неожиданный текст: '{remaining_args[0]}'")
+    table_name = args[0]
+    action = select_stream if stream else select
+
+    def run(params: Params) -> Result:
+        where = fill_params(where_clause, params)
+        success, message, data = action(table_name, where, **options)
+        return make_result(success, message, rows=data)
+    return Statement(run, count_params(where_clause))
+
+
+@command("explain")
+def _explain(args: List[str]) -> Compiled:
+    if len(args) < 2 or args[0] != "select":
+        return usage_error("explain select <таблица> [where условие]")
+    table_name = args[1]
+    remaining_args, where_clause = extract_where_clause(args[2:])
+    return Statement(
+        lambda params: make_result(
+            *explain(table_name, fill_params(where_clause, params))
+        ),
+        count_params(where_clause),
+    )
+
+
+@command("import")
+def _import(args: List[str]) -> Compiled:
+    if len(args) != 2:
+        return usage_error("import <таблица> <файл.csv|файл.jsonl>")
+    table_name, filepath = args
+    return Statement(lambda params: make_result(*import_table(table_name, filepath)))
+
+
+@command("export")
+def _export(args: List[str]) -> Compiled:
+    if len(args) != 2:
+        return usage_error("export <таблица> <файл.csv|файл.jsonl>")
+    table_name, filepath = args
+    return Statement(lambda params: make_result(*export_table(table_name, filepath)))
+
+
+@command("update")
+def _update(args: List[str]) -> Compiled:
+    if len(args) < 1:
+        return usage_error("update <таблица> set поле=значение [where условие]")
+    remaining_args, set_clause = extract_set_clause(args[1:])
+    if not set_clause:
+        return make_result(False, "Отсутствует условие SET")
+    remaining_args, where_clause = extract_where_clause(remaining_args)
+    table_name = args[0]
+
+    def run(params: Params) -> Result:
+        changes = fill_set(set_clause, params)
+        return make_result(
+            *update(table_name, changes, fill_params(where_clause, params))
+        )
+    params = count_values(set_clause.values()) + count_params(where_clause)
+    return Statement(run, params)
+
+
+@command("delete")
+def _delete(args: List[str]) -> Compiled:
+    if len(args) < 1:
+        return usage_error("delete <таблица> [where условие]")
+    remaining_args, where_clause = extract_where_clause(args[1:])
+    if not where_clause:
+        return make_result(
+            False, "Для удаления всех записей используйте команду 'delete_all'"
+        )
+    table_name = args[0]
+    return Statement(
+        lambda params: make_result(
+            *delete(table_name, fill_params(where_clause, params))
+        ),
+        count_params(where_clause),
+    )
+
+
+@command("delete_all")
+def _delete_all(args: List[str]) -> Compiled:
+    if len(args) != 1:
+        return usage_error("delete_all <таблица>")
+    table_name = args[0]
+    return Statement(lambda params: make_result(*delete_all(table_name)))
+
+
+@command("prepare")
+def _prepare(args: List[str]) -> Compiled:
+    if len(args) < 3 or args[1] != 'as':
+        return usage_error("prepare <имя> as <команда с параметрами ?>")
+    name = args[0]
+    text = ' '.join(requote(arg) for arg in args[2:])
+    cmd_name, _ = parse_command(text, template=True)
+    if cmd_name in ("prepare", "execute", "deallocate"):
+        return make_result(False, f"Команду '{cmd_name}' нельзя подготовить")
+    statement = compile_command(text, template=True)
+
+    def run(params: Params) -> Result:
+        prepared[name] = (text, {False: statement})
+        return make_result(
+            True,
+            f"Команда '{name}' подготовлена (параметров: {statement.params})",
+        )
+    return Statement(run)
+
+
+@command("execute", streaming=True, raw=True)
+def _execute(text: str, stream: bool = False) -> Compiled:
+    name, _, rest = text.strip().partition(' ')
+    if not name:
+        return usage_error("execute <имя> [(значение1, значение2, ...)]")
+    values = parse_literals(rest)
+
+    def run(params: Params) -> Result:
+        entry = prepared.get(name)
+        if entry is None:
+            return make_result(False, f"Подготовленная команда '{name}' не найдена")
+        template, statements = entry
+        statement = statements.get(stream)
+        if statement is None:
+            statement = statements[stream] = compile_command(
+                template, stream, template=True
+            )
+        return statement(values)
+    return Statement(run)
+
+
+@command("deallocate")
+def _deallocate(args: List[str]) -> Compiled:
+    if len(args) != 1:
+        return usage_error("deallocate <имя>")
+    name = args[0]
+
+    def run(params: Params) -> Result:
+        if prepared.pop(name, None) is None:
+            return make_result(False, f"Подготовленная команда '{name}' не найдена")
+        return make_result(True, f"Команда '{name}' удалена")
+    return Statement(run)
+
+
+def compile_parsed(
+    cmd_name: str, args: Union[List[str], str], stream: bool = False
+) -> Statement:
+    """Разбирает аргументы команды в Statement (без кэша)."""
+    handler = COMMANDS.get(cmd_name)
+    if handler is None:
+        return constant(make_result(False, f"Команда '{cmd_name}' не найдена."))
+    if cmd_name in RAW_COMMANDS and not isinstance(args, str):
+        args = ' '.join(requote(arg) for arg in args)
+    if stream and cmd_name in STREAMING_COMMANDS:
+        compiled = handler(args, stream=True)
+    else:
+        compiled = handler(args)
+    return compiled if isinstance(compiled, Statement) else constant(compiled)
+
+
+def compile_command(
+    command_line: str, stream: bool = False, template: bool = False
+) -> Statement:
+    """Statement по тексту команды из LRU-кэша разобранных команд.
+
+    Повтор той же команды не разбирает текст заново: shlex, разбор
+    WHERE/SET и списка select выполняются один раз. Ошибки разбора
+    (ValueError) не кэшируются. template - текст подготовленной команды
+    с параметрами '?'.
+    """
+    command_line = command_line.strip()
+
+    @metrics.timed("parse")
+    def build() -> Statement:
+        cmd_name, args = parse_command(command_line, template)
+        if not cmd_name:
+            return constant(make_result(False, "Пустая команда"))
+        if cmd_name in RAW_COMMANDS:
+            args = command_line[len(cmd_name):]
+        return compile_parsed(cmd_name, args, stream)
+
+    return statement_cache((command_line, stream, template), build)
+
+
+def execute_parsed(cmd_name: str, args: List[str], stream: bool = False) -> Result:
+    """Выполняет разобранную команду.
+
+    С stream=True команды из STREAMING_COMMANDS возвращают в rows
+    генератор вместо списка.
+    """
+    try:
+        return compile_parsed(cmd_name, args, stream)()
+    except ValueError as e:
+        return make_result(False, str(e))
+
+
+def execute(command_line: str, stream: bool = False) -> Result:
+    """Выполняет одну команду языка БД и возвращает структурированный результат."""
+    try:
+        result = compile_command(command_line, stream)()
+    except ValueError as e:
+        result = make_result(False, str(e))
+    metrics.count("commands")
+    if not result["ok"]:
+        metrics.count("errors")
+    return result
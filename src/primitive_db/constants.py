@@ -1,4 +1,36 @@
 # src/primitive_db/constants.py
 DB_META_FILE = 'db_meta.json'
 DATA_DIR = 'data'
-SUPPORTED_TYPES = {'int', 'str', 'bool'}
\ No newline at end of file
+SUPPORTED_TYPES = {'int', 'str', 'bool'}
+LOG_SUFFIX = '.log'
+INDEX_SUFFIX = '.idx.json'
+JOURNAL_SUFFIX = '.journal'
+LOCK_SUFFIX = '.lock'
+WRITER_LOCK_SUFFIX = '.wlock'
+LOG_COMPACT_MIN_BYTES = 64 * 1024
+INDEX_KINDS = {'hash', 'sorted'}
+SELECT_CACHE_MAX_ENTRIES = 128
+SELECT_CACHE_MAX_ROWS = 100_000
+DEFAULT_TABLE_FORMAT = 'json'
+HISTOGRAM_BUCKETS = 10
+ANALYZE_CHANGE_RATIO = 0.1
+DEFAULT_SELECTIVITY = 1 / 3
+ROW_CHECK_COST = 1.0
+INDEX_PROBE_COST = 1.0
+KEY_CHECK_COST = 0.1
+IMPORT_BATCH_SIZE = 10_000
+EXPORT_BATCH_SIZE = 10_000
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+SERVER_LINE_LIMIT = 1024 * 1024
+SERVER_TRANSACTION_TIMEOUT = 30.0
+SCAN_WORKERS = None
+PARALLEL_SCAN_MIN_ROWS = 200_000
+SCAN_CHUNKS_PER_WORKER = 4
+DEFAULT_PAGE_SIZE = 100
+SCRIPT_FLUSH_EVERY = 10_000
+STATEMENT_CACHE_SIZE = 512
+METRICS_SAMPLES = 4096
+PROFILE_TOP = 20
+DICT_MAX_VALUES = 4096
+COMPRESSION_GROUP_ROWS = 10_000
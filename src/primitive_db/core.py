@@ -1,22 +1,86 @@
 # src/primitive_db/core.py
-import os
-from typing import Any, Dict, List, Optional, Tuple
+import heapq
+from functools import lru_cache, partial, wraps
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 try:
     from decorators import confirm_action, create_cacher, handle_db_errors, log_time
 except ImportError:
     from src.decorators import confirm_action, create_cacher, handle_db_errors, log_time
 
-from .constants import DB_META_FILE, SUPPORTED_TYPES
-from .utils import (
-    get_table_filepath,
-    load_metadata,
-    load_table_data,
-    save_metadata,
-    save_table_data,
+from .aggregate import (
+    SelectItem,
+    bind_aggregates,
+    hash_aggregate,
+    index_aggregate,
 )
+from .constants import (
+    DEFAULT_TABLE_FORMAT,
+    EXPORT_BATCH_SIZE,
+    IMPORT_BATCH_SIZE,
+    SELECT_CACHE_MAX_ENTRIES,
+    SELECT_CACHE_MAX_ROWS,
+    STATEMENT_CACHE_SIZE,
+    SUPPORTED_TYPES,
+)
+from .database import Database
+from .formats import get_codec, get_format
+from .index import make_index
+from .metrics import metrics
+from .planner import FullScan, QueryPlan, plan_query
+from .predicate import (
+    Expr,
+    WhereClause,
+    bind,
+    compile_predicate,
+    ensure_expr,
+)
+from .rows import column_getter, to_dict
+from .scan import parallel_filter, scan_workers
+from .storage import MappedRows, snapshot_sizes
+from .transfer import batches, file_kind, read_rows, write_rows
+
+db = Database()
+
+select_cacher = create_cacher(
+    max_entries=SELECT_CACHE_MAX_ENTRIES,
+    max_size=SELECT_CACHE_MAX_ROWS,
+    size_of=lambda result: len(result[2]) + 1,
+)
+_table_versions: Dict[str, int] = {}
+
+
+def write_locked(func: Callable) -> Callable:
+    """Команда записи под блокировкой писателя с фиксацией до ее снятия."""
+    @wraps(func)
+    def wrapper(*args, **kwargs) -> Any:
+        with db.writing():
+            try:
+                return func(*args, **kwargs)
+            finally:
+                db.autocommit()
+    return wrapper
+
+
+def read_locked(func: Callable) -> Callable:
+    """Команда чтения под разделяемой блокировкой данных."""
+    @wraps(func)
+    def wrapper(*args, **kwargs) -> Any:
+        with db.reading():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def get_table_version(table_name: str) -> int:
+    return _table_versions.get(table_name, 0)
 
-select_cacher = create_cacher()
+
+def bump_table_version(table_name: str) -> None:
+    """Отмечает изменение таблицы и сбрасывает связанные результаты в кэше."""
+    _table_versions[table_name] = get_table_version(table_name) + 1
+    select_cacher.invalidate(lambda key: key[0] == table_name)
 
 
 def validate_column_definition(column_def: str) -> bool:
@@ -38,15 +102,17 @@ def parse_column_definition(column_def: str) -> Tuple[str, str]:
 
 @handle_db_errors
 def get_metadata() -> dict:
-    return load_metadata(DB_META_FILE)
+    return db.metadata()
 
 
 @handle_db_errors
 def update_metadata(metadata: dict) -> None:
-    save_metadata(DB_META_FILE, metadata)
+    db.save_metadata(metadata)
 
 
+@log_time
 @handle_db_errors
+@write_locked
 def create_table(table_name: str, columns_defs: List[str]) -> Tuple[bool, str]:
     metadata = get_metadata()
     
@@ -62,17 +128,20 @@ def create_table(table_name: str, columns_defs: List[str]) -> Tuple[bool, str]:
         name, col_type = parse_column_definition(col_def)
         validated_columns.append(f"{name}:{col_type}")
     
-    metadata[table_name] = {"columns": validated_columns}
+    metadata[table_name] = {"columns": validated_columns, "next_id": 1}
     update_metadata(metadata)
     
-    save_table_data(table_name, [])
+    db.create_table(table_name)
+    bump_table_version(table_name)
     
     columns_str = ", ".join(validated_columns)
     return True, f'Таблица "{table_name}" успешно создана со столбцами: {columns_str}'
 
 
 @confirm_action("удаление таблицы")
+@log_time
 @handle_db_errors
+@write_locked
 def drop_table(table_name: str) -> Tuple[bool, str]:
     metadata = get_metadata()
     
@@ -82,13 +151,34 @@ def drop_table(table_name: str) -> Tuple[bool, str]:
     del metadata[table_name]
     update_metadata(metadata)
     
-    filepath = get_table_filepath(table_name)
-    if os.path.exists(filepath):
-        os.remove(filepath)
+    db.drop_table(table_name)
+    bump_table_version(table_name)
     
     return True, f'Таблица "{table_name}" успешно удалена.'
 
 
+@handle_db_errors
+def begin_transaction() -> Tuple[bool, str]:
+    db.begin()
+    return True, "Транзакция начата"
+
+
+@handle_db_errors
+def commit_transaction() -> Tuple[bool, str]:
+    if not db.in_transaction:
+        return False, "Нет открытой транзакции"
+    db.commit()
+    return True, "Транзакция зафиксирована"
+
+
+@handle_db_errors
+def rollback_transaction() -> Tuple[bool, str]:
+    if not db.in_transaction:
+        return False, "Нет открытой транзакции"
+    db.rollback()
+    return True, "Транзакция отменена"
+
+
 @handle_db_errors
 def list_tables() -> List[str]:
     metadata = get_metadata()
@@ -121,13 +211,48 @@ def parse_value(value_str: str, expected_type: str) -> Any:
         raise ValueError(f"Неподдерживаемый тип: {expected_type}")
 
 
+def set_value_text(value: Any) -> str:
+    """Текст значения из SET: parse_set_clause уже превратил 5 и true в int/bool.
+
+    Значение разбирается по типу столбца заново, как в insert, чтобы
+    'set name = 123' сохранил строку, а 'set flag = 5' был отклонен.
+    """
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def value_parser(expected_type: str) -> Callable[[str], Any]:
+    """Разбор строки для типа столбца; для int это сам int без обертки."""
+    if expected_type == 'int':
+        return int
+    return partial(parse_value, expected_type=expected_type)
+
+
+def coerce_value(value: Any, expected_type: str) -> Any:
+    """Приводит значение из файла импорта: строки разбираются как в insert."""
+    if value is None:
+        raise ValueError("значение отсутствует")
+    if isinstance(value, str):
+        return parse_value(value, expected_type)
+    if expected_type == 'int' and type(value) is int:
+        return value
+    if expected_type == 'bool' and isinstance(value, bool):
+        return value
+    raise ValueError(f"Значение {value!r} не соответствует типу {expected_type}")
+
+
 @handle_db_errors
 def get_table_schema(table_name: str) -> List[Tuple[str, str]]:
     metadata = get_metadata()
     if table_name not in metadata:
         raise ValueError(f"Таблица '{table_name}' не существует")
     
-    columns = metadata[table_name]["columns"]
+    return list(_parse_schema(tuple(metadata[table_name]["columns"])))
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _parse_schema(columns: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
     schema = []
     for col_def in columns:
         if col_def == "ID:int":
@@ -135,17 +260,284 @@ def get_table_schema(table_name: str) -> List[Tuple[str, str]]:
         else:
             name, col_type = parse_column_definition(col_def)
             schema.append((name, col_type))
-    return schema
+    return tuple(schema)
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _bind_cached(expr: Expr, schema: Tuple[Tuple[str, str], ...]) -> Expr:
+    return bind(expr, dict(schema), parse_value)
+
+
+def bind_where(
+    table_name: str,
+    where_clause: Optional[WhereClause],
+) -> Optional[Expr]:
+    """Приводит условие WHERE (выражение или словарь) к схеме таблицы.
+
+    Связанное условие кэшируется по (условию, схеме): повтор того же
+    запроса не приводит значения к типам заново.
+    """
+    expr = ensure_expr(where_clause)
+    schema = tuple(get_table_schema(table_name))
+    try:
+        hash(expr)
+    except TypeError:
+        return bind(expr, dict(schema), parse_value)
+    return _bind_cached(expr, schema)
+
+
+@metrics.timed("filter")
+def find_records(
+    state: Any, where: Optional[Expr], plan: Optional[QueryPlan] = None
+) -> List[dict]:
+    """Отбирает записи по связанному условию по плану самого дешевого доступа."""
+    rows = state.rows
+    if plan is None:
+        plan = plan_query(state, where)
+    ids = plan.candidate_ids(state.indexes)
+    if ids is None:
+        workers = scan_workers(rows, where)
+        if workers > 1:
+            return parallel_filter(rows, where, workers, state.row_type)
+    if ids is None and where is not None and isinstance(rows, MappedRows):
+        return rows.filter(where)
+    if ids is None:
+        records = rows.values()
+    else:
+        records = (rows[record_id] for record_id in sorted(ids) if record_id in rows)
+    matches = compile_predicate(where, state.row_type)
+    return [record for record in records if matches(record)]
+
+
+def iter_records(state: Any, where: Optional[Expr], plan: QueryPlan) -> Iterator[dict]:
+    """Как find_records, но лениво: просмотр можно прервать после LIMIT строк."""
+    rows = state.rows
+    ids = plan.candidate_ids(state.indexes)
+    if ids is None and where is not None and isinstance(rows, MappedRows):
+        return rows.iter_filter(where)
+    if ids is None:
+        records = rows.values()
+    else:
+        records = (rows[record_id] for record_id in sorted(ids) if record_id in rows)
+    matches = compile_predicate(where, state.row_type)
+    return (record for record in records if matches(record))
+
+
+def iter_index_ordered(
+    state: Any, where: Optional[Expr], column: str, descending: bool
+) -> Iterator[dict]:
+    """Записи в порядке sorted-индекса по column; равные значения - по ID."""
+    rows = state.rows
+    entries = state.indexes[column].entries
+    matches = compile_predicate(where, state.row_type)
+    if descending:
+        groups = groupby(reversed(entries), key=itemgetter(0))
+        record_ids = (
+            record_id
+            for _, group in groups
+            for _, record_id in reversed(list(group))
+        )
+    else:
+        record_ids = (record_id for _, record_id in entries)
+    for record_id in record_ids:
+        record = rows.get(record_id)
+        if record is not None and matches(record):
+            yield record
+
+
+def order_records(
+    records: Iterable[dict],
+    order_by: Optional[str],
+    descending: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    row_type: Optional[type] = None,
+) -> Iterator[dict]:
+    """ORDER BY и LIMIT/OFFSET; для LIMIT частичная сортировка через кучу."""
+    stop = None if limit is None else offset + limit
+    if order_by is not None:
+        key = column_getter(order_by, row_type)
+        if stop is None:
+            records = sorted(records, key=key, reverse=descending)
+        elif descending:
+            records = heapq.nlargest(stop, records, key=key)
+        else:
+            records = heapq.nsmallest(stop, records, key=key)
+    return islice(records, offset, stop)
+
+
+def query_records(
+    state: Any,
+    where: Optional[Expr],
+    order_by: Optional[str] = None,
+    descending: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    lazy: bool = False,
+) -> Iterator[dict]:
+    """Подходящие записи с учетом ORDER BY и LIMIT/OFFSET.
+
+    Без ORDER BY и с LIMIT просмотр останавливается на offset + limit
+    найденных строках. ORDER BY по столбцу с sorted-индексом при полном
+    просмотре идет в порядке индекса и тоже останавливается досрочно,
+    иначе первые offset + limit строк выбираются кучей. С lazy=True
+    запрос без ORDER BY всегда просматривается лениво, по мере чтения.
+    """
+    with metrics.timer("plan"):
+        plan = plan_query(state, where)
+    full_scan = isinstance(plan.path, FullScan)
+    index = state.indexes.get(order_by) if order_by is not None else None
+    if order_by is None and (limit is not None or lazy):
+        records = iter_records(state, where, plan)
+    elif full_scan and index is not None and index.kind == 'sorted':
+        records = iter_index_ordered(state, where, order_by, descending)
+        order_by = None
+    elif where is None and limit is not None and isinstance(state.rows, MappedRows):
+        # Куча по одному столбцу снимка: словари строятся только для top-k
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        sign = -1 if descending else 1
+        top = pick(
+            offset + limit,
+            state.rows.column_items(order_by),
+            key=lambda item: (item[1], sign * item[0]),
+        )
+        records = [state.rows[record_id] for record_id, _ in top]
+        order_by = None
+    elif limit is not None and not (full_scan and scan_workers(state.rows, where) > 1):
+        records = iter_records(state, where, plan)
+    else:
+        records = find_records(state, where, plan)
+    return order_records(
+        records, order_by, descending, limit, offset, state.row_type
+    )
+
+
+def check_order_limit(
+    order_by: Optional[str],
+    columns: Iterable[str],
+    limit: Optional[int],
+    offset: int,
+) -> None:
+    if order_by is not None and order_by not in columns:
+        raise ValueError(f"Столбец ORDER BY '{order_by}' не существует")
+    if limit is not None and limit < 0:
+        raise ValueError("LIMIT не может быть отрицательным")
+    if offset < 0:
+        raise ValueError("OFFSET не может быть отрицательным")
 
 
 @log_time
 @handle_db_errors
-def insert(table_name: str, values: List[str]) -> Tuple[bool, str]:
+@read_locked
+def explain(
+    table_name: str,
+    where_clause: Optional[WhereClause] = None
+) -> Tuple[bool, str]:
+    """План выполнения select: выбранный путь доступа, стоимость и оценки."""
     metadata = get_metadata()
     if table_name not in metadata:
         return False, f'Таблица "{table_name}" не существует.'
     
-    table_data = load_table_data(table_name)
+    where = bind_where(table_name, where_clause)
+    plan = plan_query(db.table(table_name), where)
+    
+    lines = [f'План запроса к таблице "{table_name}" (стоимость {plan.cost:.1f}):']
+    lines += plan.describe()
+    return True, "\n".join(lines)
+
+
+@log_time
+@handle_db_errors
+@write_locked
+def create_index(
+    table_name: str,
+    column: str,
+    kind: str = 'hash'
+) -> Tuple[bool, str]:
+    if db.in_transaction:
+        return False, "Команда недоступна внутри транзакции"
+    metadata = get_metadata()
+    if table_name not in metadata:
+        return False, f'Таблица "{table_name}" не существует.'
+    
+    schema_dict = dict(get_table_schema(table_name))
+    if column not in schema_dict:
+        return False, f'Поле "{column}" не существует в таблице'
+    
+    make_index(column, kind)
+    
+    index_defs = metadata[table_name].setdefault("indexes", {})
+    if index_defs.get(column) == kind:
+        return False, f'Индекс {kind} по столбцу "{column}" уже существует'
+    
+    index_defs[column] = kind
+    update_metadata(metadata)
+    db.create_index(table_name)
+    
+    return True, f'Индекс {kind} по столбцу "{column}" таблицы "{table_name}" создан'
+
+
+@log_time
+@handle_db_errors
+@write_locked
+def convert_table(table_name: str, format_name: str) -> Tuple[bool, str]:
+    if db.in_transaction:
+        return False, "Команда недоступна внутри транзакции"
+    metadata = get_metadata()
+    if table_name not in metadata:
+        return False, f'Таблица "{table_name}" не существует.'
+    
+    get_format(format_name)
+    
+    table_meta = metadata[table_name]
+    if table_meta.get("format", DEFAULT_TABLE_FORMAT) == format_name:
+        return False, f'Таблица "{table_name}" уже хранится в формате {format_name}'
+    
+    db.convert_table(table_name, {**table_meta, "format": format_name})
+    bump_table_version(table_name)
+    
+    return True, f'Таблица "{table_name}" переведена в формат {format_name}'
+
+
+@log_time
+@handle_db_errors
+@write_locked
+def compress_table(table_name: str, codec_name: str) -> Tuple[bool, str]:
+    if db.in_transaction:
+        return False, "Команда недоступна внутри транзакции"
+    metadata = get_metadata()
+    if table_name not in metadata:
+        return False, f'Таблица "{table_name}" не существует.'
+    
+    get_codec(codec_name)
+    
+    table_meta = metadata[table_name]
+    if table_meta.get("compression", "none") == codec_name:
+        return False, f'Таблица "{table_name}" уже хранится со сжатием {codec_name}'
+    
+    new_meta = {key: value for key, value in table_meta.items() if key != "compression"}
+    if codec_name != "none":
+        new_meta["compression"] = codec_name
+    db.convert_table(table_name, new_meta)
+    bump_table_version(table_name)
+    
+    if codec_name == "none":
+        return True, f'Сжатие таблицы "{table_name}" отключено'
+    return True, f'Таблица "{table_name}" сжата кодеком {codec_name}'
+
+
+def table_sizes(table_name: str) -> Tuple[int, int]:
+    """(размер снимка на диске, размер без сжатия) в байтах."""
+    return snapshot_sizes(table_name, db.table_meta(table_name))
+
+
+@log_time
+@handle_db_errors
+@write_locked
+def insert(table_name: str, values: List[str]) -> Tuple[bool, str]:
+    metadata = get_metadata()
+    if table_name not in metadata:
+        return False, f'Таблица "{table_name}" не существует.'
     
     schema = get_table_schema(table_name)
     user_columns = schema[1:]
@@ -155,13 +547,7 @@ def insert(table_name: str, values: List[str]) -> Tuple[bool, str]:
         received = len(values)
         return False, f'Ожидается {expected} значений, получено {received}'
     
-    if table_data:
-        max_id = max(record.get('ID', 0) for record in table_data)
-        new_id = max_id + 1
-    else:
-        new_id = 1
-    
-    new_record = {"ID": new_id}
+    new_record = {"ID": None}
     
     for (col_name, col_type), value_str in zip(user_columns, values):
         try:
@@ -171,41 +557,143 @@ def insert(table_name: str, values: List[str]) -> Tuple[bool, str]:
             msg = f'Ошибка в столбце "{col_name}": {e}'
             return False, msg
     
-    table_data.append(new_record)
-    save_table_data(table_name, table_data)
+    new_id = new_record["ID"] = db.reserve_ids(table_name)
+    db.write(table_name, [{"op": "insert", "row": new_record}])
+    bump_table_version(table_name)
     
     return True, f'Запись успешно добавлена с ID={new_id}'
 
 
 @log_time
+@handle_db_errors
+@write_locked
+def import_table(table_name: str, filepath: str) -> Tuple[bool, str]:
+    """Потоковая загрузка csv/jsonl пачками: одна запись в журнал на пачку."""
+    metadata = get_metadata()
+    if table_name not in metadata:
+        return False, f'Таблица "{table_name}" не существует.'
+    
+    imported = 0
+    
+    try:
+        # Текст разбирается как в insert только в csv; строки JSON для
+        # столбцов str берутся как есть, без снятия кавычек
+        textual = file_kind(filepath) == 'csv'
+        converters = [
+            (
+                name,
+                col_type,
+                value_parser(col_type) if textual or col_type != 'str' else str,
+            )
+            for name, col_type in get_table_schema(table_name)[1:]
+        ]
+        for batch in batches(read_rows(filepath), IMPORT_BATCH_SIZE):
+            new_rows = []
+            for line_no, row in batch:
+                new_record = {"ID": None}
+                try:
+                    for col_name, col_type, convert in converters:
+                        value = row.get(col_name)
+                        if type(value) is str:
+                            new_record[col_name] = convert(value)
+                        else:
+                            new_record[col_name] = coerce_value(value, col_type)
+                except ValueError:
+                    # Повтор через coerce_value дает сообщение на русском
+                    try:
+                        coerce_value(value, col_type)
+                    except ValueError as e:
+                        msg = f'Строка {line_no}, столбец "{col_name}": {e}'
+                        raise ValueError(msg) from None
+                    raise
+                new_rows.append(new_record)
+            
+            first_id = db.reserve_ids(table_name, len(new_rows))
+            for new_id, new_record in enumerate(new_rows, first_id):
+                new_record["ID"] = new_id
+            db.write(table_name, [{"op": "insert_many", "rows": new_rows}])
+            db.autocommit()
+            bump_table_version(table_name)
+            imported += len(new_rows)
+    except ValueError as e:
+        return False, f"Ошибка импорта: {e}. Загружено записей до ошибки: {imported}"
+    
+    return True, f'Импортировано {imported} записей в таблицу "{table_name}"'
+
+
+@log_time
+@handle_db_errors
+@read_locked
+def export_table(table_name: str, filepath: str) -> Tuple[bool, str]:
+    metadata = get_metadata()
+    if table_name not in metadata:
+        return False, f'Таблица "{table_name}" не существует.'
+    
+    columns = [name for name, _ in get_table_schema(table_name)]
+    rows = db.table(table_name).rows
+    count = write_rows(filepath, columns, rows.values(), EXPORT_BATCH_SIZE)
+    
+    return True, f'Экспортировано {count} записей в файл {filepath}'
+
+
+def bind_select(
+    table_name: str,
+    where_clause: Optional[WhereClause],
+    columns: Optional[List[str]],
+    order_by: Optional[str],
+    limit: Optional[int],
+    offset: int,
+) -> Tuple[Any, Optional[Expr]]:
+    """Проверяет параметры select по схеме; возвращает таблицу и условие."""
+    schema_dict = dict(get_table_schema(table_name))
+    for column in columns or ():
+        if column not in schema_dict:
+            raise ValueError(f"Столбец '{column}' не существует")
+    check_order_limit(order_by, schema_dict, limit, offset)
+    where = bind_where(table_name, where_clause)
+    return db.table(table_name), where
+
+
+def project(records: Iterable[dict], columns: Optional[List[str]]) -> Iterator[dict]:
+    """Строки результата как словари: только на выходе из запроса."""
+    if not columns:
+        return map(to_dict, records)
+    return ({column: record[column] for column in columns} for record in records)
+
+
+@log_time
+@read_locked
 def select(
     table_name: str, 
-    where_clause: Optional[Dict[str, Any]] = None
+    where_clause: Optional[WhereClause] = None,
+    columns: Optional[List[str]] = None,
+    order_by: Optional[str] = None,
+    descending: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0,
 ) -> Tuple[bool, str, List[Dict]]:
+    metadata = get_metadata()
+    if table_name not in metadata:
+        msg = f'Таблица "{table_name}" не существует.'
+        return False, msg, []
+    
+    try:
+        state, where = bind_select(
+            table_name, where_clause, columns, order_by, limit, offset
+        )
+    except ValueError as e:
+        return False, f"Ошибка валидации: {e}", []
+    
     def _select_internal():
-        metadata = get_metadata()
-        if table_name not in metadata:
-            msg = f'Таблица "{table_name}" не существует.'
-            return False, msg, []
-        
-        table_data = load_table_data(table_name)
-        
-        if not table_data:
+        if not state.rows:
             return True, "Таблица пуста", []
         
-        if where_clause:
-            filtered_data = []
-            for record in table_data:
-                match = True
-                for key, expected_value in where_clause.items():
-                    if key not in record or record[key] != expected_value:
-                        match = False
-                        break
-                if match:
-                    filtered_data.append(record)
-            result_data = filtered_data
-        else:
-            result_data = table_data
+        with metrics.timer("query"):
+            records = query_records(
+                state, where, order_by, descending, limit, offset
+            )
+            result_data = list(project(records, columns))
+        metrics.count("rows.returned", len(result_data))
         
         if result_data:
             message = f'Найдено {len(result_data)} записей'
@@ -213,108 +701,197 @@ def select(
             message = "Записи не найдены"
         return True, message, result_data
     
-    cache_key = (table_name, 
-             tuple(sorted(where_clause.items())) if where_clause else None)
+    cache_key = (
+        table_name,
+        get_table_version(table_name),
+        state.generation,
+        where,
+        tuple(columns or ()),
+        order_by,
+        descending,
+        limit,
+        offset,
+    )
     return select_cacher(cache_key, _select_internal)
 
 
+@read_locked
+def select_stream(
+    table_name: str,
+    where_clause: Optional[WhereClause] = None,
+    columns: Optional[List[str]] = None,
+    order_by: Optional[str] = None,
+    descending: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Tuple[bool, str, Iterator[Dict]]:
+    """Как select, но строки выдаются генератором по мере просмотра.
+
+    Результат не кэшируется и не собирается в список: первая строка
+    доступна сразу, а память не зависит от размера результата. Генератор
+    нужно дочитать до следующей команды, меняющей таблицу.
+    """
+    metadata = get_metadata()
+    if table_name not in metadata:
+        return False, f'Таблица "{table_name}" не существует.', iter(())
+
+    try:
+        state, where = bind_select(
+            table_name, where_clause, columns, order_by, limit, offset
+        )
+    except ValueError as e:
+        return False, f"Ошибка валидации: {e}", iter(())
+
+    records = query_records(
+        state, where, order_by, descending, limit, offset, lazy=True
+    )
+    return True, "Результат запроса", project(records, columns)
+
+
+@log_time
+@read_locked
+def aggregate(
+    table_name: str,
+    items: List[SelectItem],
+    where_clause: Optional[WhereClause] = None,
+    group_by: Optional[str] = None,
+    order_by: Optional[str] = None,
+    descending: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Tuple[bool, str, List[Dict]]:
+    """Агрегаты count/sum/avg/min/max по всей таблице или по группам."""
+    metadata = get_metadata()
+    if table_name not in metadata:
+        return False, f'Таблица "{table_name}" не существует.', []
+
+    try:
+        bind_aggregates(items, dict(get_table_schema(table_name)), group_by)
+        labels = [item if isinstance(item, str) else item.label for item in items]
+        check_order_limit(order_by, labels, limit, offset)
+        where = bind_where(table_name, where_clause)
+        state = db.table(table_name)
+    except ValueError as e:
+        return False, f"Ошибка валидации: {e}", []
+
+    def _aggregate_internal():
+        result = None
+        if where is None:
+            result = index_aggregate(len(state.rows), state.indexes, items, group_by)
+        if result is None:
+            if where is None:
+                records = state.rows.values()
+            else:
+                records = find_records(state, where)
+            result = hash_aggregate(records, items, group_by)
+        result = list(order_records(result, order_by, descending, limit, offset))
+        message = f"Найдено групп: {len(result)}" if group_by else "Результат агрегации"
+        return True, message, result
+
+    cache_key = (
+        table_name,
+        get_table_version(table_name),
+        state.generation,
+        where,
+        tuple(items),
+        group_by,
+        order_by,
+        descending,
+        limit,
+        offset,
+    )
+    return select_cacher(cache_key, _aggregate_internal)
+
+
+@log_time
 @handle_db_errors
+@write_locked
 def update(
     table_name: str, 
     set_clause: Dict[str, Any], 
-    where_clause: Optional[Dict[str, Any]] = None
+    where_clause: Optional[WhereClause] = None
 ) -> Tuple[bool, str]:
     metadata = get_metadata()
     if table_name not in metadata:
         return False, f'Таблица "{table_name}" не существует.'
     
-    table_data = load_table_data(table_name)
+    state = db.table(table_name)
     
     schema = get_table_schema(table_name)
     schema_dict = dict(schema)
     
-    for field in set_clause.keys():
+    changes = {}
+    for field, new_value in set_clause.items():
         if field not in schema_dict:
             return False, f'Поле "{field}" не существует в таблице'
+        if field == "ID":
+            return False, 'Поле "ID" нельзя изменить'
+        try:
+            changes[field] = parse_value(set_value_text(new_value), schema_dict[field])
+        except ValueError as e:
+            return False, f'Ошибка в поле "{field}": {e}'
     
+    where = bind_where(table_name, where_clause)
     updated_count = 0
+    log_records = []
     
-    for record in table_data:
-        match = True
-        if where_clause:
-            for key, expected_value in where_clause.items():
-                if key not in record or record[key] != expected_value:
-                    match = False
-                    break
-        
-        if match:
-            updated_count += 1
-            for field, new_value in set_clause.items():
-                if field in schema_dict:
-                    expected_type = schema_dict[field]
-                    try:
-                        if isinstance(new_value, str):
-                            parsed_value = parse_value(new_value, expected_type)
-                        else:
-                            parsed_value = new_value
-                        record[field] = parsed_value
-                    except ValueError as e:
-                        msg = f'Ошибка в поле "{field}": {e}'
-                        return False, msg
+    for record in find_records(state, where):
+        updated_count += 1
+        log_records.append({"op": "update", "id": record["ID"], "set": changes})
     
     if updated_count > 0:
-        save_table_data(table_name, table_data)
+        db.write(table_name, log_records)
+        bump_table_version(table_name)
         return True, f'Обновлено {updated_count} записей'
     else:
         return True, "Записи для обновления не найдены"
 
 
 @confirm_action("удаление записей")
+@log_time
 @handle_db_errors
+@write_locked
 def delete(
     table_name: str, 
-    where_clause: Optional[Dict[str, Any]] = None
+    where_clause: Optional[WhereClause] = None
 ) -> Tuple[bool, str]:
     metadata = get_metadata()
     if table_name not in metadata:
         return False, f'Таблица "{table_name}" не существует.'
     
-    table_data = load_table_data(table_name)
+    state = db.table(table_name)
     
-    if not table_data:
+    if not state.rows:
         return True, "Таблица пуста"
     
     if not where_clause:
         msg = "Для удаления всех записей используйте команду 'delete_all'"
         return False, msg
     
-    records_to_keep = []
+    where = bind_where(table_name, where_clause)
+    deleted_ids = []
     deleted_count = 0
     
-    for record in table_data:
-        match = True
-        for key, expected_value in where_clause.items():
-            if key not in record or record[key] != expected_value:
-                match = False
-                break
-        
-        if match:
-            deleted_count += 1
-        else:
-            records_to_keep.append(record)
+    for record in find_records(state, where):
+        deleted_count += 1
+        deleted_ids.append(record["ID"])
     
     if deleted_count > 0:
-        save_table_data(table_name, records_to_keep)
+        db.write(table_name, [{"op": "delete", "ids": deleted_ids}])
+        bump_table_version(table_name)
         return True, f'Удалено {deleted_count} записей'
     else:
         return True, "Записи для удаления не найдены"
 
 
+@log_time
 @handle_db_errors
+@write_locked
 def delete_all(table_name: str) -> Tuple[bool, str]:
     metadata = get_metadata()
     if table_name not in metadata:
         return False, f'Таблица "{table_name}" не существует.'
     
-    save_table_data(table_name, [])
+    db.write(table_name, [{"op": "clear"}])
+    bump_table_version(table_name)
     return True, f'Все записи из таблицы "{table_name}" удалены'
\ No newline at end of file
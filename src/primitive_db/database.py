@@ -0,0 +1,362 @@
+# src/primitive_db/database.py
+
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import index, storage
+from .constants import (
+    DB_META_FILE,
+    JOURNAL_SUFFIX,
+    LOCK_SUFFIX,
+    WRITER_LOCK_SUFFIX,
+)
+from .metrics import metrics
+from .utils import FileLock, load_metadata, save_metadata
+
+
+def _file_stamp(filepath: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _table_stamp(table_name: str, meta: Optional[dict]) -> tuple:
+    return (
+        _file_stamp(storage.snapshot_path(table_name, meta)),
+        _file_stamp(storage.log_path(table_name)),
+    )
+
+
+class TableState:
+    """Резидентная таблица: строки по ID, индексы и еще не сохраненные записи."""
+
+    def __init__(
+        self,
+        rows: Dict[int, dict],
+        indexes: Dict[str, Any],
+        stamp: Optional[tuple],
+        generation: int,
+        row_type: Optional[type] = None,
+    ):
+        self.rows = rows
+        self.indexes = indexes
+        self.stamp = stamp
+        self.generation = generation
+        # Класс строк (rows.Row): столбцы читаются слотами, а не по ключу
+        self.row_type = row_type
+        self.pending: List[dict] = []
+        self.rewrite = False
+
+    @property
+    def dirty(self) -> bool:
+        return self.rewrite or bool(self.pending)
+
+    def release(self) -> None:
+        """Закрывает отображение снимка в память, если оно есть."""
+        if isinstance(self.rows, storage.MappedRows):
+            self.rows.close()
+
+
+class Database:
+    """Сессия БД: метаданные и таблицы загружаются один раз и живут в памяти.
+
+    Изменения применяются к резидентному состоянию сразу, а на диск
+    попадают при commit() (или close()). Перед каждым обращением
+    сверяются размер и mtime файлов, чтобы заметить внешние изменения.
+
+    Вне транзакции каждая команда фиксируется сама (autocommit()),
+    внутри begin() ... commit() изменения копятся до commit() или
+    отбрасываются rollback(). Фиксация идет через журнал транзакции:
+    сначала он атомарно записывается целиком, затем применяется к файлам
+    таблиц и метаданных и удаляется. Журнал, оставшийся после сбоя,
+    применяется заново при следующем открытии БД.
+
+    Несколько процессов работают с одной БД через две блокировки:
+    блокировка писателя держится всю команду записи или транзакцию и
+    выстраивает писателей в очередь, а блокировка данных берется
+    эксклюзивно только на время фиксации и разделяемо на время чтения.
+    Читатели видят последнее зафиксированное состояние и ждут лишь
+    короткую фиксацию, но не открытую транзакцию писателя.
+    """
+
+    def __init__(self, meta_file: str = DB_META_FILE):
+        self.meta_file = meta_file
+        self.journal_file = f"{meta_file}{JOURNAL_SUFFIX}"
+        self.in_transaction = False
+        self.in_batch = False
+        self._metadata: Optional[dict] = None
+        self._meta_stamp = None
+        self._meta_dirty = False
+        self._tables: Dict[str, TableState] = {}
+        self._dropped: set = set()
+        self._generation = 0
+        self._recovered = False
+        self._data_lock = FileLock(f"{meta_file}{LOCK_SUFFIX}")
+        self._writer_lock = FileLock(f"{meta_file}{WRITER_LOCK_SUFFIX}")
+
+    def _new_state(
+        self, rows: Dict[int, dict], indexes: Dict[str, Any], row_type: Optional[type]
+    ) -> TableState:
+        self._generation += 1
+        return TableState(rows, indexes, None, self._generation, row_type)
+
+    def metadata(self) -> dict:
+        if self._meta_dirty:
+            return self._metadata
+        if not self._recovered:
+            self.recover()
+
+        stamp = _file_stamp(self.meta_file)
+        if self._metadata is None or stamp != self._meta_stamp:
+            with metrics.timer("load.metadata"):
+                self._metadata = load_metadata(self.meta_file)
+            self._meta_stamp = stamp
+        return self._metadata
+
+    def save_metadata(self, metadata: Optional[dict] = None) -> None:
+        if metadata is not None:
+            self._metadata = metadata
+        self._meta_dirty = True
+
+    def table_meta(self, table_name: str) -> Optional[dict]:
+        return self.metadata().get(table_name)
+
+    def table(self, table_name: str) -> TableState:
+        meta = self.table_meta(table_name)
+        state = self._tables.get(table_name)
+        if state is not None and (
+            state.dirty or state.stamp == _table_stamp(table_name, meta)
+        ):
+            return state
+
+        if state is not None:
+            state.release()
+        with metrics.timer("load.table"):
+            rows, indexes = index.load_table(table_name, meta)
+        state = self._new_state(rows, indexes, storage.table_row_type(meta))
+        state.stamp = _table_stamp(table_name, meta)
+        self._tables[table_name] = state
+        return state
+
+    def reserve_ids(self, table_name: str, count: int = 1) -> int:
+        """Выделяет count подряд идущих ID из последовательности таблицы.
+
+        Счетчик next_id хранится в db_meta.json и только растет, поэтому
+        ID не переиспользуются после удаления. Для таблиц без счетчика
+        он один раз вычисляется по максимальному ID.
+        """
+        meta = self.table_meta(table_name)
+        next_id = meta.get("next_id")
+        if next_id is None:
+            rows = self.table(table_name).rows
+            next_id = max(rows) + 1 if rows else 1
+        meta["next_id"] = next_id + count
+        self._meta_dirty = True
+        return next_id
+
+    def write(self, table_name: str, records: List[dict]) -> None:
+        """Применяет записи журнала к таблице в памяти и ставит их в очередь."""
+        state = self.table(table_name)
+        for record in records:
+            index.apply_record(state.indexes, state.rows, record)
+            storage.apply_record(state.rows, record, state.row_type)
+            if record["op"] == "clear":
+                # Файлы таблицы будут удалены, журнал начнется заново
+                state.rewrite = True
+                state.pending = []
+            else:
+                state.pending.append(record)
+
+    def create_table(self, table_name: str) -> None:
+        row_type = storage.table_row_type(self.table_meta(table_name))
+        state = self._new_state({}, {}, row_type)
+        state.rewrite = True
+        self._tables[table_name] = state
+
+    def _forget(self, table_name: str) -> None:
+        state = self._tables.pop(table_name, None)
+        if state is not None:
+            state.release()
+
+    def drop_table(self, table_name: str) -> None:
+        self._forget(table_name)
+        self._dropped.add(table_name)
+
+    def create_index(self, table_name: str) -> None:
+        """Перестраивает индексы таблицы по текущим определениям в метаданных."""
+        self.flush()
+        self._forget(table_name)
+        self.table(table_name)
+
+    def convert_table(self, table_name: str, new_meta: dict) -> None:
+        """Переписывает снимок таблицы в новый формат и сохраняет метаданные."""
+        self.flush()
+        self._forget(table_name)
+        old_meta = self.table_meta(table_name)
+        storage.convert(table_name, old_meta, new_meta)
+        self._metadata[table_name] = new_meta
+        self._meta_dirty = True
+        self.flush()
+        storage.finish_convert(table_name, old_meta, new_meta)
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        if table_name is None:
+            for name in list(self._tables):
+                self._forget(name)
+            self._metadata = None
+        else:
+            self._forget(table_name)
+
+    @contextmanager
+    def reading(self) -> Iterator[None]:
+        """Разделяемая блокировка данных на время чтения команды."""
+        if self._writer_lock.held:
+            # Писатель уже один, файлы никто кроме него не меняет
+            yield
+            return
+        with self._data_lock.hold(shared=True):
+            yield
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """Блокировка писателя на время команды записи."""
+        first = not self._writer_lock.held
+        with self._writer_lock.hold():
+            if first:
+                self.recover()
+            yield
+
+    def begin(self) -> None:
+        if self.in_transaction:
+            raise ValueError("Транзакция уже открыта")
+        self.flush()
+        self._writer_lock.acquire()
+        self.in_transaction = True
+        self.recover()
+
+    def _end_transaction(self) -> None:
+        if self.in_transaction:
+            self.in_transaction = False
+            self._writer_lock.release()
+
+    def commit(self) -> None:
+        """Фиксирует все накопленные изменения и завершает транзакцию."""
+        self.flush()
+        self._end_transaction()
+
+    def autocommit(self) -> None:
+        """Фиксирует изменения, если не открыта транзакция или пакет команд."""
+        if not (self.in_transaction or self.in_batch):
+            self.flush()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Пакет команд (скрипт) с одной фиксацией в конце.
+
+        В отличие от транзакции, пакет не атомарен: команды, выполненные
+        до ошибки, фиксируются при выходе, а create_index и convert_table
+        в нем разрешены. Блокировка писателя держится весь пакет.
+        """
+        with self._writer_lock.hold():
+            self.recover()
+            self.in_batch = True
+            try:
+                yield
+            finally:
+                self.in_batch = False
+                if self.in_transaction:
+                    self.rollback()
+                self.flush()
+
+    def rollback(self) -> None:
+        """Отбрасывает несохраненные изменения: таблицы перечитаются с диска."""
+        for table_name, state in list(self._tables.items()):
+            if state.dirty:
+                self._forget(table_name)
+        self._dropped.clear()
+        self._metadata = None
+        self._meta_stamp = None
+        self._meta_dirty = False
+        self._end_transaction()
+
+    def recover(self) -> None:
+        """Доприменяет журнал транзакции, прерванной сбоем.
+
+        Журнал существует только пока фиксация держит эксклюзивную
+        блокировку данных, поэтому увиденный под ней журнал - остаток сбоя.
+        Сбой мог оборвать дописывание журнала таблицы на середине строки:
+        _apply_journal() обрезает такой хвост перед повтором.
+        """
+        self._recovered = True
+        if not os.path.exists(self.journal_file):
+            return
+        with self._data_lock.hold():
+            journal = storage.read_journal(self.journal_file)
+            if journal is not None:
+                self._apply_journal(*journal)
+                storage.remove_file(self.journal_file)
+
+    def _apply_journal(self, header: dict, tables: Dict[str, List[str]]) -> None:
+        # Повтор безопасен: сброшенные таблицы удаляются заново, а записи
+        # журнала задают состояние строк целиком и не зависят от повторов.
+        # Недописанный хвост журнала таблицы обрезается перед дописыванием.
+        if header["metadata"] is not None:
+            save_metadata(self.meta_file, header["metadata"])
+        for table_name in header["reset"]:
+            storage.drop(table_name)
+        for table_name, lines in tables.items():
+            storage.truncate_torn_tail(table_name)
+            storage.append_lines(table_name, lines)
+
+    def flush(self) -> None:
+        """Атомарно сохраняет на диск изменения всех таблиц и метаданных."""
+        dirty = {name: state for name, state in self._tables.items() if state.dirty}
+        if not (self._meta_dirty or self._dropped or dirty):
+            return
+
+        reset = self._dropped | {name for name, s in dirty.items() if s.rewrite}
+        header = {
+            "metadata": self._metadata if self._meta_dirty else None,
+            "reset": sorted(reset),
+        }
+        tables = {
+            name: storage.encode_records(state.pending)
+            for name, state in dirty.items()
+            if state.pending
+        }
+        with metrics.timer("flush"), self._data_lock.hold():
+            storage.write_journal(self.journal_file, header, tables)
+            self._apply_journal(header, tables)
+            storage.remove_file(self.journal_file)
+
+            self._meta_dirty = False
+            self._meta_stamp = _file_stamp(self.meta_file)
+            self._dropped.clear()
+            for table_name, state in dirty.items():
+                state.pending = []
+                state.rewrite = False
+                self._compact(table_name, state)
+
+    def _compact(self, table_name: str, state: TableState) -> None:
+        """Переписывает снимок, когда журнал таблицы перерос его."""
+        meta = self.table_meta(table_name)
+        if not storage.needs_compaction(table_name, meta):
+            state.stamp = _table_stamp(table_name, meta)
+            return
+        if isinstance(state.rows, storage.MappedRows):
+            # Открытый через mmap снимок нельзя перезаписать на месте:
+            # строки материализуются, а таблица переоткроется при чтении.
+            rows = list(state.rows.values())
+            self._forget(table_name)
+            storage.write_snapshot(table_name, rows, meta)
+            return
+        storage.write_snapshot(table_name, list(state.rows.values()), meta)
+        state.stamp = _table_stamp(table_name, meta)
+
+    def close(self) -> None:
+        if self.in_transaction:
+            self.rollback()
+        self.flush()
@@ -1,22 +1,30 @@
 # src/primitive_db/engine.py
 
-import shlex
-from typing import List, Tuple
+import sys
+from itertools import chain
+from typing import Iterable, List, Optional
 
 from prettytable import PrettyTable
 
-from .core import (
-    create_table,
-    delete,
-    delete_all,
-    drop_table,
-    get_table_schema,
-    insert,
-    select,
-    update,
-)
-from .parser import parse_insert_values, parse_set_clause, parse_where_clause
-from .utils import DB_META_FILE, load_metadata
+try:
+    from decorators import set_timing_output
+except ImportError:
+    from src.decorators import set_timing_output
+
+from .commands import Result, execute, parse_command
+from .constants import DEFAULT_PAGE_SIZE
+from .core import db
+from .metrics import metrics
+from .transfer import batches, write_stream
+
+OUTPUT_FORMATS = ('table', 'csv', 'jsonl')
+
+settings = {
+    "output": "table",
+    "page_size": DEFAULT_PAGE_SIZE,
+    "pager": False,
+    "timing": False,
+}
 
 
 def print_help():
@@ -29,16 +37,42 @@ def print_help():
     print("  create_table <имя> <столбец1:тип> .. - создать таблицу")
     print("  list_tables                          - список таблиц")
     print("  drop_table <имя>                     - удалить таблицу")
+    print("  create_index <таблица> <столбец> [hash|sorted] - создать индекс")
+    print("  convert_table <таблица> <json|columnar>  - сменить формат хранения")
+    print("  compress_table <таблица> <zlib|lzma|bz2|none> - сжатие снимка")
     
     print("\nCRUD ОПЕРАЦИИ:")
     print("  insert <таблица> <значение1> <значение2> ...")
     print("  select <таблица> [where условие]             - выбрать записи")
+    print("    условие: = != < <= > >=, AND, OR, NOT, IN (...), BETWEEN, LIKE")
     print("  update <таблица> set ... [where условие]     - обновить записи")
     print("  delete <таблица> [where условие]             - удалить записи")
     print("  delete_all <таблица>                         - удалить ВСЕ записи")
+    print("  select <столбцы|*> from <таблица> [where условие]")
+    print("    [order by столбец [asc|desc]] [limit n] [offset m]")
+    print("  select count(*), avg(столбец) from <таблица> [where условие]")
+    print("    [group by столбец]          - агрегаты count, sum, avg, min, max")
+    print("  explain select <таблица> [where условие]     - план выполнения запроса")
+    print("  import <таблица> <файл.csv|файл.jsonl>       - загрузить записи из файла")
+    print("  export <таблица> <файл.csv|файл.jsonl>       - выгрузить записи в файл")
+    
+    print("\nПОДГОТОВЛЕННЫЕ КОМАНДЫ:")
+    print("  prepare <имя> as <команда с ? вместо значений> - разобрать один раз")
+    print("  execute <имя> (значение1, значение2, ...)      - выполнить с параметрами")
+    print("  deallocate <имя>                               - удалить команду")
+
+    print("\nТРАНЗАКЦИИ:")
+    print("  begin                              - начать транзакцию")
+    print("  commit                             - зафиксировать изменения")
+    print("  rollback                           - отменить изменения")
     
     print("\nОБЩИЕ КОМАНДЫ:")
     print("  describe <таблица>                 - показать структуру таблицы")
+    print("  cache_stats                        - статистика кэша select")
+    print("  stats [reset | dump <файл.json>]   - задержки p50/p95/p99 и счетчики")
+    print("  profile cpu|memory|off             - профилирование cProfile/tracemalloc")
+    print("  set [параметр значение]            - настройки вывода:")
+    print("    output table|csv|jsonl, page_size <n>, pager on|off, timing on|off")
     print("  exit                               - выход")
     print("  help                               - эта справка")
     
@@ -46,61 +80,15 @@ def print_help():
     print("  create_table users name:str age:int is_active:bool")
     print("  insert users 'John Doe' 25 true")
     print("  select users where age = 25")
+    print("  select users where age >= 18 and (name like 'J%' or is_active = true)")
+    print("  select users where age between 20 and 30 and name not in (Bob, Alice)")
+    print("  select is_active, count(*), avg(age) from users group by is_active")
+    print("  select name, age from users order by age desc limit 10")
     print("  update users set age = 30 where name = 'John Doe'")
     print("  delete users where name = 'John Doe'")
     print("="*60 + "\n")
 
 
-def parse_command(command: str) -> Tuple[str, List[str]]:
-    try:
-        parts = shlex.split(command.strip())
-        if not parts:
-            return "", []
-        
-        cmd_name = parts[0]
-        args = parts[1:] if len(parts) > 1 else []
-        return cmd_name, args
-    except ValueError as e:
-        raise ValueError(f"Ошибка разбора команды: {e}")
-
-
-def extract_where_clause(args: List[str]) -> Tuple[List[str], dict]:
-    """Извлекает условие WHERE из аргументов."""
-    where_clause = {}
-    if 'where' in args:
-        where_index = args.index('where')
-        where_str = ' '.join(args[where_index + 1:])
-        args = args[:where_index]
-        
-        try:
-            where_clause = parse_where_clause(where_str)
-        except ValueError as e:
-            raise ValueError(f"Ошибка в условии WHERE: {e}")
-    
-    return args, where_clause
-
-
-def extract_set_clause(args: List[str]) -> Tuple[List[str], dict]:
-    """Извлекает условие SET из аргументов."""
-    set_clause = {}
-    if 'set' in args:
-        set_index = args.index('set')
-        if 'where' in args[set_index:]:
-            where_index = args.index('where', set_index)
-            set_str = ' '.join(args[set_index + 1:where_index])
-            args = args[:set_index] + args[where_index:]
-        else:
-            set_str = ' '.join(args[set_index + 1:])
-            args = args[:set_index]
-        
-        try:
-            set_clause = parse_set_clause(set_str)
-        except ValueError as e:
-            raise ValueError(f"Ошибка в условии SET: {e}")
-    
-    return args, set_clause
-
-
 def format_table_result(data: List[dict]) -> str:
     """Форматирует данные таблицы с помощью PrettyTable."""
     if not data:
@@ -109,7 +97,9 @@ def format_table_result(data: List[dict]) -> str:
     table = PrettyTable()
     
     first_record = data[0]
-    columns = ['ID'] + [col for col in first_record.keys() if col != 'ID']
+    columns = [col for col in first_record.keys() if col != 'ID']
+    if 'ID' in first_record:
+        columns.insert(0, 'ID')
     
     table.field_names = columns
     table.align = 'l'
@@ -121,6 +111,179 @@ def format_table_result(data: List[dict]) -> str:
     return str(table)
 
 
+def ask_next_page() -> bool:
+    answer = input("-- Enter - следующая страница, q - прервать --: ")
+    return answer.strip().lower() != 'q'
+
+
+def render_rows(rows: Iterable[dict]) -> int:
+    """Выводит строки по страницам прямо из генератора, не собирая результат.
+
+    Первая страница печатается, как только набрана, а в памяти держится
+    не больше page_size строк. Возвращает число выведенных строк.
+    """
+    iterator = iter(rows)
+    first = next(iterator, None)
+    if first is None:
+        return 0
+    rows = chain([first], iterator)
+    page_size = settings["page_size"]
+
+    if settings["output"] != "table":
+        columns = list(first)
+        return write_stream(sys.stdout, settings["output"], columns, rows, page_size)
+
+    count = 0
+    for page in batches(rows, page_size):
+        if count and settings["pager"] and not ask_next_page():
+            break
+        print(format_table_result(page))
+        count += len(page)
+    return count
+
+
+def change_setting(args: List[str]) -> None:
+    """Команда REPL set: показывает или меняет настройки вывода."""
+    if not args:
+        print("\nНастройки вывода:")
+        print(f"  output:    {settings['output']}")
+        print(f"  page_size: {settings['page_size']}")
+        print(f"  pager:     {'on' if settings['pager'] else 'off'}")
+        print(f"  timing:    {'on' if settings['timing'] else 'off'}")
+        return
+    if len(args) != 2:
+        print(" Использование: set <output|page_size|pager|timing> <значение>")
+        return
+
+    name, value = args
+    if name == "output" and value in OUTPUT_FORMATS:
+        settings["output"] = value
+    elif name == "page_size" and value.isdigit() and int(value) > 0:
+        settings["page_size"] = int(value)
+    elif name == "pager" and value in ("on", "off"):
+        settings["pager"] = value == "on"
+    elif name == "timing" and value in ("on", "off"):
+        settings["timing"] = value == "on"
+        set_timing_output(settings["timing"])
+    else:
+        print(f" Некорректная настройка: {name} {value}")
+        return
+    print(f"Настройка {name} = {value}")
+
+
+def commit_changes() -> None:
+    """Сохраняет на диск изменения, если не открыта транзакция."""
+    try:
+        db.autocommit()
+    except OSError as e:
+        print(f" Ошибка сохранения данных: {e}")
+
+
+def confirm_command(cmd_name: str, args: List[str]) -> bool:
+    """Спрашивает подтверждение для команд, затрагивающих все записи таблицы.
+
+    Для prepare проверяется подготавливаемая команда: подтверждение
+    спрашивается один раз, при подготовке, а не на каждом execute.
+    """
+    if cmd_name == "prepare" and len(args) > 2 and args[1] == 'as':
+        return confirm_command(args[2], args[3:])
+    if cmd_name == "update" and 'set' in args[1:] and 'where' not in args[1:]:
+        msg = "Внимание: Будет обновлено ВСЕ записи в таблице!"
+        print(f"  {msg}")
+        confirm = input("   Продолжить? (yes/no): ")
+        return confirm.strip().lower() == 'yes'
+    if cmd_name == "delete_all" and len(args) == 1:
+        msg = "ВНИМАНИЕ: Вы собираетесь удалить ВСЕ записи"
+        print(f"  {msg} из таблицы '{args[0]}'!")
+        confirm_msg = "Это действие нельзя отменить. Продолжить?"
+        confirm = input(f"   {confirm_msg} (yes/no): ")
+        return confirm.strip().lower() == 'yes'
+    return True
+
+
+def print_metrics(snapshot: dict, profile: Optional[str]) -> None:
+    """Таблица задержек (мс) по операциям и фазам и счетчики событий."""
+    print(f"\nМетрики за {snapshot['uptime_s']:.1f} секунд:")
+    if snapshot["timers"]:
+        table = PrettyTable()
+        table.field_names = ["имя", "вызовов", "всего", "p50", "p95", "p99", "max"]
+        table.align["имя"] = "l"
+        for name, timer in snapshot["timers"].items():
+            table.add_row([
+                name,
+                timer["count"],
+                f"{timer['total_ms']:.1f}",
+                f"{timer['p50_ms']:.3f}",
+                f"{timer['p95_ms']:.3f}",
+                f"{timer['p99_ms']:.3f}",
+                f"{timer['max_ms']:.3f}",
+            ])
+        print(table)
+    for name, value in snapshot["counters"].items():
+        print(f"  {name}: {value}")
+    if profile is not None:
+        print(f"  профилирование: {profile} (profile off - отчет)")
+
+
+def print_result(result: Result) -> None:
+    """Выводит структурированный результат команды в консоль."""
+    message = result["message"]
+    if not result["ok"]:
+        print(f" {message}")
+    elif "rows" in result and not isinstance(result["rows"], list):
+        count = render_rows(result["rows"])
+        if settings["output"] == "table":
+            print(f"Выведено записей: {count}" if count else "  Записи не найдены")
+    elif "rows" in result:
+        if result["rows"]:
+            print(f"\n{message}:")
+            print(format_table_result(result["rows"]))
+        else:
+            print(f"  {message}")
+    elif "tables" in result:
+        if result["tables"]:
+            print(f"\n{message}:")
+            for table in result["tables"]:
+                print(f"  - {table}")
+        else:
+            print(message)
+    elif "schema" in result:
+        print(f"\n {message}:")
+        for name, col_type in result["schema"]:
+            print(f"  - {name}: {col_type}")
+        print(f" Формат хранения: {result['format']}")
+        print(f" Сжатие: {result['compression']}")
+        print(
+            f" Размер снимка: {result['size'] / 1024:.1f} КиБ"
+            f" (без сжатия {result['raw_size'] / 1024:.1f} КиБ)"
+        )
+        if result["indexes"]:
+            print(" Индексы:")
+            for column, kind in result["indexes"].items():
+                print(f"  - {column}: {kind}")
+    elif "metrics" in result:
+        print_metrics(result["metrics"], result["profile"])
+    elif "report" in result:
+        print(f"\n{message}:")
+        for line in result["report"]:
+            print(f"  {line}")
+    elif "stats" in result:
+        stats = result["stats"]
+        print(f"\n{message}:")
+        print(f"  попадания: {stats['hits']}")
+        print(f"  промахи:   {stats['misses']}")
+        print(f"  вытеснено: {stats['evictions']}")
+        print(f"  записей:   {stats['entries']} (строк: {stats['size']})")
+        statements = result.get("statements")
+        if statements is not None:
+            print("\nКэш разобранных команд:")
+            print(f"  попадания: {statements['hits']}")
+            print(f"  промахи:   {statements['misses']}")
+            print(f"  записей:   {statements['entries']}")
+    else:
+        print(f"{message}")
+
+
 def run():
     """Основной цикл программы."""
     print("="*60)
@@ -143,157 +306,19 @@ def run():
             if cmd_name == "exit":
                 print("Выход из программы. До свидания!")
                 break
-                
             elif cmd_name == "help":
                 print_help()
-                
-            elif cmd_name == "list_tables":
-                metadata = load_metadata(DB_META_FILE)
-                tables = list(metadata.keys())
-                if tables:
-                    print("\nСписок таблиц:")
-                    for table in tables:
-                        print(f"  - {table}")
-                else:
-                    print("В базе данных нет таблиц.")
-                    
-            elif cmd_name == "create_table":
-                if len(args) < 2:
-                    print("Ошибка: Недостаточно аргументов.")
-                    usage = "Использование: create_table <имя> <столбец1:тип> ..."
-                    print(f"   {usage}")
-                else:
-                    table_name = args[0]
-                    columns = args[1:]
-                    success, message = create_table(table_name, columns)
-                    print(f"{message}" if success else f"{message}")
-                    
-            elif cmd_name == "drop_table":
-                if len(args) != 1:
-                    print("Ошибка: Неверное количество аргументов.")
-                    print("   Использование: drop_table <имя_таблицы>")
-                else:
-                    table_name = args[0]
-                    success, message = drop_table(table_name)
-                    print(f"{message}" if success else f"{message}")
-                    
-            elif cmd_name == "describe":
-                if len(args) != 1:
-                    print("Ошибка: Неверное количество аргументов.")
-                    print("   Использование: describe <имя_таблицы>")
-                else:
-                    table_name = args[0]
-                    try:
-                        schema = get_table_schema(table_name)
-                        print(f"\n Структура таблицы '{table_name}':")
-                        for name, col_type in schema:
-                            print(f"  - {name}: {col_type}")
-                    except ValueError as e:
-                        print(f" {e}")
-                        
-            elif cmd_name == "insert":
-                if len(args) < 2:
-                    print(" Ошибка: Недостаточно аргументов.")
-                    usage = "Использование: insert <таблица> <значение1> ..."
-                    print(f"   {usage}")
-                else:
-                    table_name = args[0]
-                    values = parse_insert_values(' '.join(args[1:]))
-                    success, message = insert(table_name, values)
-                    print(f" {message}" if success else f" {message}")
-                    
-            elif cmd_name == "select":
-                if len(args) < 1:
-                    print(" Ошибка: Недостаточно аргументов.")
-                    print("   Использование: select <таблица> [where условие]")
-                else:
-                    table_name = args[0]
-                    try:
-                        remaining_args, where_clause = extract_where_clause(args[1:])
-                        success, message, data = select(table_name, where_clause)
-                        
-                        if success:
-                            if data:
-                                print(f"\n{message}:")
-                                print(format_table_result(data))
-                            else:
-                                print(f"  {message}")
-                        else:
-                            print(f" {message}")
-                    except ValueError as e:
-                        print(f" {e}")
-                        
-            elif cmd_name == "update":
-                if len(args) < 1:
-                    print(" Ошибка: Недостаточно аргументов.")
-                    print("   Использование: update <таблица> set ... [where]")
-                else:
-                    table_name = args[0]
-                    try:
-                        remaining_args, set_clause = extract_set_clause(args[1:])
-                        if not set_clause:
-                            print(" Ошибка: Отсутствует условие SET")
-                            usage = "Использование: update <таблица> set поле=значение"
-                            print(f"   {usage} [where условие]")
-                            continue
-                        
-                        remaining_args, where_clause = extract_where_clause(
-                            remaining_args
-                        )
-                        
-                        if not where_clause:
-                            msg = "Внимание: Будет обновлено ВСЕ записи в таблице!"
-                            print(f"  {msg}")
-                            confirm = input("   Продолжить? (yes/no): ")
-                            confirm = confirm.strip().lower()
-                            if confirm != 'yes':
-                                print(" Операция отменена")
-                                continue
-                        
-                        success, message = update(table_name, set_clause, where_clause)
-                        print(f" {message}" if success else f" {message}")
-                    except ValueError as e:
-                        print(f" {e}")
-                        
-            elif cmd_name == "delete":
-                if len(args) < 1:
-                    print(" Ошибка: Недостаточно аргументов.")
-                    print("   Использование: delete <таблица> [where условие]")
-                else:
-                    table_name = args[0]
-                    try:
-                        remaining_args, where_clause = extract_where_clause(args[1:])
-                        
-                        if not where_clause:
-                            msg = "Внимание: Для удаления всех записей используйте"
-                            print(f"  {msg} 'delete_all'")
-                            continue
-                        
-                        success, message = delete(table_name, where_clause)
-                        print(f" {message}" if success else f" {message}")
-                    except ValueError as e:
-                        print(f" {e}")
-                        
-            elif cmd_name == "delete_all":
-                if len(args) != 1:
-                    print(" Ошибка: Неверное количество аргументов.")
-                    print("   Использование: delete_all <таблица>")
-                else:
-                    table_name = args[0]
-                    msg = "ВНИМАНИЕ: Вы собираетесь удалить ВСЕ записи"
-                    print(f"  {msg} из таблицы '{table_name}'!")
-                    confirm_msg = "Это действие нельзя отменить. Продолжить?"
-                    confirm = input(f"   {confirm_msg} (yes/no): ")
-                    confirm = confirm.strip().lower()
-                    if confirm == 'yes':
-                        success, message = delete_all(table_name)
-                        print(f" {message}" if success else f" {message}")
-                    else:
-                        print(" Операция отменена")
-                    
+            elif cmd_name == "set":
+                change_setting(args)
+            elif not confirm_command(cmd_name, args):
+                print(" Операция отменена")
             else:
-                msg = f"Команда '{cmd_name}' не найдена."
-                print(f" {msg} Введите 'help' для справки.")
+                result = execute(user_input, stream=True)
+                if result["message"].startswith(f"Команда '{cmd_name}' не найдена"):
+                    hint = f"{result['message']} Введите 'help' для справки."
+                    result = {**result, "message": hint}
+                with metrics.timer("render"):
+                    print_result(result)
                 
         except EOFError:
             print("\n Обнаружен конец файла. Выход...")
@@ -302,4 +327,10 @@ def run():
             print("\n  Программа прервана пользователем.")
             break
         except Exception as e:
-            print(f" Неожиданная ошибка: {e}")
\ No newline at end of file
+            print(f" Неожиданная ошибка: {e}")
+        finally:
+            commit_changes()
+    
+    if db.in_transaction:
+        db.rollback()
+        print(" Незавершенная транзакция отменена.")
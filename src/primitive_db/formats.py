@@ -0,0 +1,810 @@
+# src/primitive_db/formats.py
+
+import bz2
+import json
+import lzma
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from bisect import bisect_right
+from itertools import groupby
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .constants import COMPRESSION_GROUP_ROWS, DICT_MAX_VALUES
+from .rows import Row, schema_row_type, tuple_getter
+
+COLUMNAR_MAGIC = b'PDBC'
+COLUMNAR_VERSION = 4
+# Версия 1 - без столбцов со словарем, версия 2 - без сжатия, версия 3 -
+# столбец сжат одним блоком
+COLUMNAR_READ_VERSIONS = (1, 2, 3, 4)
+JSON_PACKED_MAGIC = b'PDBJ'
+JSON_PACKED_VERSION = 1
+_HEADER = struct.Struct('<4sBI')
+_ALIGN = 8
+_JSON_SEPARATORS = (',', ':')
+
+Codec = Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]
+
+CODECS: Dict[str, Codec] = {
+    'zlib': (zlib.compress, zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+    'bz2': (bz2.compress, bz2.decompress),
+}
+
+
+def _padding(size: int) -> int:
+    return -size % _ALIGN
+
+
+def get_codec(name: Optional[str]) -> Optional[Codec]:
+    """(compress, decompress) кодека сжатия; None и 'none' - без сжатия."""
+    if name in (None, 'none'):
+        return None
+    if name not in CODECS:
+        names = ", ".join(['none', *sorted(CODECS)])
+        raise ValueError(f"Неизвестный кодек сжатия '{name}'. Доступны: {names}")
+    return CODECS[name]
+
+
+def _read_file_header(filepath: str, magic: bytes) -> Optional[Tuple[dict, int]]:
+    """JSON-описание файла с заголовком _HEADER или None для другого файла."""
+    with open(filepath, 'rb') as f:
+        prefix = f.read(_HEADER.size)
+        if len(prefix) < _HEADER.size or prefix[:4] != magic:
+            return None
+        _, _, header_len = _HEADER.unpack(prefix)
+        return json.loads(f.read(header_len)), _HEADER.size + header_len
+
+
+def build_dictionary(values: list) -> Optional[List[str]]:
+    """Словарь значений столбца str или None, если кодировать невыгодно.
+
+    Столбец кодируется, когда различных значений не больше DICT_MAX_VALUES
+    и каждое в среднем встречается хотя бы дважды.
+    """
+    distinct = set(values)
+    if len(distinct) > min(DICT_MAX_VALUES, len(values) // 2):
+        return None
+    if not all(isinstance(value, str) for value in distinct):
+        return None
+    return sorted(distinct)
+
+
+def code_typecode(size: int) -> str:
+    """Тип кодов array для словаря из size значений."""
+    return 'B' if size <= 256 else 'H'
+
+
+def _shared(make: type, column: str, dictionary: List[str]) -> List[str]:
+    """Значения словаря снимка - те же объекты, что в пуле класса строк."""
+    pool = make.pool(column)
+    return dictionary if pool is None else [pool.intern(v) for v in dictionary]
+
+
+class JsonFormat:
+    """Снимок таблицы в JSON: имена столбцов один раз, строки - массивами.
+
+    {"columns": ["ID", ...], "rows": [[1, ...], ...]}. Столбцы str с
+    малым числом значений хранятся кодами: значения перечислены один раз
+    в "dictionaries": {"status": ["active", ...]}. Снимки прежнего вида
+    (список словарей) читаются так же.
+
+    Со сжатием файл - заголовок (JSON_PACKED_MAGIC) с описанием и
+    группы по COMPRESSION_GROUP_ROWS строк, каждая сжата отдельно.
+    """
+
+    name = 'json'
+    extension = '.json'
+
+    def read(self, filepath: str, schema: List[Tuple[str, str]]) -> List[Row]:
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        make = schema_row_type(schema)
+        if raw[:4] == JSON_PACKED_MAGIC:
+            header, groups = self._unpack(raw)
+            result = []
+            # Группа распаковывается и превращается в строки до следующей:
+            # распакованный текст всего снимка в памяти не собирается
+            for rows in groups:
+                result += self._decode(header, rows, schema, make)
+            return result
+        data = json.loads(raw)
+        if isinstance(data, list):
+            return [make.from_mapping(row) for row in data]
+        return self._decode(data, data["rows"], schema, make)
+
+    def _decode(
+        self, data: dict, rows: list, schema: List[Tuple[str, str]], make: type
+    ) -> List[Row]:
+        """Строки из массивов значений по описанию столбцов и словарей."""
+        stored = data["columns"]
+        decoders = [
+            (stored.index(name), _shared(make, name, dictionary))
+            for name, dictionary in data.get("dictionaries", {}).items()
+        ]
+        if decoders:
+            for values in rows:
+                for j, dictionary in decoders:
+                    values[j] = dictionary[values[j]]
+        if tuple(stored) == tuple(name for name, _ in schema):
+            return [make(*values) for values in rows]
+        return [make.from_mapping(dict(zip(stored, values))) for values in rows]
+
+    def _unpack(self, raw: bytes) -> Tuple[dict, Iterator[list]]:
+        """Описание сжатого снимка и генератор его групп строк."""
+        _, version, header_len = _HEADER.unpack_from(raw, 0)
+        if version != JSON_PACKED_VERSION:
+            raise ValueError("Некорректный формат сжатого JSON-снимка")
+        start = _HEADER.size
+        header = json.loads(raw[start:start + header_len])
+        decompress = get_codec(header["codec"])[1]
+
+        def groups() -> Iterator[list]:
+            pos = start + header_len
+            for length, _ in header["groups"]:
+                yield json.loads(decompress(raw[pos:pos + length]))
+                pos += length
+
+        return header, groups()
+
+    def write(
+        self,
+        filepath: str,
+        rows: List[dict],
+        schema: List[Tuple[str, str]],
+        codec: Optional[str] = None,
+    ) -> None:
+        columns = [name for name, _ in schema]
+        values = tuple_getter(columns)
+        data_rows = [values(row) for row in rows]
+        dictionaries = {}
+        encoders = []
+        for j, (name, col_type) in enumerate(schema):
+            if col_type != 'str':
+                continue
+            dictionary = build_dictionary([row[j] for row in data_rows])
+            if dictionary is not None:
+                dictionaries[name] = dictionary
+                encoders.append((j, {value: i for i, value in enumerate(dictionary)}))
+        if encoders:
+            encoded = []
+            for row in data_rows:
+                row = list(row)
+                for j, codes in encoders:
+                    row[j] = codes[row[j]]
+                encoded.append(row)
+            data_rows = encoded
+
+        compress = get_codec(codec)
+        if compress is not None:
+            self._pack(filepath, columns, dictionaries, data_rows, codec, compress[0])
+            return
+        data = {"columns": columns, "rows": data_rows}
+        if dictionaries:
+            data["dictionaries"] = dictionaries
+        # json.dumps целиком использует C-кодировщик, json.dump в файл - нет
+        text = json.dumps(data, ensure_ascii=False, separators=_JSON_SEPARATORS)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def _pack(
+        self,
+        filepath: str,
+        columns: List[str],
+        dictionaries: Dict[str, List[str]],
+        data_rows: list,
+        codec: str,
+        compress: Callable[[bytes], bytes],
+    ) -> None:
+        groups = []
+        blocks = []
+        for start in range(0, len(data_rows), COMPRESSION_GROUP_ROWS):
+            group = data_rows[start:start + COMPRESSION_GROUP_ROWS]
+            text = json.dumps(group, ensure_ascii=False, separators=_JSON_SEPARATORS)
+            raw = text.encode('utf-8')
+            blocks.append(compress(raw))
+            groups.append([len(blocks[-1]), len(raw)])
+        header = {"codec": codec, "columns": columns, "groups": groups}
+        if dictionaries:
+            header["dictionaries"] = dictionaries
+        header_bytes = json.dumps(
+            header, ensure_ascii=False, separators=_JSON_SEPARATORS
+        ).encode('utf-8')
+        with open(filepath, 'wb') as f:
+            f.write(
+                _HEADER.pack(JSON_PACKED_MAGIC, JSON_PACKED_VERSION, len(header_bytes))
+            )
+            f.write(header_bytes)
+            for block in blocks:
+                f.write(block)
+
+    def sizes(self, filepath: str) -> Tuple[int, int]:
+        """(размер на диске, размер без сжатия) снимка в байтах."""
+        size = os.path.getsize(filepath)
+        described = _read_file_header(filepath, JSON_PACKED_MAGIC)
+        if described is None:
+            return size, size
+        header, body_start = described
+        return size, body_start + sum(raw for _, raw in header["groups"])
+
+
+def encode_column(col_type: str, values: list) -> bytes:
+    """Кодирует столбец: int -> int64, bool -> битовая карта, str -> смещения+байты."""
+    if col_type == 'int':
+        return array('q', values).tobytes()
+    if col_type == 'bool':
+        bitmap = bytearray((len(values) + 7) // 8)
+        for i, value in enumerate(values):
+            if value:
+                bitmap[i >> 3] |= 1 << (i & 7)
+        return bytes(bitmap)
+    if col_type == 'str':
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = array('q', [0])
+        total = 0
+        for item in encoded:
+            total += len(item)
+            offsets.append(total)
+        return offsets.tobytes() + b''.join(encoded)
+    raise ValueError(f"Неподдерживаемый тип: {col_type}")
+
+
+def encode_codes(values: list, dictionary: List[str]) -> bytes:
+    """Столбец со словарем: коды значений по одному или два байта."""
+    codes = {value: i for i, value in enumerate(dictionary)}
+    typecode = code_typecode(len(dictionary))
+    return array(typecode, [codes[value] for value in values]).tobytes()
+
+
+def decode_codes(data: bytes, count: int, dictionary: List[str]) -> list:
+    codes = array(code_typecode(len(dictionary)))
+    codes.frombytes(data[:count * codes.itemsize])
+    return [dictionary[code] for code in codes]
+
+
+def encode_block(col_type: str, values: list, dictionary: Optional[List[str]]) -> bytes:
+    if dictionary is not None:
+        return encode_codes(values, dictionary)
+    return encode_column(col_type, values)
+
+
+def block_layout(header: dict, column: dict) -> List[Tuple[int, int, int]]:
+    """(смещение, длина, строк) сжатых блоков столбца.
+
+    В версии 3 столбец сжат целиком - это один блок на все строки.
+    """
+    count = header["rows"]
+    if "blocks" not in column:
+        return [(column["offset"], column["length"], count)]
+    step = header["block_rows"]
+    layout = []
+    offset = column["offset"]
+    for i, (length, _) in enumerate(column["blocks"]):
+        layout.append((offset, length, min(step, count - i * step)))
+        offset += length
+    return layout
+
+
+def decode_column(col_type: str, data: bytes, count: int) -> list:
+    if col_type == 'int':
+        values = array('q')
+        values.frombytes(data[:count * 8])
+        return values.tolist()
+    if col_type == 'bool':
+        return [bool(data[i >> 3] >> (i & 7) & 1) for i in range(count)]
+    if col_type == 'str':
+        offsets = array('q')
+        offsets.frombytes(data[:(count + 1) * 8])
+        blob = data[(count + 1) * 8:]
+        return [
+            blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(count)
+        ]
+    raise ValueError(f"Неподдерживаемый тип: {col_type}")
+
+
+class ColumnarFormat:
+    """Бинарный поколоночный снимок.
+
+    Файл: заголовок (магия, версия, длина JSON-описания), JSON-описание
+    столбцов со смещениями, затем блоки столбцов подряд. У столбца str
+    с малым числом значений в описании есть "dictionary", а блок
+    содержит только коды (encode_codes).
+
+    Со сжатием ("codec" в описании) столбец разбит на блоки по
+    "block_rows" строк, каждый закодирован и сжат отдельно; "blocks"
+    столбца - (длина, размер до сжатия) блоков подряд. Читатель
+    распаковывает только блоки тех столбцов и строк, к которым обращается.
+    """
+
+    name = 'columnar'
+    extension = '.col'
+
+    def open_mapped(self, filepath: str) -> 'MappedTable':
+        return MappedTable(self, filepath)
+
+    def read_header(self, data: bytes) -> Tuple[dict, int]:
+        magic, version, header_len = _HEADER.unpack_from(data, 0)
+        if magic != COLUMNAR_MAGIC or version not in COLUMNAR_READ_VERSIONS:
+            raise ValueError("Некорректный формат поколоночного файла")
+        start = _HEADER.size
+        header = json.loads(data[start:start + header_len].decode('utf-8'))
+        return header, start + header_len
+
+    def read(self, filepath: str, schema: List[Tuple[str, str]]) -> List[Row]:
+        with open(filepath, 'rb') as f:
+            data = f.read()
+        header, body_start = self.read_header(data)
+        count = header["rows"]
+
+        make = schema_row_type(
+            [(column["name"], column["type"]) for column in header["columns"]]
+        )
+        codec = get_codec(header.get("codec"))
+        columns = []
+        for column in header["columns"]:
+            if codec is None:
+                layout = [(column["offset"], column["length"], count)]
+            else:
+                layout = block_layout(header, column)
+            dictionary = column.get("dictionary")
+            if dictionary is not None:
+                dictionary = _shared(make, column["name"], dictionary)
+            values = []
+            for offset, length, rows in layout:
+                start = body_start + offset
+                block = data[start:start + length]
+                if codec is not None:
+                    block = codec[1](block)
+                if dictionary is not None:
+                    values += decode_codes(block, rows, dictionary)
+                else:
+                    values += decode_column(column["type"], block, rows)
+            columns.append(values)
+
+        return [make(*values) for values in zip(*columns)]
+
+    def write(
+        self,
+        filepath: str,
+        rows: List[dict],
+        schema: List[Tuple[str, str]],
+        codec: Optional[str] = None,
+    ) -> None:
+        compress = get_codec(codec)
+        columns = []
+        blocks = []
+        offset = 0
+        values = tuple_getter([name for name, _ in schema])
+        column_values = list(zip(*map(values, rows))) or [()] * len(schema)
+        for (name, col_type), column in zip(schema, column_values):
+            column = list(column)
+            dictionary = build_dictionary(column) if col_type == 'str' else None
+            info = {"name": name, "type": col_type}
+            if compress is None:
+                block = encode_block(col_type, column, dictionary)
+            else:
+                parts = []
+                info["blocks"] = []
+                for start in range(0, len(column), COMPRESSION_GROUP_ROWS):
+                    raw = encode_block(
+                        col_type, column[start:start + COMPRESSION_GROUP_ROWS],
+                        dictionary,
+                    )
+                    parts.append(compress[0](raw))
+                    info["blocks"].append([len(parts[-1]), len(raw)])
+                block = b''.join(parts)
+            info.update(offset=offset, length=len(block))
+            if dictionary is not None:
+                info["dictionary"] = dictionary
+            columns.append(info)
+            block += b'\0' * _padding(len(block))
+            blocks.append(block)
+            offset += len(block)
+
+        description = {"rows": len(rows), "columns": columns}
+        if compress is not None:
+            description.update(codec=codec, block_rows=COMPRESSION_GROUP_ROWS)
+        header = json.dumps(description, separators=_JSON_SEPARATORS).encode('utf-8')
+        # Пробелы после JSON выравнивают начало блоков для memoryview.cast
+        header += b' ' * _padding(_HEADER.size + len(header))
+        with open(filepath, 'wb') as f:
+            f.write(_HEADER.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, len(header)))
+            f.write(header)
+            for block in blocks:
+                f.write(block)
+
+    def sizes(self, filepath: str) -> Tuple[int, int]:
+        """(размер на диске, размер без сжатия) снимка в байтах."""
+        size = os.path.getsize(filepath)
+        described = _read_file_header(filepath, COLUMNAR_MAGIC)
+        if described is None or "codec" not in described[0]:
+            return size, size
+        header, body_start = described
+        raw = 0
+        for column in header["columns"]:
+            if "blocks" in column:
+                length = sum(raw for _, raw in column["blocks"])
+            else:
+                length = column["raw_length"]
+            raw += length + _padding(length)
+        return size, body_start + raw
+
+
+class IntColumn:
+    def __init__(self, data: memoryview):
+        self._data = data
+        self.values = data.cast('q')
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, i: int) -> int:
+        return self.values[i]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def release(self) -> None:
+        self.values.release()
+        self._data.release()
+
+
+class BitmapColumn:
+    def __init__(self, data: memoryview, count: int):
+        self._data = data
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> bool:
+        return bool(self._data[i >> 3] >> (i & 7) & 1)
+
+    def __iter__(self):
+        data = self._data
+        for i in range(self._count):
+            yield bool(data[i >> 3] >> (i & 7) & 1)
+
+    def release(self) -> None:
+        self._data.release()
+
+
+class StrColumn:
+    def __init__(self, data: memoryview, count: int, mm=None, start: int = 0):
+        self._data = data
+        self._offsets = data[:(count + 1) * 8].cast('q')
+        self._blob = data[(count + 1) * 8:]
+        self._count = count
+        self._mm = mm
+        self._blob_start = start + (count + 1) * 8
+
+    def find_equal(self, value: str) -> List[int]:
+        """Позиции строк, равных value, через поиск байтов в буфере файла."""
+        needle = value.encode('utf-8')
+        offsets = self._offsets
+        if not needle or self._mm is None:
+            return [i for i in range(self._count) if self[i] == value]
+
+        positions = []
+        start = self._blob_start
+        end = start + len(self._blob)
+        pos = start
+        while True:
+            hit = self._mm.find(needle, pos, end)
+            if hit < 0:
+                break
+            rel = hit - start
+            i = bisect_right(offsets, rel) - 1
+            if offsets[i] == rel and offsets[i + 1] == rel + len(needle):
+                positions.append(i)
+            pos = hit + 1
+        return positions
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> str:
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def release(self) -> None:
+        self._offsets.release()
+        self._blob.release()
+        self._data.release()
+
+
+class DictColumn:
+    """Столбец str со словарем: коды в mmap, значения - в заголовке файла.
+
+    Равенство и IN проверяются по кодам (code()), строки не декодируются.
+    """
+
+    def __init__(
+        self, data: memoryview, count: int, dictionary: List[str],
+        mm=None, start: int = 0,
+    ):
+        typecode = code_typecode(len(dictionary))
+        self._data = data
+        self.codes = data.cast(typecode)
+        self.dictionary = dictionary
+        self._lookup = {value: code for code, value in enumerate(dictionary)}
+        self._count = count
+        self._mm = mm
+        self._start = start
+
+    def code(self, value: Any) -> int:
+        """Код значения; -1 - значения нет в словаре, ему ничто не равно."""
+        return self._lookup.get(value, -1)
+
+    def find_equal(self, value: str) -> List[int]:
+        """Позиции строк, равных value: поиск кода, а не строки."""
+        code = self._lookup.get(value)
+        if code is None:
+            return []
+        if self.codes.itemsize > 1 or self._mm is None:
+            return [i for i, item in enumerate(self.codes) if item == code]
+
+        # Однобайтовые коды ищутся в буфере как байт
+        needle = bytes((code,))
+        start = self._start
+        end = start + self._count
+        positions = []
+        hit = self._mm.find(needle, start, end)
+        while hit >= 0:
+            positions.append(hit - start)
+            hit = self._mm.find(needle, hit + 1, end)
+        return positions
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> str:
+        return self.dictionary[self.codes[i]]
+
+    def __iter__(self):
+        return map(self.dictionary.__getitem__, self.codes)
+
+    def release(self) -> None:
+        self.codes.release()
+        self._data.release()
+
+
+class BlockColumn:
+    """Сжатый столбец: блоки по block_rows строк, каждый распаковывается
+    при первом обращении к его строкам.
+
+    part(b) - обычный столбец (IntColumn, StrColumn, ...) над
+    распакованным блоком b, поэтому поиск по позиции и просмотр части
+    таблицы распаковывают только затронутые блоки.
+    """
+
+    def __init__(
+        self,
+        layout: List[Tuple[int, int, int]],
+        block_rows: int,
+        load: Callable[[int, int, int], Any],
+    ):
+        self._layout = layout
+        self._block_rows = block_rows
+        self._load = load
+        self._parts: Dict[int, Any] = {}
+        # Индексируемые значения распакованных блоков (для int - memoryview)
+        self._values: List[Any] = [None] * len(layout)
+        self._count = sum(rows for _, _, rows in layout)
+
+    def part(self, block: int):
+        part = self._parts.get(block)
+        if part is None:
+            part = self._parts[block] = self._load(*self._layout[block])
+            self._values[block] = (
+                part.values if isinstance(part, IntColumn) else part
+            )
+        return part
+
+    def _items(self, block: int):
+        items = self._values[block]
+        if items is None:
+            self.part(block)
+            items = self._values[block]
+        return items
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i):
+        if type(i) is int and 0 <= i < self._count:
+            block, pos = divmod(i, self._block_rows)
+            items = self._values[block]
+            if items is None:
+                items = self._items(block)
+            return items[pos]
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if -self._count <= i < 0:
+            return self[i + self._count]
+        raise IndexError("индекс столбца вне диапазона")
+
+    def __iter__(self):
+        for block in range(len(self._layout)):
+            yield from self._items(block)
+
+    def release(self) -> None:
+        for part in self._parts.values():
+            part.release()
+        self._parts.clear()
+        self._values = [None] * len(self._layout)
+
+
+class BlockStrColumn(BlockColumn):
+    def find_equal(self, value: str) -> List[int]:
+        positions = []
+        for block in range(len(self._layout)):
+            base = block * self._block_rows
+            positions += [base + i for i in self.part(block).find_equal(value)]
+        return positions
+
+
+class BlockDictColumn(BlockStrColumn):
+    """Сжатый столбец со словарем: коды блоков доступны через codes."""
+
+    def __init__(self, layout, block_rows, load, dictionary: List[str]):
+        super().__init__(layout, block_rows, load)
+        self.dictionary = dictionary
+        self._lookup = {value: code for code, value in enumerate(dictionary)}
+        self.codes = _BlockCodes(self)
+
+    def code(self, value: Any) -> int:
+        return self._lookup.get(value, -1)
+
+
+class _BlockCodes:
+    def __init__(self, column: BlockDictColumn):
+        self._column = column
+
+    def __len__(self) -> int:
+        return len(self._column)
+
+    def __getitem__(self, i: int) -> int:
+        block, pos = divmod(i, self._column._block_rows)
+        return self._column.part(block).codes[pos]
+
+
+class MappedTable:
+    """Поколоночный снимок, отображенный в память через mmap.
+
+    Столбцы декодируются по одному значению при обращении, поэтому
+    чтение затрагивает только страницы нужных столбцов и строк. Сжатый
+    столбец читается через BlockColumn: распаковываются только блоки,
+    к строкам которых было обращение.
+    """
+
+    def __init__(self, fmt: ColumnarFormat, filepath: str):
+        self._file = open(filepath, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        header, self._body_start = fmt.read_header(self._mm)
+        self.count = header["rows"]
+        self._header = header
+        self.types = {column["name"]: column["type"] for column in header["columns"]}
+        self._layout = {
+            column["name"]: (column["offset"], column["length"])
+            for column in header["columns"]
+        }
+        self._columns: Dict[str, Any] = {}
+        self._codec = get_codec(header.get("codec"))
+        self.row_type = schema_row_type(list(self.types.items()))
+        self._dictionaries = {
+            column["name"]: _shared(self.row_type, column["name"], column["dictionary"])
+            for column in header["columns"]
+            if "dictionary" in column
+        }
+
+    def _accessor(self, name: str, buffer, start: int, length: int, count: int):
+        data = memoryview(buffer)[start:start + length]
+        col_type = self.types[name]
+        if col_type == 'int':
+            return IntColumn(data)
+        if col_type == 'bool':
+            return BitmapColumn(data, count)
+        if name in self._dictionaries:
+            return DictColumn(data, count, self._dictionaries[name], buffer, start)
+        return StrColumn(data, count, buffer, start)
+
+    def _blocks(self, name: str) -> BlockColumn:
+        column = next(c for c in self._header["columns"] if c["name"] == name)
+        layout = block_layout(self._header, column)
+        block_rows = self._header.get("block_rows", max(self.count, 1))
+        decompress = self._codec[1]
+
+        def load(offset: int, length: int, rows: int):
+            start = self._body_start + offset
+            buffer = decompress(self._mm[start:start + length])
+            return self._accessor(name, buffer, 0, len(buffer), rows)
+
+        if name in self._dictionaries:
+            return BlockDictColumn(layout, block_rows, load, self._dictionaries[name])
+        if self.types[name] == 'str':
+            return BlockStrColumn(layout, block_rows, load)
+        return BlockColumn(layout, block_rows, load)
+
+    def column(self, name: str):
+        accessor = self._columns.get(name)
+        if accessor is None:
+            if self._codec is not None:
+                accessor = self._blocks(name)
+            else:
+                offset, length = self._layout[name]
+                start = self._body_start + offset
+                accessor = self._accessor(name, self._mm, start, length, self.count)
+            self._columns[name] = accessor
+        return accessor
+
+    def segments(
+        self, names: List[str], start: int = 0, stop: Optional[int] = None
+    ) -> Iterator[Tuple[int, int, int, Dict[str, Any]]]:
+        """Части позиций [start, stop) для просмотра: (база, от, до, столбцы).
+
+        Столбцы части индексируются позицией минус база. Несжатый снимок -
+        одна часть, сжатый - по части на блок: просмотр проверяет значения
+        распакованного блока напрямую, без BlockColumn.__getitem__.
+        """
+        stop = self.count if stop is None else stop
+        if self._codec is None:
+            yield 0, start, stop, {name: self.column_values(name) for name in names}
+            return
+        step = self._header.get("block_rows", max(self.count, 1))
+        for block in range(start // step, -(-stop // step)):
+            base = block * step
+            columns = {name: self.column(name)._items(block) for name in names}
+            yield base, max(start - base, 0), min(stop - base, step), columns
+
+    def column_values(self, name: str):
+        """Индексируемые значения столбца; для int это сам memoryview."""
+        accessor = self.column(name)
+        return accessor.values if isinstance(accessor, IntColumn) else accessor
+
+    def row(self, position: int) -> Row:
+        columns = self._columns
+        if len(columns) < len(self.types):
+            for name in self.types:
+                self.column(name)
+        return self.row_type(*[columns[name][position] for name in self.types])
+
+    def rows(self, positions: List[int]) -> List[Row]:
+        """Строки по позициям, собранные по столбцам; сжатый снимок - по блокам."""
+        if self._codec is None:
+            columns = [self.column_values(name) for name in self.types]
+            return self._gather(columns, positions)
+        step = self._header.get("block_rows", max(self.count, 1))
+        result = []
+        for block, group in groupby(positions, key=lambda pos: pos // step):
+            columns = [self.column(name)._items(block) for name in self.types]
+            base = block * step
+            result += self._gather(columns, [pos - base for pos in group])
+        return result
+
+    def _gather(self, columns: list, positions: List[int]) -> List[Row]:
+        values = [[items[i] for i in positions] for items in columns]
+        return [self.row_type(*row) for row in zip(*values)]
+
+    def close(self) -> None:
+        for accessor in self._columns.values():
+            accessor.release()
+        self._columns.clear()
+        self._mm.close()
+        self._file.close()
+
+
+FORMATS: Dict[str, object] = {fmt.name: fmt for fmt in (JsonFormat(), ColumnarFormat())}
+
+
+def get_format(name: str):
+    if name not in FORMATS:
+        names = ", ".join(sorted(FORMATS))
+        raise ValueError(f"Неизвестный формат таблицы '{name}'. Доступны: {names}")
+    return FORMATS[name]
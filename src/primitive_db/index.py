@@ -0,0 +1,268 @@
+# src/primitive_db/index.py
+
+import json
+import os
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import MutableMapping
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from . import storage
+from .constants import INDEX_KINDS
+
+
+class HashIndex:
+    """Индекс значение -> множество ID для поиска по равенству."""
+
+    kind = 'hash'
+
+    def __init__(self, column: str):
+        self.column = column
+        self.entries: Dict[Any, Set[int]] = {}
+
+    def add(self, value: Any, record_id: int) -> None:
+        self.entries.setdefault(value, set()).add(record_id)
+
+    def remove(self, value: Any, record_id: int) -> None:
+        ids = self.entries.get(value)
+        if ids is None:
+            return
+        ids.discard(record_id)
+        if not ids:
+            del self.entries[value]
+
+    def lookup(self, value: Any) -> Set[int]:
+        return set(self.entries.get(value, ()))
+
+    def count(self, value: Any) -> int:
+        return len(self.entries.get(value, ()))
+
+    def dump(self) -> list:
+        return [[value, sorted(ids)] for value, ids in self.entries.items()]
+
+    def restore(self, data: list) -> None:
+        self.entries = {value: set(ids) for value, ids in data}
+
+
+class SortedIndex:
+    """Упорядоченный индекс по парам (значение, ID) для поиска и диапазонов."""
+
+    kind = 'sorted'
+
+    def __init__(self, column: str):
+        self.column = column
+        self.entries: List[tuple] = []
+
+    def add(self, value: Any, record_id: int) -> None:
+        insort(self.entries, (value, record_id))
+
+    def remove(self, value: Any, record_id: int) -> None:
+        pos = bisect_left(self.entries, (value, record_id))
+        if pos < len(self.entries) and self.entries[pos] == (value, record_id):
+            del self.entries[pos]
+
+    def lookup(self, value: Any) -> Set[int]:
+        return self.range(value, value)
+
+    def count(self, value: Any) -> int:
+        return self.count_range(value, value)
+
+    def _bounds(
+        self,
+        low: Optional[Any],
+        high: Optional[Any],
+        include_low: bool,
+        include_high: bool,
+    ) -> Tuple[int, int]:
+        start = 0
+        end = len(self.entries)
+        if low is not None:
+            edge = float('-inf') if include_low else float('inf')
+            start = bisect_left(self.entries, (low, edge))
+        if high is not None:
+            edge = float('inf') if include_high else float('-inf')
+            end = bisect_right(self.entries, (high, edge))
+        return start, max(start, end)
+
+    def range(
+        self,
+        low: Optional[Any] = None,
+        high: Optional[Any] = None,
+        include_low: bool = True,
+        include_high: bool = True,
+    ) -> Set[int]:
+        start, end = self._bounds(low, high, include_low, include_high)
+        return {record_id for _, record_id in self.entries[start:end]}
+
+    def count_range(
+        self,
+        low: Optional[Any] = None,
+        high: Optional[Any] = None,
+        include_low: bool = True,
+        include_high: bool = True,
+    ) -> int:
+        start, end = self._bounds(low, high, include_low, include_high)
+        return end - start
+
+    def dump(self) -> list:
+        return [list(entry) for entry in self.entries]
+
+    def restore(self, data: list) -> None:
+        self.entries = [tuple(entry) for entry in data]
+
+
+INDEX_CLASSES = {cls.kind: cls for cls in (HashIndex, SortedIndex)}
+
+
+def make_index(column: str, kind: str):
+    if kind not in INDEX_KINDS:
+        kinds = ", ".join(sorted(INDEX_KINDS))
+        raise ValueError(f"Неизвестный тип индекса '{kind}'. Доступны: {kinds}")
+    return INDEX_CLASSES[kind](column)
+
+
+def build_index(column: str, kind: str, rows: MutableMapping):
+    index = make_index(column, kind)
+    if isinstance(rows, storage.MappedRows):
+        items = rows.column_items(column)
+    else:
+        items = ((record_id, row.get(column)) for record_id, row in rows.items())
+    for record_id, value in items:
+        index.add(value, record_id)
+    return index
+
+
+def _replace_row(indexes: Dict[str, Any], old: Optional[dict], row: dict) -> None:
+    """Заменяет строку в индексах; старая есть при повторе журнала."""
+    for column, index in indexes.items():
+        if old is not None:
+            index.remove(old.get(column), old["ID"])
+        index.add(row.get(column), row["ID"])
+
+
+def apply_record(indexes: Dict[str, Any], rows: Dict[int, dict], record: dict) -> None:
+    """Отражает запись журнала в индексах; вызывать до изменения строк."""
+    if not indexes:
+        return
+
+    op = record["op"]
+    if op == "insert":
+        _replace_row(indexes, rows.get(record["row"]["ID"]), record["row"])
+    elif op == "insert_many":
+        for row in record["rows"]:
+            _replace_row(indexes, rows.get(row["ID"]), row)
+    elif op == "update":
+        row = rows.get(record["id"])
+        if row is None:
+            return
+        for column, new_value in record["set"].items():
+            index = indexes.get(column)
+            if index is not None:
+                index.remove(row.get(column), row["ID"])
+                index.add(new_value, row["ID"])
+    elif op == "delete":
+        for record_id in record["ids"]:
+            row = rows.get(record_id)
+            if row is None:
+                continue
+            for column, index in indexes.items():
+                index.remove(row.get(column), record_id)
+    elif op == "clear":
+        for column, index in list(indexes.items()):
+            indexes[column] = make_index(column, index.kind)
+
+
+def _snapshot_stamp(table_name: str, meta: Optional[dict]) -> Optional[List[int]]:
+    try:
+        stat = os.stat(storage.snapshot_path(table_name, meta))
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _read_index_file(table_name: str) -> dict:
+    try:
+        with open(storage.index_path(table_name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        return {}
+
+
+def _write_index_file(table_name: str, stamp: List[int], indexes: dict) -> None:
+    data = {
+        "stamp": stamp,
+        "indexes": {
+            column: {"kind": index.kind, "entries": index.dump()}
+            for column, index in indexes.items()
+        },
+    }
+    filepath = storage.index_path(table_name)
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, filepath)
+
+
+def load_table(
+    table_name: str,
+    meta: Optional[dict] = None,
+) -> Tuple[MutableMapping, Dict[str, Any]]:
+    """Загружает строки таблицы вместе с её индексами.
+
+    Индексы хранятся на диске в состоянии, соответствующем снимку таблицы,
+    и доводятся до актуального состояния тем же воспроизведением журнала,
+    что и сами строки. Если снимок изменился (после сжатия журнала),
+    индексы перестраиваются по снимку и сохраняются заново.
+    """
+    rows = storage.open_snapshot(table_name, meta)
+    index_defs = (meta or {}).get("indexes", {})
+    indexes: Dict[str, Any] = {}
+
+    if index_defs:
+        stamp = _snapshot_stamp(table_name, meta)
+        stored = _read_index_file(table_name)
+        stored_indexes = {}
+        if stored.get("stamp") == stamp:
+            stored_indexes = stored.get("indexes", {})
+        rebuilt = False
+
+        for column, kind in index_defs.items():
+            entry = stored_indexes.get(column)
+            if entry is not None and entry.get("kind") == kind:
+                index = make_index(column, kind)
+                index.restore(entry["entries"])
+            else:
+                index = build_index(column, kind, rows)
+                rebuilt = True
+            indexes[column] = index
+
+        if rebuilt and stamp is not None:
+            _write_index_file(table_name, stamp, indexes)
+
+    kind = storage.table_row_type(meta)
+    for record in storage.read_log(table_name):
+        apply_record(indexes, rows, record)
+        storage.apply_record(rows, record, kind)
+
+    return rows, indexes
+
+
+def candidate_ids(
+    indexes: Dict[str, Any],
+    where_clause: Optional[Dict[str, Any]],
+) -> Optional[Set[int]]:
+    """Возвращает ID-кандидаты по индексированным полям условия или None."""
+    if not where_clause or not indexes:
+        return None
+
+    result = None
+    for column, value in where_clause.items():
+        index = indexes.get(column)
+        if index is None:
+            continue
+        ids = index.lookup(value)
+        result = ids if result is None else result & ids
+        if not result:
+            break
+    return result
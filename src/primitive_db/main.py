@@ -1,12 +1,75 @@
 # src/primitive_db/main.py
 
+import argparse
+import asyncio
+import sys
+
+from .constants import SERVER_HOST, SERVER_PORT, SERVER_TRANSACTION_TIMEOUT
 from .engine import run
+from .scan import configure as configure_scan
+from .script import run_script
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="database")
+    parser.add_argument(
+        "-f",
+        "--file",
+        help="выполнить команды из файла ('-' - из стандартного ввода)",
+    )
+    parser.add_argument(
+        "-y",
+        "--yes",
+        action="store_true",
+        help="подтверждать опасные команды скрипта без вопросов",
+    )
+    parser.add_argument(
+        "--scan-workers",
+        type=int,
+        help="число процессов для полного просмотра больших таблиц",
+    )
+    subparsers = parser.add_subparsers(dest="mode")
+    serve_parser = subparsers.add_parser("serve", help="запустить сервер БД")
+    serve_parser.add_argument("--host", default=SERVER_HOST)
+    serve_parser.add_argument("--port", type=int, default=SERVER_PORT)
+    serve_parser.add_argument("--socket", help="путь к Unix-сокету вместо TCP")
+    serve_parser.add_argument(
+        "--transaction-timeout",
+        type=float,
+        default=SERVER_TRANSACTION_TIMEOUT,
+        help="секунд без команд до отмены транзакции клиента",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.scan_workers is not None:
+        configure_scan(workers=args.scan_workers)
+
+    if args.mode == "serve":
+        from .server import serve
+        try:
+            asyncio.run(serve(
+                args.host, args.port, args.socket, args.transaction_timeout
+            ))
+        except KeyboardInterrupt:
+            print("\n Сервер остановлен.")
+        return
 
+    if args.file is not None or not sys.stdin.isatty():
+        if args.file in (None, "-"):
+            sys.exit(run_script(sys.stdin, args.yes))
+        try:
+            with open(args.file, encoding="utf-8") as script:
+                sys.exit(run_script(script, args.yes))
+        except OSError as e:
+            print(f" Не удалось открыть скрипт: {e}")
+            sys.exit(1)
 
-def main():
     print("DB project is running!")
     run()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,176 @@
+# src/primitive_db/metrics.py
+
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    from decorators import set_timing_observer
+except ImportError:
+    from src.decorators import set_timing_observer
+
+from .constants import METRICS_SAMPLES, PROFILE_TOP
+
+PROFILE_MODES = ('cpu', 'memory')
+
+
+class Timer:
+    """Задержки одной операции: счетчики и окно последних замеров.
+
+    Процентили считаются по последним METRICS_SAMPLES замерам, а число
+    вызовов, сумма и максимум - по всем с момента сброса.
+    """
+
+    __slots__ = ('count', 'total', 'max', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=METRICS_SAMPLES)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.samples.append(seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": self.max * 1000,
+        }
+
+
+class Metrics:
+    """Реестр метрик процесса: таймеры операций и фаз, счетчики событий.
+
+    Таймеры операций называются по функциям core (insert, select, ...),
+    таймеры фаз - parse, load.metadata, load.table, plan, filter, query,
+    flush, serialize и render.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.started = time.time()
+        self.timers: Dict[str, Timer] = {}
+        self.counters: Dict[str, int] = {}
+
+    def observe(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = Timer()
+        timer.add(seconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name: str) -> Callable:
+        """Декоратор: время каждого вызова функции в таймер name."""
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(*args, **kwargs) -> Any:
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "uptime_s": time.time() - self.started,
+            "timers": {
+                name: timer.summary() for name, timer in sorted(self.timers.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def reset(self) -> None:
+        self.started = time.time()
+        self.timers.clear()
+        self.counters.clear()
+
+    def dump(self, filepath: str) -> None:
+        """Сохраняет снимок метрик в JSON-файл."""
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+
+metrics = Metrics()
+# Время всех функций под log_time попадает в таймеры операций
+set_timing_observer(metrics.observe)
+
+_profile: Dict[str, Any] = {"mode": None, "profiler": None}
+
+
+def profile_mode() -> Optional[str]:
+    return _profile["mode"]
+
+
+def start_profile(mode: str) -> None:
+    """Включает сбор профиля: cpu (cProfile) или memory (tracemalloc)."""
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Режим профилирования: {', '.join(PROFILE_MODES)}")
+    if _profile["mode"] is not None:
+        raise ValueError(f"Профилирование уже включено ({_profile['mode']})")
+    if mode == 'cpu':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        _profile["profiler"] = profiler
+    else:
+        tracemalloc.start()
+    _profile["mode"] = mode
+
+
+def stop_profile(top: int = PROFILE_TOP) -> List[str]:
+    """Выключает профилирование и возвращает строки отчета."""
+    mode = _profile["mode"]
+    if mode is None:
+        raise ValueError("Профилирование не включено")
+    _profile["mode"] = None
+    if mode == 'cpu':
+        profiler = _profile.pop("profiler")
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        return [line for line in out.getvalue().splitlines() if line.strip()]
+
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    lines = [f"Текущий объем: {current / 1024:.1f} КиБ, пик: {peak / 1024:.1f} КиБ"]
+    lines.extend(str(stat) for stat in snapshot.statistics("lineno")[:top])
+    return lines
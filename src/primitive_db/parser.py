@@ -1,37 +1,27 @@
 # src/primitive_db/parser.py
 
 import shlex
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+from .aggregate import SelectItem, parse_select_item
+from .predicate import PLACEHOLDER, Expr, parse_predicate
+
+
+def parse_where_clause(where_str: str) -> Optional[Expr]:
+    """Разбирает условие WHERE: сравнения, AND/OR/NOT, IN, BETWEEN, LIKE."""
+    if not where_str or not where_str.strip():
+        return None
+    return parse_predicate(where_str)
 
-def parse_where_clause(where_str: str) -> Dict[str, Any]:
-    if not where_str:
-        return {}
-    
-    if '=' not in where_str:
-        raise ValueError("Условие WHERE должно содержать оператор '='")
-    
-    parts = where_str.split('=', 1)
-    if len(parts) != 2:
-        raise ValueError("Некорректный формат условия WHERE")
-    
-    field = parts[0].strip()
-    value_str = parts[1].strip()
-    
-    try:
-        value = int(value_str)
-    except ValueError:
-        value_lower = value_str.lower()
-        if value_lower in ('true', 'false'):
-            value = value_lower == 'true'
-        else:
-            if (value_str.startswith('"') and value_str.endswith('"')) or \
-               (value_str.startswith("'") and value_str.endswith("'")):
-                value = value_str[1:-1]
-            else:
-                value = value_str
-    
-    return {field: value}
+
+def parse_select_list(select_str: str) -> List[SelectItem]:
+    """Разбирает список select: столбцы и агрегаты через запятую; '*' - все."""
+    if select_str.strip() == '*':
+        return []
+    parts = [part.strip() for part in select_str.split(',')]
+    if not all(parts):
+        raise ValueError(f"Некорректный список select: '{select_str}'")
+    return [parse_select_item(part) for part in parts]
 
 
 def parse_set_clause(set_str: str) -> Dict[str, Any]:
@@ -70,6 +60,11 @@ def parse_set_clause(set_str: str) -> Dict[str, Any]:
         field = field.strip()
         value_str = value_str.strip()
         
+        if value_str == PLACEHOLDER.raw:
+            # '?' без кавычек: параметр подготовленной команды
+            result[field] = PLACEHOLDER
+            continue
+        
         try:
             value = int(value_str)
         except ValueError:
@@ -0,0 +1,433 @@
+# src/primitive_db/planner.py
+
+import math
+from collections.abc import MutableMapping
+from typing import Any, Dict, List, Optional, Set
+from weakref import WeakKeyDictionary
+
+from . import storage
+from .constants import (
+    ANALYZE_CHANGE_RATIO,
+    DEFAULT_SELECTIVITY,
+    HISTOGRAM_BUCKETS,
+    INDEX_PROBE_COST,
+    KEY_CHECK_COST,
+    ROW_CHECK_COST,
+)
+from .predicate import (
+    And,
+    Between,
+    Compare,
+    Expr,
+    In,
+    Like,
+    Not,
+    Or,
+    fields,
+    format_expr,
+    in_range,
+)
+from .scan import scan_workers
+
+
+class ColumnStats:
+    """Статистика столбца: число различных значений, min/max и гистограмма."""
+
+    def __init__(self, values: List[Any]):
+        self.count = len(values)
+        self.distinct = len(set(values))
+        self.min = min(values) if values else None
+        self.max = max(values) if values else None
+        self.histogram: List[int] = []
+
+        numeric = bool(values) and isinstance(values[0], (int, bool))
+        if numeric and self.max != self.min:
+            width = (self.max - self.min) / HISTOGRAM_BUCKETS
+            self.histogram = [0] * HISTOGRAM_BUCKETS
+            for value in values:
+                bucket = min(int((value - self.min) / width), HISTOGRAM_BUCKETS - 1)
+                self.histogram[bucket] += 1
+
+    def eq_selectivity(self) -> float:
+        return 1.0 / self.distinct if self.distinct else 0.0
+
+    def range_selectivity(self, low: Any = None, high: Any = None) -> float:
+        """Доля значений в [low, high] по гистограмме (равные по ширине корзины)."""
+        if not self.count:
+            return 0.0
+        if not isinstance(self.min, (int, bool)):
+            return DEFAULT_SELECTIVITY
+        low = self.min if low is None else max(low, self.min)
+        high = self.max if high is None else min(high, self.max)
+        if low > high:
+            return 0.0
+        if low == high:
+            return self.eq_selectivity()
+        if not self.histogram:
+            return 1.0
+
+        width = (self.max - self.min) / HISTOGRAM_BUCKETS
+        covered = 0.0
+        for i, bucket_count in enumerate(self.histogram):
+            b_low = self.min + i * width
+            b_high = b_low + width
+            overlap = min(high, b_high) - max(low, b_low)
+            if overlap > 0:
+                covered += bucket_count * overlap / width
+        return min(1.0, covered / self.count)
+
+    def describe(self) -> str:
+        text = f"различных {self.distinct}, min {self.min!r}, max {self.max!r}"
+        if self.histogram:
+            text += f", гистограмма {self.histogram}"
+        return text
+
+
+class TableStats:
+    def __init__(self, rows: MutableMapping):
+        self.row_count = len(rows)
+        self.columns: Dict[str, ColumnStats] = {}
+        self._rows = rows
+
+    def column(self, name: str) -> ColumnStats:
+        stats = self.columns.get(name)
+        if stats is None:
+            rows = self._rows
+            if isinstance(rows, storage.MappedRows):
+                values = [value for _, value in rows.column_items(name)]
+            else:
+                values = [row.get(name) for row in rows.values()]
+            stats = self.columns[name] = ColumnStats(values)
+        return stats
+
+
+_stats_cache: "WeakKeyDictionary[Any, TableStats]" = WeakKeyDictionary()
+
+
+def table_stats(state: Any, refresh: bool = False) -> TableStats:
+    """Статистика таблицы; пересчитывается, когда число строк заметно изменилось."""
+    stats = _stats_cache.get(state)
+    row_count = len(state.rows)
+    if (
+        refresh
+        or stats is None
+        or abs(row_count - stats.row_count) > ANALYZE_CHANGE_RATIO * stats.row_count
+    ):
+        stats = _stats_cache[state] = TableStats(state.rows)
+    return stats
+
+
+def selectivity(expr: Optional[Expr], stats: TableStats) -> float:
+    if expr is None:
+        return 1.0
+    if isinstance(expr, And):
+        return math.prod(selectivity(item, stats) for item in expr.items)
+    if isinstance(expr, Or):
+        return 1.0 - math.prod(1.0 - selectivity(item, stats) for item in expr.items)
+    if isinstance(expr, Not):
+        return 1.0 - selectivity(expr.item, stats)
+
+    column = stats.column(expr.field)
+    if isinstance(expr, Compare):
+        if expr.op == '=':
+            return column.eq_selectivity()
+        if expr.op == '!=':
+            return 1.0 - column.eq_selectivity()
+        if expr.op in ('<', '<='):
+            return column.range_selectivity(high=expr.value)
+        return column.range_selectivity(low=expr.value)
+    if isinstance(expr, In):
+        sel = min(1.0, len(set(expr.values)) * column.eq_selectivity())
+    elif isinstance(expr, Between):
+        sel = column.range_selectivity(expr.low, expr.high)
+    else:
+        sel = DEFAULT_SELECTIVITY
+    return 1.0 - sel if expr.negated else sel
+
+
+class FullScan:
+    def __init__(self, row_count: int, workers: int = 1):
+        self.rows = row_count
+        self.cost = row_count * ROW_CHECK_COST
+        self.workers = workers
+
+    def ids(self, indexes: Dict[str, Any]) -> Optional[Set[int]]:
+        return None
+
+    def describe(self, indent: str = "") -> List[str]:
+        text = f"{indent}Полный просмотр (строк {self.rows}, стоимость {self.cost:.1f}"
+        if self.workers > 1:
+            text += f", параллельно в {self.workers} процессах"
+        return [text + ")"]
+
+
+class IndexLookup:
+    """Поиск по индексу для = и IN."""
+
+    def __init__(self, column: str, index: Any, values: tuple):
+        self.column = column
+        self.kind = index.kind
+        self.values = values
+        self.rows = sum(index.count(value) for value in set(values))
+        self.cost = len(values) * INDEX_PROBE_COST + self.rows
+
+    def ids(self, indexes: Dict[str, Any]) -> Set[int]:
+        index = indexes[self.column]
+        result: Set[int] = set()
+        for value in self.values:
+            result |= index.lookup(value)
+        return result
+
+    def describe(self, indent: str = "") -> List[str]:
+        values = ", ".join(repr(v) for v in self.values)
+        return [
+            f"{indent}Поиск по индексу {self.kind}({self.column}) IN ({values}) "
+            f"(строк {self.rows}, стоимость {self.cost:.1f})"
+        ]
+
+
+class RangeScan:
+    """Просмотр диапазона упорядоченного индекса."""
+
+    def __init__(
+        self,
+        column: str,
+        index: Any,
+        low: Any = None,
+        high: Any = None,
+        include_low: bool = True,
+        include_high: bool = True,
+    ):
+        self.column = column
+        self.bounds = (low, high, include_low, include_high)
+        self.rows = index.count_range(*self.bounds)
+        self.cost = math.log2(len(index.entries) + 2) * INDEX_PROBE_COST + self.rows
+
+    def ids(self, indexes: Dict[str, Any]) -> Set[int]:
+        return indexes[self.column].range(*self.bounds)
+
+    def describe(self, indent: str = "") -> List[str]:
+        low, high, include_low, include_high = self.bounds
+        left = "(-inf" if low is None else ("[" if include_low else "(") + repr(low)
+        right = "+inf)" if high is None else repr(high) + ("]" if include_high else ")")
+        return [
+            f"{indent}Диапазон по индексу sorted({self.column}) {left}, {right} "
+            f"(строк {self.rows}, стоимость {self.cost:.1f})"
+        ]
+
+
+class KeyLookup:
+    """Поиск по первичному ключу ID для = и IN: строки по ID без индекса."""
+
+    column = "ID"
+
+    def __init__(self, rows: MutableMapping, values: tuple):
+        self.values = values
+        self._ids = {value for value in values if value in rows}
+        self.rows = len(self._ids)
+        self.cost = len(values) * INDEX_PROBE_COST + self.rows
+
+    def ids(self, indexes: Dict[str, Any]) -> Set[int]:
+        return set(self._ids)
+
+    def describe(self, indent: str = "") -> List[str]:
+        values = ", ".join(repr(v) for v in self.values)
+        return [
+            f"{indent}Поиск по первичному ключу ID IN ({values}) "
+            f"(строк {self.rows}, стоимость {self.cost:.1f})"
+        ]
+
+
+class KeyRange:
+    """Диапазон первичного ключа ID.
+
+    В mmap-снимке ID упорядочены и диапазон ищется бинарным поиском,
+    в словаре строк проверяются только ключи, без чтения строк.
+    """
+
+    column = "ID"
+
+    def __init__(
+        self,
+        rows: MutableMapping,
+        low: Any = None,
+        high: Any = None,
+        include_low: bool = True,
+        include_high: bool = True,
+    ):
+        self.bounds = (low, high, include_low, include_high)
+        if isinstance(rows, storage.MappedRows):
+            self._ids = set(rows.id_range(*self.bounds))
+            probe = math.log2(rows.snapshot_size + 2) * INDEX_PROBE_COST
+        else:
+            self._ids = {key for key in rows if in_range(key, *self.bounds)}
+            probe = len(rows) * KEY_CHECK_COST
+        self.rows = len(self._ids)
+        self.cost = probe + self.rows
+
+    def ids(self, indexes: Dict[str, Any]) -> Set[int]:
+        return set(self._ids)
+
+    def describe(self, indent: str = "") -> List[str]:
+        low, high, include_low, include_high = self.bounds
+        left = "(-inf" if low is None else ("[" if include_low else "(") + repr(low)
+        right = "+inf)" if high is None else repr(high) + ("]" if include_high else ")")
+        return [
+            f"{indent}Диапазон по первичному ключу ID {left}, {right} "
+            f"(строк {self.rows}, стоимость {self.cost:.1f})"
+        ]
+
+
+def key_path(expr: Expr, rows: MutableMapping):
+    """Путь по первичному ключу ID для условия на ID или None."""
+    if isinstance(expr, Compare):
+        if expr.op == '=':
+            return KeyLookup(rows, (expr.value,))
+        if expr.op == '!=':
+            return None
+        if expr.op in ('<', '<='):
+            return KeyRange(rows, high=expr.value, include_high=expr.op == '<=')
+        return KeyRange(rows, low=expr.value, include_low=expr.op == '>=')
+    if expr.negated:
+        return None
+    if isinstance(expr, In):
+        return KeyLookup(rows, expr.values)
+    if isinstance(expr, Between):
+        return KeyRange(rows, expr.low, expr.high)
+    return None
+
+
+class IndexIntersection:
+    def __init__(self, paths: list):
+        self.paths = paths
+        self.rows = min(path.rows for path in paths)
+        self.cost = sum(path.cost for path in paths)
+
+    def ids(self, indexes: Dict[str, Any]) -> Set[int]:
+        result = self.paths[0].ids(indexes)
+        for path in self.paths[1:]:
+            if not result:
+                break
+            result &= path.ids(indexes)
+        return result
+
+    def describe(self, indent: str = "") -> List[str]:
+        lines = [
+            f"{indent}Пересечение индексов (строк <= {self.rows}, "
+            f"стоимость {self.cost:.1f})"
+        ]
+        for path in self.paths:
+            lines += path.describe(indent + "  ")
+        return lines
+
+
+class IndexUnion:
+    def __init__(self, paths: list):
+        self.paths = paths
+        self.rows = sum(path.rows for path in paths)
+        self.cost = sum(path.cost for path in paths)
+
+    def ids(self, indexes: Dict[str, Any]) -> Set[int]:
+        result: Set[int] = set()
+        for path in self.paths:
+            result |= path.ids(indexes)
+        return result
+
+    def describe(self, indent: str = "") -> List[str]:
+        lines = [
+            f"{indent}Объединение индексов (строк <= {self.rows}, "
+            f"стоимость {self.cost:.1f})"
+        ]
+        for path in self.paths:
+            lines += path.describe(indent + "  ")
+        return lines
+
+
+def access_path(
+    expr: Expr, indexes: Dict[str, Any], rows: Optional[MutableMapping] = None
+):
+    """Лучший индексный путь для подвыражения или None.
+
+    С rows условия на ID без индекса по нему ищутся по первичному ключу.
+    """
+    if isinstance(expr, And):
+        paths = [p for p in (access_path(i, indexes, rows) for i in expr.items) if p]
+        if not paths:
+            return None
+        paths.sort(key=lambda path: path.cost)
+        chosen = [paths[0]]
+        for path in paths[1:]:
+            # Пересекать выгодно, пока выборка по индексу дешевле проверки
+            # уже найденных кандидатов.
+            if path.cost < min(p.rows for p in chosen) * ROW_CHECK_COST:
+                chosen.append(path)
+        return chosen[0] if len(chosen) == 1 else IndexIntersection(chosen)
+    if isinstance(expr, Or):
+        paths = [access_path(item, indexes, rows) for item in expr.items]
+        if not all(paths):
+            return None
+        return IndexUnion(paths)
+    if isinstance(expr, (Not, Like)):
+        return None
+
+    index = indexes.get(expr.field)
+    if index is None:
+        if expr.field == "ID" and rows is not None:
+            return key_path(expr, rows)
+        return None
+    if isinstance(expr, Compare):
+        if expr.op == '=':
+            return IndexLookup(expr.field, index, (expr.value,))
+        if expr.op == '!=' or index.kind != 'sorted':
+            return None
+        if expr.op in ('<', '<='):
+            return RangeScan(expr.field, index, high=expr.value,
+                             include_high=expr.op == '<=')
+        return RangeScan(expr.field, index, low=expr.value,
+                         include_low=expr.op == '>=')
+    if expr.negated:
+        return None
+    if isinstance(expr, In):
+        return IndexLookup(expr.field, index, expr.values)
+    if isinstance(expr, Between) and index.kind == 'sorted':
+        return RangeScan(expr.field, index, expr.low, expr.high)
+    return None
+
+
+class QueryPlan:
+    def __init__(self, state: Any, path: Any, where: Optional[Expr]):
+        self.state = state
+        self.path = path
+        self.where = where
+
+    @property
+    def estimated_rows(self) -> float:
+        """Оценка размера результата по статистике столбцов."""
+        stats = table_stats(self.state)
+        return len(self.state.rows) * selectivity(self.where, stats)
+
+    @property
+    def cost(self) -> float:
+        return self.path.cost
+
+    def candidate_ids(self, indexes: Dict[str, Any]) -> Optional[Set[int]]:
+        return self.path.ids(indexes)
+
+    def describe(self) -> List[str]:
+        stats = table_stats(self.state)
+        lines = [f"  Строк в таблице: {stats.row_count}"]
+        for name in fields(self.where):
+            lines.append(f"  Статистика {name}: {stats.column(name).describe()}")
+        lines += self.path.describe("  ")
+        lines.append(f"  Фильтр: {format_expr(self.where)}")
+        lines.append(f"  Ожидаемый результат: ~{self.estimated_rows:.0f} строк")
+        return lines
+
+
+def plan_query(state: Any, where: Optional[Expr]) -> QueryPlan:
+    """Выбирает самый дешевый путь доступа: ключ, индекс, диапазон или просмотр."""
+    full_scan = FullScan(len(state.rows), scan_workers(state.rows, where))
+    path = access_path(where, state.indexes, state.rows) if where is not None else None
+    if path is None or path.cost >= full_scan.cost:
+        path = full_scan
+    return QueryPlan(state, path, where)
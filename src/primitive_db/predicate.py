@@ -0,0 +1,498 @@
+# src/primitive_db/predicate.py
+
+import re
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+KEYWORDS = {'and', 'or', 'not', 'in', 'between', 'like'}
+
+_TOKEN_RE = re.compile(
+    r"""\s*(?:
+        (?P<string>'[^']*'|"[^"]*")
+      | (?P<op><=|>=|!=|<>|=|<|>)
+      | (?P<punct>[(),])
+      | (?P<word>[^\s()<>=!,'"]+)
+    )""",
+    re.VERBOSE,
+)
+
+
+class Literal(NamedTuple):
+    """Значение из текста условия до приведения к типу столбца."""
+    value: Any
+    raw: str
+
+
+class Compare(NamedTuple):
+    field: str
+    op: str
+    value: Any
+
+
+class In(NamedTuple):
+    field: str
+    values: tuple
+    negated: bool = False
+
+
+class Between(NamedTuple):
+    field: str
+    low: Any
+    high: Any
+    negated: bool = False
+
+
+class Like(NamedTuple):
+    field: str
+    pattern: Any
+    negated: bool = False
+
+
+class And(NamedTuple):
+    items: tuple
+
+
+class Or(NamedTuple):
+    items: tuple
+
+
+class Not(NamedTuple):
+    item: Any
+
+
+Expr = Union[Compare, In, Between, Like, And, Or, Not]
+WhereClause = Union[Expr, Dict[str, Any]]
+
+# Параметр подготовленной команды: '?' без кавычек
+PLACEHOLDER = Literal(None, '?')
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"Неожиданный символ в условии: '{text[pos:].strip()}'")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'word' and value.lower() in KEYWORDS:
+            kind, value = 'keyword', value.lower()
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+def make_literal(kind: str, text: str) -> Literal:
+    if kind == 'word' and text == PLACEHOLDER.raw:
+        return PLACEHOLDER
+    if kind == 'string':
+        return Literal(text[1:-1], text[1:-1])
+    try:
+        return Literal(int(text), text)
+    except ValueError:
+        pass
+    if text.lower() in ('true', 'false'):
+        return Literal(text.lower() == 'true', text)
+    return Literal(text, text)
+
+
+class _Parser:
+    """Рекурсивный спуск: OR < AND < NOT < сравнение / скобки."""
+
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Tuple[Optional[str], Optional[str]]:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None, None
+
+    def take(self) -> Tuple[str, str]:
+        if self.pos >= len(self.tokens):
+            raise ValueError("Неожиданный конец условия")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def accept(self, kind: str, value: Optional[str] = None) -> bool:
+        tok_kind, tok_value = self.peek()
+        if tok_kind == kind and (value is None or tok_value == value):
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, kind: str, value: str) -> None:
+        if not self.accept(kind, value):
+            found = self.peek()[1] or "конец условия"
+            raise ValueError(f"Ожидалось '{value}', найдено '{found}'")
+
+    def literal(self) -> Literal:
+        kind, text = self.take()
+        if kind not in ('string', 'word'):
+            raise ValueError(f"Ожидалось значение, найдено '{text}'")
+        return make_literal(kind, text)
+
+    def parse(self) -> Expr:
+        expr = self.or_expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Лишний текст в условии: '{self.peek()[1]}'")
+        return expr
+
+    def or_expr(self) -> Expr:
+        items = [self.and_expr()]
+        while self.accept('keyword', 'or'):
+            items.append(self.and_expr())
+        return items[0] if len(items) == 1 else Or(tuple(items))
+
+    def and_expr(self) -> Expr:
+        items = [self.not_expr()]
+        while self.accept('keyword', 'and'):
+            items.append(self.not_expr())
+        return items[0] if len(items) == 1 else And(tuple(items))
+
+    def not_expr(self) -> Expr:
+        if self.accept('keyword', 'not'):
+            return Not(self.not_expr())
+        if self.accept('punct', '('):
+            expr = self.or_expr()
+            self.expect('punct', ')')
+            return expr
+        return self.condition()
+
+    def condition(self) -> Expr:
+        kind, field = self.take()
+        if kind != 'word':
+            raise ValueError(f"Ожидалось имя поля, найдено '{field}'")
+
+        negated = self.accept('keyword', 'not')
+        if self.accept('keyword', 'in'):
+            self.expect('punct', '(')
+            values = [self.literal()]
+            while self.accept('punct', ','):
+                values.append(self.literal())
+            self.expect('punct', ')')
+            return In(field, tuple(values), negated)
+        if self.accept('keyword', 'between'):
+            low = self.literal()
+            self.expect('keyword', 'and')
+            return Between(field, low, self.literal(), negated)
+        if self.accept('keyword', 'like'):
+            return Like(field, self.literal(), negated)
+        if negated:
+            raise ValueError("После NOT ожидалось IN, BETWEEN или LIKE")
+
+        kind, op = self.take()
+        if kind != 'op':
+            raise ValueError(f"Ожидался оператор сравнения, найдено '{op}'")
+        return Compare(field, '!=' if op == '<>' else op, self.literal())
+
+
+def parse_predicate(text: str) -> Optional[Expr]:
+    """Разбирает условие WHERE в дерево выражения."""
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    return _Parser(tokens).parse()
+
+
+def parse_literals(text: str) -> List[Literal]:
+    """Список значений '(a, b, ...)' или 'a b ...' (параметры execute)."""
+    tokens = tokenize(text)
+    parser = _Parser(tokens)
+    if not parser.accept('punct', '('):
+        return [parser.literal() for _ in tokens]
+    values = []
+    if not parser.accept('punct', ')'):
+        values.append(parser.literal())
+        while parser.accept('punct', ','):
+            values.append(parser.literal())
+        parser.expect('punct', ')')
+    if parser.pos != len(tokens):
+        raise ValueError(f"Лишний текст после параметров: '{parser.peek()[1]}'")
+    return values
+
+
+def count_params(expr: Optional[Expr]) -> int:
+    """Число параметров '?' в выражении."""
+    return sum(1 for literal in _literals(expr) if literal is PLACEHOLDER)
+
+
+def _literals(expr: Optional[Expr]) -> List[Any]:
+    if expr is None:
+        return []
+    if isinstance(expr, (And, Or)):
+        return [literal for item in expr.items for literal in _literals(item)]
+    if isinstance(expr, Not):
+        return _literals(expr.item)
+    if isinstance(expr, Compare):
+        return [expr.value]
+    if isinstance(expr, In):
+        return list(expr.values)
+    if isinstance(expr, Between):
+        return [expr.low, expr.high]
+    return [expr.pattern]
+
+
+def fill_params(expr: Optional[Expr], params: Iterator[Literal]) -> Optional[Expr]:
+    """Подставляет значения вместо '?' в порядке их появления в условии."""
+    def fill(literal: Any) -> Any:
+        return next(params) if literal is PLACEHOLDER else literal
+
+    if expr is None:
+        return None
+    if isinstance(expr, (And, Or)):
+        return type(expr)(tuple(fill_params(item, params) for item in expr.items))
+    if isinstance(expr, Not):
+        return Not(fill_params(expr.item, params))
+    if isinstance(expr, Compare):
+        return Compare(expr.field, expr.op, fill(expr.value))
+    if isinstance(expr, In):
+        return In(expr.field, tuple(fill(v) for v in expr.values), expr.negated)
+    if isinstance(expr, Between):
+        return Between(expr.field, fill(expr.low), fill(expr.high), expr.negated)
+    return Like(expr.field, fill(expr.pattern), expr.negated)
+
+
+def from_dict(where_clause: Dict[str, Any]) -> Optional[Expr]:
+    """Условие-словарь {поле: значение} как конъюнкция равенств."""
+    items = tuple(
+        Compare(field, '=', Literal(value, str(value)))
+        for field, value in where_clause.items()
+    )
+    if not items:
+        return None
+    return items[0] if len(items) == 1 else And(items)
+
+
+def ensure_expr(where_clause: Any) -> Optional[Expr]:
+    if not where_clause:
+        return None
+    if isinstance(where_clause, dict):
+        return from_dict(where_clause)
+    return where_clause
+
+
+def fields(expr: Optional[Expr]) -> List[str]:
+    """Имена полей, упомянутых в выражении, в порядке появления."""
+    if expr is None:
+        return []
+    if isinstance(expr, (And, Or)):
+        result = []
+        for item in expr.items:
+            result += [f for f in fields(item) if f not in result]
+        return result
+    if isinstance(expr, Not):
+        return fields(expr.item)
+    return [expr.field]
+
+
+def bind(
+    expr: Optional[Expr],
+    schema: Dict[str, str],
+    convert: Callable[[str, str], Any],
+) -> Optional[Expr]:
+    """Проверяет поля по схеме и приводит значения к типам столбцов."""
+    if expr is None:
+        return None
+    if isinstance(expr, (And, Or)):
+        return type(expr)(tuple(bind(item, schema, convert) for item in expr.items))
+    if isinstance(expr, Not):
+        return Not(bind(expr.item, schema, convert))
+
+    if expr.field not in schema:
+        raise ValueError(f'Поле "{expr.field}" не существует в таблице')
+    col_type = schema[expr.field]
+
+    def value_of(literal: Any) -> Any:
+        if not isinstance(literal, Literal):
+            return literal
+        if col_type == 'str':
+            return literal.raw
+        if col_type == 'int' and type(literal.value) is int:
+            return literal.value
+        if col_type == 'bool' and isinstance(literal.value, bool):
+            return literal.value
+        return convert(literal.raw, col_type)
+
+    if isinstance(expr, Compare):
+        if col_type == 'bool' and expr.op not in ('=', '!='):
+            raise ValueError(f"Оператор '{expr.op}' не применим к bool")
+        return Compare(expr.field, expr.op, value_of(expr.value))
+    if isinstance(expr, In):
+        return In(expr.field, tuple(value_of(v) for v in expr.values), expr.negated)
+    if isinstance(expr, Between):
+        return Between(
+            expr.field, value_of(expr.low), value_of(expr.high), expr.negated
+        )
+    if col_type != 'str':
+        raise ValueError(f"LIKE применим только к str, поле '{expr.field}': {col_type}")
+    return Like(expr.field, value_of(expr.pattern), expr.negated)
+
+
+def equalities(expr: Optional[Expr]) -> Dict[str, Any]:
+    """Равенства верхнего уровня конъюнкции: кандидаты для поиска по индексу."""
+    if isinstance(expr, Compare) and expr.op == '=':
+        return {expr.field: expr.value}
+    result: Dict[str, Any] = {}
+    if isinstance(expr, And):
+        for item in expr.items:
+            if isinstance(item, Compare) and item.op == '=':
+                result.setdefault(item.field, item.value)
+    return result
+
+
+def in_range(
+    value: Any,
+    low: Any = None,
+    high: Any = None,
+    include_low: bool = True,
+    include_high: bool = True,
+) -> bool:
+    """Попадает ли значение в диапазон; None - граница не задана."""
+    if low is not None and (value < low if include_low else value <= low):
+        return False
+    if high is not None and (value > high if include_high else value >= high):
+        return False
+    return True
+
+
+def format_expr(expr: Optional[Expr]) -> str:
+    """Текстовое представление условия для вывода (explain)."""
+    if expr is None:
+        return "нет"
+    if isinstance(expr, (And, Or)):
+        joiner = ' AND ' if isinstance(expr, And) else ' OR '
+        return '(' + joiner.join(format_expr(item) for item in expr.items) + ')'
+    if isinstance(expr, Not):
+        return f"NOT {format_expr(expr.item)}"
+
+    def show(value: Any) -> str:
+        value = value.raw if isinstance(value, Literal) else value
+        return repr(value) if isinstance(value, str) else str(value)
+
+    prefix = "NOT " if getattr(expr, "negated", False) else ""
+    if isinstance(expr, Compare):
+        return f"{expr.field} {expr.op} {show(expr.value)}"
+    if isinstance(expr, In):
+        values = ", ".join(show(v) for v in expr.values)
+        return f"{expr.field} {prefix}IN ({values})"
+    if isinstance(expr, Between):
+        return (
+            f"{expr.field} {prefix}BETWEEN {show(expr.low)} AND {show(expr.high)}"
+        )
+    return f"{expr.field} {prefix}LIKE {show(expr.pattern)}"
+
+
+def like_to_regex(pattern: str) -> 're.Pattern':
+    parts = []
+    for char in pattern:
+        if char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts), re.DOTALL)
+
+
+def _source(
+    expr: Expr,
+    ref: Callable[[str], str],
+    consts: Dict[str, Any],
+    coded: Optional[Dict[str, Tuple[str, Callable[[Any], int]]]] = None,
+) -> str:
+    """Текст выражения; coded - столбцы со словарем: (ссылка на код, code).
+
+    Равенство и IN по таким столбцам сравнивают коды, а не значения.
+    """
+    def const(value: Any) -> str:
+        name = f"k{len(consts)}"
+        consts[name] = value
+        return name
+
+    if isinstance(expr, (And, Or)):
+        joiner = ' and ' if isinstance(expr, And) else ' or '
+        items = [_source(item, ref, consts, coded) for item in expr.items]
+        return '(' + joiner.join(items) + ')'
+    if isinstance(expr, Not):
+        return f"(not {_source(expr.item, ref, consts, coded)})"
+
+    target = ref(expr.field)
+    code = coded.get(expr.field) if coded else None
+    if isinstance(expr, Compare):
+        op = '==' if expr.op == '=' else expr.op
+        if code is not None and op in ('==', '!='):
+            code_ref, encode = code
+            return f"({code_ref} {op} {const(encode(expr.value))})"
+        return f"({target} {op} {const(expr.value)})"
+    if isinstance(expr, In):
+        op = 'not in' if expr.negated else 'in'
+        if code is not None:
+            code_ref, encode = code
+            codes = frozenset(encode(value) for value in expr.values)
+            return f"({code_ref} {op} {const(codes)})"
+        return f"({target} {op} {const(frozenset(expr.values))})"
+    if isinstance(expr, Between):
+        check = f"({const(expr.low)} <= {target} <= {const(expr.high)})"
+        return f"(not {check})" if expr.negated else check
+    regex = const(like_to_regex(expr.pattern))
+    check = f"({regex}.fullmatch({target}) is not None)"
+    return f"(not {check})" if expr.negated else check
+
+
+def compile_predicate(
+    expr: Optional[Expr], row_type: Optional[type] = None
+) -> Callable[[dict], bool]:
+    """Компилирует выражение в одну функцию row -> bool.
+
+    Дерево обходится один раз: из него строится исходный текст лямбды,
+    константы передаются через пространство имен, а не подставляются в код.
+    Для строк класса row_type (rows.Row) столбцы читаются атрибутами
+    слотов, позиции которых находятся здесь, один раз на запрос.
+    """
+    if expr is None:
+        return lambda row: True
+    consts: Dict[str, Any] = {}
+    if row_type is not None:
+        def ref(field: str) -> str:
+            return f"row.{row_type.slot(field)}"
+    else:
+        def ref(field: str) -> str:
+            return f"row[{field!r}]"
+    body = _source(expr, ref, consts)
+    return eval(f"lambda row: {body}", consts)
+
+
+def compile_positional(
+    expr: Optional[Expr],
+    columns: Dict[str, Any],
+) -> Callable[[int], bool]:
+    """Компилирует выражение в функцию позиции строки по столбцам-массивам.
+
+    У столбцов со словарем (formats.DictColumn: массив codes и метод
+    code()) равенство и IN проверяются по массиву кодов.
+    """
+    if expr is None:
+        return lambda i: True
+    consts: Dict[str, Any] = {}
+    names = {field: f"c{n}" for n, field in enumerate(columns)}
+    namespace = {names[field]: col for field, col in columns.items()}
+    coded = {}
+    for field, col in columns.items():
+        if hasattr(col, "code"):
+            namespace[f"{names[field]}_codes"] = col.codes
+            coded[field] = (f"{names[field]}_codes[i]", col.code)
+    body = _source(expr, lambda field: f"{names[field]}[i]", consts, coded)
+    return eval(f"lambda i: {body}", {**consts, **namespace})
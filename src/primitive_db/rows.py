@@ -0,0 +1,194 @@
+# src/primitive_db/rows.py
+
+from collections.abc import Mapping
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .constants import DICT_MAX_VALUES
+
+
+class ValuePool:
+    """Словарь значений столбца в памяти: равные строки - один объект.
+
+    В слоте строки и код словаря, и общая строка - один указатель,
+    поэтому строк столбца с малым числом значений в памяти столько же,
+    сколько различных значений. Пул перестает расти после limit
+    значений: столбец с большим числом значений не кодируется.
+    """
+
+    __slots__ = ("values", "limit")
+
+    def __init__(self, limit: int = DICT_MAX_VALUES):
+        self.values: Dict[str, str] = {}
+        self.limit = limit
+
+    def intern(self, value: Any) -> Any:
+        if not isinstance(value, str):
+            return value
+        shared = self.values.get(value)
+        if shared is not None:
+            return shared
+        if len(self.values) < self.limit:
+            self.values[value] = value
+        return value
+
+
+class Row(Mapping):
+    """Строка таблицы: значения в слотах, имена столбцов - в классе.
+
+    Классы строк создаются row_type() по одному на схему таблицы. В
+    экземпляре нет своей хеш-таблицы ключей, только значения, поэтому
+    строка занимает в несколько раз меньше памяти, чем словарь. Снаружи
+    это неизменяемый Mapping: row["age"], row.get(...), dict(row).
+    В горячих циклах столбец читается атрибутом слота, найденным один
+    раз на запрос (getter(), slot()).
+    """
+
+    __slots__ = ()
+    columns: Tuple[str, ...] = ()
+    interned: Tuple[str, ...] = ()
+    _slots: Dict[str, str] = {}
+    _pools: Tuple[Tuple[int, ValuePool], ...] = ()
+    _values: Callable[['Row'], tuple]
+
+    def __getitem__(self, key: str) -> Any:
+        slot = self._slots.get(key)
+        if slot is None:
+            raise KeyError(key)
+        return getattr(self, slot)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        slot = self._slots.get(key)
+        return default if slot is None else getattr(self, slot)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.columns)
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._slots
+
+    def __repr__(self) -> str:
+        return f"Row({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return _rebuild, (self.columns, self.values_tuple(), self.interned)
+
+    def values_tuple(self) -> tuple:
+        return self._values(self)
+
+    def to_dict(self) -> dict:
+        return dict(zip(self.columns, self._values(self)))
+
+    def replace(self, changes: Mapping) -> 'Row':
+        """Новая строка с измененными значениями (строки неизменяемы)."""
+        values = dict(zip(self.columns, self._values(self)))
+        values.update(changes)
+        return self._interned(list(values.values()))
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping) -> 'Row':
+        return cls._interned([mapping.get(column) for column in cls.columns])
+
+    @classmethod
+    def _interned(cls, values: List[Any]) -> 'Row':
+        for i, pool in cls._pools:
+            values[i] = pool.intern(values[i])
+        return cls(*values)
+
+    @classmethod
+    def pool(cls, column: str) -> Optional[ValuePool]:
+        for i, pool in cls._pools:
+            if cls.columns[i] == column:
+                return pool
+        return None
+
+    @classmethod
+    def slot(cls, column: str) -> str:
+        return cls._slots[column]
+
+    @classmethod
+    def getter(cls, column: str) -> Callable[['Row'], Any]:
+        return attrgetter(cls._slots[column])
+
+
+@lru_cache(maxsize=None)
+def row_type(columns: Tuple[str, ...], interned: Tuple[str, ...] = ()) -> type:
+    """Класс строки для столбцов в порядке схемы (ID первым).
+
+    Значения столбцов interned в строках из from_mapping() и replace()
+    берутся из пулов класса (ValuePool).
+    """
+    slots = tuple(f"_{i}" for i in range(len(columns)))
+    params = ", ".join(slots)
+    body = "".join(f"\n    self.{slot} = {slot}" for slot in slots) or "\n    pass"
+    namespace: Dict[str, Any] = {}
+    # Явный __init__ по слотам: без *args и цикла, как у namedtuple
+    exec(f"def __init__(self, {params}):{body}", namespace)
+    if len(slots) == 1:
+        only = attrgetter(slots[0])
+        values = lambda row: (only(row),)  # noqa: E731
+    else:
+        values = attrgetter(*slots) if slots else (lambda row: ())
+    return type(Row)("Row", (Row,), {
+        "__module__": __name__,
+        "__slots__": slots,
+        "__init__": namespace["__init__"],
+        "columns": columns,
+        "interned": interned,
+        "_slots": dict(zip(columns, slots)),
+        "_pools": tuple(
+            (columns.index(column), ValuePool()) for column in interned
+        ),
+        "_values": staticmethod(values),
+    })
+
+
+def schema_row_type(schema: Sequence[Tuple[str, str]]) -> type:
+    """Класс строки по схеме [(имя, тип)]: столбцы str - со словарем."""
+    columns = tuple(name for name, _ in schema)
+    interned = tuple(name for name, col_type in schema if col_type == 'str')
+    return row_type(columns, interned)
+
+
+def _rebuild(
+    columns: Tuple[str, ...], values: tuple, interned: Tuple[str, ...] = ()
+) -> Row:
+    return row_type(columns, interned)(*values)
+
+
+def to_dict(row: Mapping) -> dict:
+    """Отдельный словарь для выдачи наружу (API, вывод, JSON)."""
+    return row.to_dict() if isinstance(row, Row) else dict(row)
+
+
+def updated(row: Mapping, changes: Mapping) -> Mapping:
+    if isinstance(row, Row):
+        return row.replace(changes)
+    return {**row, **changes}
+
+
+def column_getter(
+    column: str, kind: Optional[type] = None
+) -> Callable[[Mapping], Any]:
+    """Чтение столбца: слотом для строк класса kind, иначе по ключу."""
+    if kind is not None:
+        return kind.getter(column)
+    return itemgetter(column)
+
+
+def tuple_getter(columns: Sequence[str]) -> Callable[[Mapping], tuple]:
+    """Значения строки кортежем в порядке columns (для записи снимков)."""
+    columns = tuple(columns)
+    by_key = itemgetter(*columns) if len(columns) > 1 else (
+        lambda row: tuple(row[column] for column in columns)
+    )
+
+    def values(row: Mapping) -> tuple:
+        if isinstance(row, Row) and row.columns == columns:
+            return row._values(row)
+        return by_key(row)
+    return values
@@ -0,0 +1,98 @@
+# src/primitive_db/scan.py
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .constants import PARALLEL_SCAN_MIN_ROWS, SCAN_CHUNKS_PER_WORKER, SCAN_WORKERS
+from .predicate import Expr, compile_predicate, equalities
+from .storage import MappedRows
+
+settings = {
+    "workers": SCAN_WORKERS or os.cpu_count() or 1,
+    "min_rows": PARALLEL_SCAN_MIN_ROWS,
+}
+
+# Просматриваемая таблица: процессы пула получают ее через fork,
+# без сериализации строк.
+_shared: Dict[str, Any] = {}
+
+
+def configure(workers: Optional[int] = None, min_rows: Optional[int] = None) -> None:
+    """Задает число процессов и размер таблицы, с которого просмотр параллелен."""
+    if workers is not None:
+        if workers < 1:
+            raise ValueError("Число процессов должно быть не меньше 1")
+        settings["workers"] = workers
+    if min_rows is not None:
+        settings["min_rows"] = min_rows
+
+
+def _fork_context():
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    return multiprocessing.get_context("fork")
+
+
+def scan_workers(rows: Any, where: Optional[Expr]) -> int:
+    """Число процессов для полного просмотра; 1 - просмотр в текущем процессе."""
+    if where is None or settings["workers"] < 2 or _fork_context() is None:
+        return 1
+    if isinstance(rows, MappedRows):
+        if equalities(where):
+            # Равенство уже сужает снимок до нескольких позиций
+            return 1
+        size = rows.snapshot_size
+    else:
+        size = len(rows)
+    if size < settings["min_rows"]:
+        return 1
+    return settings["workers"]
+
+
+def _match_ids(start: int, stop: int) -> List[int]:
+    rows, ids = _shared["rows"], _shared["ids"]
+    matches = compile_predicate(_shared["where"], _shared["row_type"])
+    return [record_id for record_id in ids[start:stop] if matches(rows[record_id])]
+
+
+def _match_positions(start: int, stop: int) -> List[int]:
+    return _shared["rows"].match_positions(_shared["where"], start, stop)
+
+
+def _run_chunks(task, size: int, workers: int) -> List[int]:
+    if not size:
+        # Пустой снимок (все строки в журнале) или пустая таблица
+        return []
+    chunks = workers * SCAN_CHUNKS_PER_WORKER
+    step = -(-size // chunks)
+    starts = list(range(0, size, step))
+    stops = [min(start + step, size) for start in starts]
+    with ProcessPoolExecutor(workers, mp_context=_fork_context()) as pool:
+        result: List[int] = []
+        for part in pool.map(task, starts, stops):
+            result += part
+        return result
+
+
+def parallel_filter(
+    rows: Any, where: Expr, workers: int, row_type: Optional[type] = None
+) -> List[dict]:
+    """Полный просмотр по частям в пуле процессов; порядок как у обычного.
+
+    Части таблицы проверяются независимо, а найденные ID (или позиции
+    снимка mmap) склеиваются в порядке частей, поэтому результат совпадает
+    с последовательным просмотром.
+    """
+    _shared["rows"], _shared["where"] = rows, where
+    _shared["row_type"] = row_type
+    try:
+        if isinstance(rows, MappedRows):
+            positions = _run_chunks(_match_positions, rows.snapshot_size, workers)
+            return rows.filter(where, positions)
+        _shared["ids"] = ids = list(rows)
+        found = _run_chunks(_match_ids, len(ids), workers)
+        return [rows[record_id] for record_id in found]
+    finally:
+        _shared.clear()
@@ -0,0 +1,92 @@
+# src/primitive_db/script.py
+
+import time
+from typing import Iterable, List
+
+try:
+    from decorators import auto_confirm, quiet_timing
+except ImportError:
+    from src.decorators import auto_confirm, quiet_timing
+
+from .commands import execute, parse_command
+from .constants import SCRIPT_FLUSH_EVERY
+from .core import db
+from .engine import change_setting, print_help, print_result
+from .metrics import metrics
+
+# Команды, результат которых печатается и при успехе
+OUTPUT_COMMANDS = {
+    "select", "explain", "describe", "list_tables", "cache_stats", "help",
+    "stats", "profile",
+}
+COMMENT_PREFIXES = ("--", "#")
+
+
+def needs_confirmation(cmd_name: str, args: List[str]) -> bool:
+    """Команды, которые в REPL спрашивают подтверждение."""
+    if cmd_name == "prepare" and len(args) > 2 and args[1] == 'as':
+        return needs_confirmation(args[2], args[3:])
+    if cmd_name in ("drop_table", "delete", "delete_all"):
+        return True
+    return cmd_name == "update" and 'set' in args[1:] and 'where' not in args[1:]
+
+
+def script_commands(lines: Iterable[str]) -> Iterable[tuple]:
+    """Пары (номер строки, команда) без пустых строк и комментариев."""
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if line.endswith(';'):
+            line = line[:-1].rstrip()
+        if line and not line.startswith(COMMENT_PREFIXES):
+            yield line_no, line
+
+
+def run_script(lines: Iterable[str], assume_yes: bool = False) -> int:
+    """Выполняет команды построчно без вопросов; возвращает код выхода.
+
+    Весь скрипт идет одним пакетом db.batch(): таблицы загружаются один
+    раз, а изменения фиксируются в конце (и каждые SCRIPT_FLUSH_EVERY
+    команд вне явной транзакции). Вывод log_time отключен, сообщения
+    успешных команд записи не печатаются. На первой ошибке выполнение
+    останавливается, а уже выполненные команды сохраняются.
+    """
+    start = time.monotonic()
+    executed = 0
+    with db.batch(), quiet_timing(), auto_confirm():
+        for line_no, command_line in script_commands(lines):
+            try:
+                cmd_name, args = parse_command(command_line)
+            except ValueError as e:
+                print(f" Строка {line_no}: {e}")
+                return 1
+
+            if cmd_name == "exit":
+                break
+            if cmd_name == "help":
+                print_help()
+                continue
+            if cmd_name == "set":
+                change_setting(args)
+                continue
+            if needs_confirmation(cmd_name, args) and not assume_yes:
+                print(
+                    f" Строка {line_no}: команда '{cmd_name}' требует "
+                    "подтверждения, запустите скрипт с --yes"
+                )
+                return 1
+
+            result = execute(command_line, stream=True)
+            if not result["ok"]:
+                print(f" Строка {line_no}: {result['message']}")
+                return 1
+            if cmd_name in OUTPUT_COMMANDS or "rows" in result:
+                with metrics.timer("render"):
+                    print_result(result)
+
+            executed += 1
+            if executed % SCRIPT_FLUSH_EVERY == 0 and not db.in_transaction:
+                db.flush()
+
+    elapsed = time.monotonic() - start
+    print(f"Выполнено команд: {executed} за {elapsed:.3f} секунд")
+    return 0
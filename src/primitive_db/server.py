@@ -0,0 +1,183 @@
+# src/primitive_db/server.py
+
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+try:
+    from decorators import auto_confirm
+except ImportError:
+    from src.decorators import auto_confirm
+
+from .commands import Result, execute, make_result
+from .constants import (
+    SERVER_HOST,
+    SERVER_LINE_LIMIT,
+    SERVER_PORT,
+    SERVER_TRANSACTION_TIMEOUT,
+)
+from .core import db, rollback_transaction
+from .metrics import metrics
+from .scan import configure as configure_scan
+
+CLOSE_COMMANDS = {"exit", "quit"}
+
+
+@metrics.timed("serialize")
+def encode_result(result: Result) -> bytes:
+    return json.dumps(result, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def run_command(command_line: str) -> Result:
+    """Выполняет команду без вопросов к пользователю и фиксирует изменения."""
+    try:
+        with auto_confirm():
+            return execute(command_line)
+    except Exception as e:
+        return make_result(False, f"Неожиданная ошибка: {e}")
+    finally:
+        db.autocommit()
+
+
+class Server:
+    """Сервер БД: команды языка parse_command по TCP или Unix-сокету.
+
+    Протокол построчный: клиент шлет одну команду на строку (UTF-8),
+    сервер отвечает одной строкой JSON с полями ok, message и данными
+    команды (rows, tables, schema, ...).
+
+    Все клиенты работают с одной резидентной сессией db. Команды
+    выполняются по одной в отдельном потоке, чтобы ожидание файловой
+    блокировки не останавливало цикл событий. Клиент, открывший
+    транзакцию, владеет сессией до commit/rollback: команды остальных
+    клиентов ждут, а при разрыве соединения транзакция отменяется.
+    Транзакция, в которой transaction_timeout секунд нет команд, тоже
+    отменяется и освобождает сессию; следующая команда этого клиента
+    получает ошибку вместо выполнения вне транзакции.
+    """
+
+    def __init__(
+        self, transaction_timeout: Optional[float] = SERVER_TRANSACTION_TIMEOUT
+    ):
+        self.transaction_timeout = transaction_timeout
+        self._engine = asyncio.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        owns_engine = False
+        expired = False
+        try:
+            while True:
+                timeout = self.transaction_timeout if owns_engine else None
+                try:
+                    line = await asyncio.wait_for(reader.readline(), timeout)
+                except asyncio.TimeoutError:
+                    await self._call(rollback_transaction)
+                    self._engine.release()
+                    owns_engine = False
+                    expired = True
+                    continue
+                except ValueError:
+                    writer.write(encode_result(
+                        make_result(False, "Слишком длинная команда")
+                    ))
+                    break
+                if not line:
+                    break
+                command_line = line.decode("utf-8", errors="replace").strip()
+                if not command_line:
+                    continue
+                if command_line in CLOSE_COMMANDS:
+                    break
+                if expired:
+                    expired = False
+                    writer.write(encode_result(make_result(
+                        False,
+                        "Транзакция отменена: нет команд дольше "
+                        f"{self.transaction_timeout:g} с. Команда не выполнена",
+                    )))
+                    await writer.drain()
+                    continue
+
+                if not owns_engine:
+                    await self._engine.acquire()
+                    owns_engine = True
+                try:
+                    result = await self._call(run_command, command_line)
+                finally:
+                    if not db.in_transaction:
+                        self._engine.release()
+                        owns_engine = False
+
+                writer.write(encode_result(result))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if owns_engine:
+                await self._call(rollback_transaction)
+                self._engine.release()
+            writer.close()
+
+    async def start(
+        self,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        socket_path: Optional[str] = None,
+    ) -> asyncio.AbstractServer:
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            self._server = await asyncio.start_unix_server(
+                self.handle_client, path=socket_path, limit=SERVER_LINE_LIMIT
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self.handle_client, host, port, limit=SERVER_LINE_LIMIT
+            )
+        return self._server
+
+    @property
+    def addresses(self) -> list:
+        if self._server is None:
+            return []
+        return [sock.getsockname() for sock in self._server.sockets]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if db.in_transaction:
+            await self._call(rollback_transaction)
+        await self._call(db.close)
+        self._executor.shutdown(wait=True)
+
+
+async def serve(
+    host: str = SERVER_HOST,
+    port: int = SERVER_PORT,
+    socket_path: Optional[str] = None,
+    transaction_timeout: Optional[float] = SERVER_TRANSACTION_TIMEOUT,
+) -> None:
+    # Команды выполняются в потоке исполнителя: fork многопоточного
+    # процесса небезопасен, поэтому просмотр в сервере последовательный
+    configure_scan(workers=1)
+    server = Server(transaction_timeout)
+    await server.start(host, port, socket_path)
+    for address in server.addresses:
+        print(f"Сервер БД слушает {address}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,569 @@
+# src/primitive_db/storage.py
+
+import json
+import os
+import struct
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableMapping, ValuesView
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .constants import (
+    DATA_DIR,
+    DEFAULT_TABLE_FORMAT,
+    INDEX_SUFFIX,
+    LOG_COMPACT_MIN_BYTES,
+    LOG_SUFFIX,
+)
+from .formats import FORMATS, get_codec, get_format
+from .predicate import (
+    Expr,
+    compile_positional,
+    compile_predicate,
+    equalities,
+    fields,
+    in_range,
+)
+from .rows import column_getter, schema_row_type, updated
+
+
+def table_format(meta: Optional[dict] = None):
+    """Формат снимка таблицы из ее записи в db_meta.json."""
+    return get_format((meta or {}).get("format", DEFAULT_TABLE_FORMAT))
+
+
+def table_compression(meta: Optional[dict] = None) -> Optional[str]:
+    """Кодек сжатия блоков снимка ("compression" в db_meta.json) или None."""
+    name = (meta or {}).get("compression")
+    return name if get_codec(name) is not None else None
+
+
+def table_schema(meta: Optional[dict] = None) -> List[Tuple[str, str]]:
+    return [tuple(col.split(':', 1)) for col in (meta or {}).get("columns", [])]
+
+
+def table_row_type(meta: Optional[dict] = None) -> Optional[type]:
+    """Класс строк таблицы (rows.Row) по столбцам из db_meta.json."""
+    schema = table_schema(meta)
+    return schema_row_type(schema) if schema else None
+
+
+def snapshot_path(table_name: str, meta: Optional[dict] = None) -> str:
+    extension = table_format(meta).extension
+    return os.path.join(DATA_DIR, f"{table_name}{extension}")
+
+
+def log_path(table_name: str) -> str:
+    return os.path.join(DATA_DIR, f"{table_name}{LOG_SUFFIX}")
+
+
+def index_path(table_name: str) -> str:
+    return os.path.join(DATA_DIR, f"{table_name}{INDEX_SUFFIX}")
+
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def _file_size(filepath: str) -> int:
+    try:
+        return os.path.getsize(filepath)
+    except FileNotFoundError:
+        return 0
+
+
+def fsync_dir(dirpath: str) -> None:
+    """Сбрасывает на диск запись каталога, чтобы переименование пережило сбой."""
+    try:
+        fd = os.open(dirpath or '.', os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def replace_file(tmp_path: str, filepath: str) -> None:
+    """fsync временного файла и атомарная замена им целевого файла."""
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+    fsync_dir(os.path.dirname(filepath))
+
+
+def read_snapshot(table_name: str, meta: Optional[dict] = None) -> List[dict]:
+    """Читает снимок; поврежденный файл - ошибка, а не пустая таблица."""
+    filepath = snapshot_path(table_name, meta)
+    try:
+        return table_format(meta).read(filepath, table_schema(meta))
+    except FileNotFoundError:
+        return []
+    except (struct.error, ValueError) as e:
+        raise ValueError(f"Файл таблицы {filepath} поврежден: {e}")
+
+
+def read_log(table_name: str) -> List[dict]:
+    """Читает журнал операций, отбрасывая недописанную последнюю запись.
+
+    Недописанной может быть только последняя строка (сбой посреди
+    записи); испорченная строка в середине - ошибка, а не конец журнала,
+    иначе все следующие за ней зафиксированные записи молча пропали бы.
+    """
+    filepath = log_path(table_name)
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return []
+
+    records = []
+    for number, line in enumerate(lines, 1):
+        try:
+            if not line.endswith('\n'):
+                raise ValueError("нет конца строки")
+            records.append(json.loads(line))
+        except ValueError as e:
+            if number == len(lines):
+                break
+            raise ValueError(f"Журнал {filepath} поврежден в строке {number}: {e}")
+    return records
+
+
+def truncate_torn_tail(table_name: str) -> None:
+    """Обрезает журнал до последней целой строки.
+
+    Недописанная строка остается после сбоя посреди дописывания; новые
+    записи после нее склеились бы с ней в одну испорченную строку.
+    """
+    try:
+        f = open(log_path(table_name), 'rb+')
+    except FileNotFoundError:
+        return
+    with f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return
+        f.seek(0)
+        data = f.read()
+        f.truncate(data.rfind(b'\n') + 1)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def apply_record(
+    rows: Dict[int, dict], record: dict, kind: Optional[type] = None
+) -> None:
+    """Применяет одну запись журнала к строкам, индексированным по ID.
+
+    Словари строк из журнала хранятся как строки класса kind (rows.Row).
+    """
+    op = record["op"]
+    if op == "insert":
+        row = record["row"]
+        rows[row["ID"]] = row if kind is None else kind.from_mapping(row)
+    elif op == "insert_many":
+        for row in record["rows"]:
+            rows[row["ID"]] = row if kind is None else kind.from_mapping(row)
+    elif op == "update":
+        row = rows.get(record["id"])
+        if row is not None:
+            rows[record["id"]] = updated(row, record["set"])
+    elif op == "delete":
+        for record_id in record["ids"]:
+            rows.pop(record_id, None)
+    elif op == "clear":
+        rows.clear()
+    else:
+        raise ValueError(f"Неизвестная операция в журнале: {op}")
+
+
+class MappedRows(MutableMapping):
+    """Строки таблицы поверх mmap-снимка с наложенными изменениями журнала.
+
+    Базовые строки не материализуются заранее: поиск по ID идет бинарным
+    поиском по столбцу ID снимка, а filter() проверяет только столбцы
+    из условия и создает словари лишь для подошедших строк.
+    """
+
+    def __init__(self, table, kind: Optional[type] = None):
+        self._table = table
+        self.row_type = table.row_type if table is not None else kind
+        self._ids = table.column_values("ID") if table is not None else []
+        self._overlay: Dict[int, dict] = {}
+        self._new_ids: Dict[int, None] = {}
+        self._deleted: set = set()
+
+    def _position(self, record_id: Any) -> Optional[int]:
+        ids = self._ids
+        if not ids or record_id > ids[-1]:
+            return None
+        pos = bisect_left(ids, record_id)
+        if pos < len(self._ids) and self._ids[pos] == record_id:
+            return pos
+        return None
+
+    def __getitem__(self, record_id: int) -> dict:
+        row = self._overlay.get(record_id)
+        if row is not None:
+            return row
+        if record_id in self._deleted:
+            raise KeyError(record_id)
+        pos = self._position(record_id)
+        if pos is None:
+            raise KeyError(record_id)
+        return self._table.row(pos)
+
+    def __setitem__(self, record_id: int, row: dict) -> None:
+        if record_id not in self._overlay and self._position(record_id) is None:
+            self._new_ids[record_id] = None
+        self._deleted.discard(record_id)
+        self._overlay[record_id] = row
+
+    def __delitem__(self, record_id: int) -> None:
+        if record_id not in self:
+            raise KeyError(record_id)
+        self._overlay.pop(record_id, None)
+        if record_id in self._new_ids:
+            del self._new_ids[record_id]
+        else:
+            self._deleted.add(record_id)
+
+    def __contains__(self, record_id: object) -> bool:
+        if record_id in self._overlay:
+            return True
+        return record_id not in self._deleted and self._position(record_id) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        deleted = self._deleted
+        for record_id in self._ids:
+            if record_id not in deleted:
+                yield record_id
+        yield from self._new_ids
+
+    def __len__(self) -> int:
+        return len(self._ids) - len(self._deleted) + len(self._new_ids)
+
+    def values(self) -> ValuesView:
+        return _MappedValues(self)
+
+    def iter_rows(self) -> Iterator[dict]:
+        """Все строки в порядке ID снимка без поиска каждой строки по ID."""
+        skip, overlay = self._deleted, self._overlay
+        if self._table is not None:
+            make = self._table.row_type
+            columns = [self._table.column_values(name) for name in self._table.types]
+            for record_id, values in zip(self._ids, zip(*columns)):
+                row = overlay.get(record_id)
+                if row is not None:
+                    yield row
+                elif record_id not in skip:
+                    yield make(*values)
+        for record_id in self._new_ids:
+            yield overlay[record_id]
+
+    def clear(self) -> None:
+        self.close()
+        self._overlay.clear()
+        self._new_ids.clear()
+        self._deleted.clear()
+
+    def column_items(self, column: str) -> Iterator[Tuple[int, Any]]:
+        """Пары (ID, значение столбца) без материализации строк снимка."""
+        if self._table is not None:
+            skip = self._deleted
+            values = self._table.column(column)
+            for record_id, value in zip(self._ids, values):
+                if record_id not in skip and record_id not in self._overlay:
+                    yield record_id, value
+        for record_id, row in self._overlay.items():
+            yield record_id, row.get(column)
+
+    def id_range(
+        self,
+        low: Any = None,
+        high: Any = None,
+        include_low: bool = True,
+        include_high: bool = True,
+    ) -> List[int]:
+        """ID из диапазона: бинарный поиск по столбцу ID снимка и новые ID."""
+        ids = self._ids
+        start, stop = 0, len(ids)
+        if low is not None:
+            start = (bisect_left if include_low else bisect_right)(ids, low)
+        if high is not None:
+            stop = (bisect_right if include_high else bisect_left)(ids, high)
+        deleted = self._deleted
+        bounds = (low, high, include_low, include_high)
+        result = [
+            record_id for record_id in ids[start:stop] if record_id not in deleted
+        ]
+        result += [
+            record_id for record_id in self._new_ids if in_range(record_id, *bounds)
+        ]
+        return result
+
+    def _prefilter(self, expr: Expr) -> Optional[List[int]]:
+        """Позиции снимка по первому равенству условия или None."""
+        for column, expected in equalities(expr).items():
+            if column == "ID":
+                pos = self._position(expected)
+                return [] if pos is None else [pos]
+            values = self._table.column(column)
+            if hasattr(values, "find_equal"):
+                if not isinstance(expected, str):
+                    return []
+                return values.find_equal(expected)
+            return [i for i, value in enumerate(values) if value == expected]
+        return None
+
+    @property
+    def snapshot_size(self) -> int:
+        return len(self._ids)
+
+    def match_positions(
+        self, expr: Expr, start: int = 0, stop: Optional[int] = None
+    ) -> List[int]:
+        """Позиции снимка из [start, stop), подходящие под связанное условие."""
+        if self._table is None:
+            return []
+        stop = len(self._ids) if stop is None else stop
+        names = fields(expr)
+        positions = self._prefilter(expr)
+        if positions is not None:
+            columns = {name: self._table.column_values(name) for name in names}
+            check = compile_positional(expr, columns)
+            if start or stop < len(self._ids):
+                positions = [pos for pos in positions if start <= pos < stop]
+            found = [pos for pos in positions if check(pos)]
+        else:
+            found = []
+            for base, low, high, columns in self._table.segments(names, start, stop):
+                check = compile_positional(expr, columns)
+                found += [base + i for i in range(low, high) if check(i)]
+
+        ids, skip, overlay = self._ids, self._deleted, self._overlay
+        if not skip and not overlay:
+            return found
+        return [
+            pos for pos in found if ids[pos] not in skip and ids[pos] not in overlay
+        ]
+
+    def iter_filter(self, expr: Expr) -> Iterator[dict]:
+        """Как filter(), но лениво: строки создаются по одной в порядке ID."""
+        matches = compile_predicate(expr, self.row_type)
+        overlay = self._overlay
+        if self._table is not None:
+            skip = self._deleted
+            names = [*fields(expr), "ID"]
+            for base, low, high, columns in self._table.segments(names):
+                check = compile_positional(expr, columns)
+                ids = columns["ID"]
+                for i in range(low, high):
+                    record_id = ids[i]
+                    row = overlay.get(record_id)
+                    if row is not None:
+                        if matches(row):
+                            yield row
+                    elif record_id not in skip and check(i):
+                        yield self._table.row(base + i)
+        for record_id in self._new_ids:
+            row = overlay[record_id]
+            if matches(row):
+                yield row
+
+    def filter(
+        self, expr: Expr, positions: Optional[List[int]] = None
+    ) -> List[dict]:
+        """Строки, удовлетворяющие связанному (bind) условию, в порядке ID.
+
+        positions - уже найденные match_positions() позиции снимка
+        (например, параллельным просмотром).
+        """
+        if positions is None:
+            positions = self.match_positions(expr)
+        result = self._table.rows(positions)
+
+        matches = compile_predicate(expr, self.row_type)
+        result += [row for row in self._overlay.values() if matches(row)]
+        result.sort(key=column_getter("ID", self.row_type))
+        return result
+
+    def close(self) -> None:
+        if self._table is not None:
+            self._ids = []
+            self._table.close()
+            self._table = None
+
+
+class _MappedValues(ValuesView):
+    def __iter__(self) -> Iterator[dict]:
+        return self._mapping.iter_rows()
+
+
+def open_snapshot(table_name: str, meta: Optional[dict] = None) -> MutableMapping:
+    """Открывает снимок: через mmap, если формат это умеет, иначе целиком."""
+    fmt = table_format(meta)
+    if hasattr(fmt, "open_mapped"):
+        try:
+            return MappedRows(fmt.open_mapped(snapshot_path(table_name, meta)))
+        except FileNotFoundError:
+            return MappedRows(None, table_row_type(meta))
+    return _by_id(read_snapshot(table_name, meta), meta)
+
+
+def _by_id(snapshot: List[dict], meta: Optional[dict]) -> Dict[int, dict]:
+    record_id = column_getter("ID", table_row_type(meta))
+    return {record_id(row): row for row in snapshot}
+
+
+def load_rows(table_name: str, meta: Optional[dict] = None) -> Dict[int, dict]:
+    """Восстанавливает таблицу: снимок плюс воспроизведение журнала."""
+    rows = _by_id(read_snapshot(table_name, meta), meta)
+    kind = table_row_type(meta)
+    for record in read_log(table_name):
+        apply_record(rows, record, kind)
+    return rows
+
+
+def write_snapshot(
+    table_name: str,
+    data: List[dict],
+    meta: Optional[dict] = None,
+    keep_log: bool = False,
+) -> None:
+    """Атомарно записывает снимок таблицы и очищает журнал."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    filepath = snapshot_path(table_name, meta)
+    tmp_path = f"{filepath}.tmp"
+
+    table_format(meta).write(
+        tmp_path, data, table_schema(meta), table_compression(meta)
+    )
+    replace_file(tmp_path, filepath)
+
+    if not keep_log:
+        remove_file(log_path(table_name))
+
+
+def snapshot_sizes(table_name: str, meta: Optional[dict] = None) -> Tuple[int, int]:
+    """(размер на диске, размер без сжатия) снимка таблицы в байтах."""
+    try:
+        return table_format(meta).sizes(snapshot_path(table_name, meta))
+    except FileNotFoundError:
+        return 0, 0
+
+
+def compact(table_name: str, meta: Optional[dict] = None) -> None:
+    rows = load_rows(table_name, meta)
+    write_snapshot(table_name, list(rows.values()), meta)
+
+
+def needs_compaction(table_name: str, meta: Optional[dict] = None) -> bool:
+    """Журнал сжимается, когда перерастает снимок: амортизированно O(1)."""
+    log_size = _file_size(log_path(table_name))
+    snapshot_size = _file_size(snapshot_path(table_name, meta))
+    return log_size > max(LOG_COMPACT_MIN_BYTES, snapshot_size)
+
+
+def encode_records(records: Iterable[dict]) -> List[str]:
+    return [_encoder.encode(record) + '\n' for record in records]
+
+
+def append_lines(table_name: str, lines: List[str]) -> None:
+    """Дописывает готовые строки в журнал таблицы и дожидается fsync."""
+    if not lines:
+        return
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with open(log_path(table_name), 'a', encoding='utf-8') as f:
+        f.write(''.join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def append_records(
+    table_name: str,
+    records: Iterable[dict],
+    meta: Optional[dict] = None,
+    auto_compact: bool = True,
+) -> None:
+    """Дописывает записи в журнал таблицы одной операцией записи."""
+    lines = encode_records(records)
+    if not lines:
+        return
+
+    append_lines(table_name, lines)
+
+    if auto_compact and needs_compaction(table_name, meta):
+        compact(table_name, meta)
+
+
+def write_journal(
+    filepath: str,
+    header: dict,
+    tables: Dict[str, List[str]],
+) -> None:
+    """Атомарно записывает журнал транзакции: заголовок и строки журналов таблиц.
+
+    Первая строка - JSON-заголовок со списком таблиц и числом их строк,
+    далее строки журналов таблиц подряд в уже закодированном виде.
+    """
+    counts = [[name, len(lines)] for name, lines in tables.items()]
+    header = {**header, "tables": counts}
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(_encoder.encode(header) + '\n')
+        for lines in tables.values():
+            f.write(''.join(lines))
+    replace_file(tmp_path, filepath)
+
+
+def read_journal(filepath: str) -> Optional[Tuple[dict, Dict[str, List[str]]]]:
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            tables = {
+                name: [f.readline() for _ in range(count)]
+                for name, count in header.pop("tables")
+            }
+    except FileNotFoundError:
+        return None
+    return header, tables
+
+
+def remove_file(filepath: str) -> None:
+    if os.path.exists(filepath):
+        os.remove(filepath)
+        fsync_dir(os.path.dirname(filepath))
+
+
+def convert(table_name: str, old_meta: dict, new_meta: dict) -> None:
+    """Пишет снимок таблицы в формате из new_meta рядом со старым.
+
+    Старый снимок и журнал остаются, пока метаданные не сохранены:
+    после сбоя таблица читается в прежнем формате, а повтор журнала
+    поверх нового снимка ничего не меняет. Убирает их finish_convert().
+    """
+    rows = load_rows(table_name, old_meta)
+    write_snapshot(table_name, list(rows.values()), new_meta, keep_log=True)
+
+
+def finish_convert(table_name: str, old_meta: dict, new_meta: dict) -> None:
+    old_path = snapshot_path(table_name, old_meta)
+    if old_path != snapshot_path(table_name, new_meta):
+        remove_file(old_path)
+    remove_file(log_path(table_name))
+
+
+def drop(table_name: str) -> None:
+    paths = [
+        os.path.join(DATA_DIR, f"{table_name}{fmt.extension}")
+        for fmt in FORMATS.values()
+    ]
+    paths += [log_path(table_name), index_path(table_name)]
+    for filepath in paths:
+        if os.path.exists(filepath):
+            os.remove(filepath)
@@ -0,0 +1,95 @@
+# src/primitive_db/transfer.py
+
+import csv
+import json
+import os
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, TextIO, Tuple
+
+
+def file_kind(filepath: str) -> str:
+    """Формат файла обмена по расширению: csv или jsonl."""
+    extension = os.path.splitext(filepath)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    raise ValueError(
+        f"Неподдерживаемый формат файла '{filepath}': ожидается .csv или .jsonl"
+    )
+
+
+def read_rows(filepath: str) -> Iterator[Tuple[int, dict]]:
+    """Потоково читает файл, выдавая пары (номер строки, запись)."""
+    kind = file_kind(filepath)
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        if kind == 'csv':
+            reader = csv.reader(f)
+            header = next(reader, [])
+            for values in reader:
+                yield reader.line_num, dict(zip(header, values))
+            return
+
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Строка {line_no}: некорректный JSON ({e.msg})")
+            if not isinstance(row, dict):
+                raise ValueError(f"Строка {line_no}: ожидается JSON-объект")
+            yield line_no, row
+
+
+def batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def write_stream(
+    f: TextIO,
+    kind: str,
+    columns: List[str],
+    rows: Iterable[dict],
+    batch_size: int,
+) -> int:
+    """Пишет записи в открытый поток как csv/jsonl пачками по batch_size."""
+    count = 0
+    if kind == 'csv':
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for batch in batches(rows, batch_size):
+            writer.writerows([row[name] for name in columns] for row in batch)
+            f.flush()
+            count += len(batch)
+    else:
+        for batch in batches(rows, batch_size):
+            f.write(''.join(
+                json.dumps(
+                    {name: row[name] for name in columns}, ensure_ascii=False
+                ) + '\n'
+                for row in batch
+            ))
+            f.flush()
+            count += len(batch)
+    return count
+
+
+def write_rows(
+    filepath: str,
+    columns: List[str],
+    rows: Iterable[dict],
+    batch_size: int,
+) -> int:
+    """Потоково пишет записи в csv/jsonl, сбрасывая буфер пачками."""
+    kind = file_kind(filepath)
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        count = write_stream(f, kind, columns, rows, batch_size)
+    os.replace(tmp_path, filepath)
+    return count
@@ -2,8 +2,16 @@
 
 import json
 import os
+from contextlib import contextmanager
+from typing import Iterator, List
 
-from .constants import DATA_DIR
+from . import storage
+from .constants import DATA_DIR, DB_META_FILE
+
+try:
+    import fcntl
+except ImportError:  # Windows: рекомендательные блокировки недоступны
+    fcntl = None
 
 
 def ensure_data_dir():
@@ -12,7 +20,7 @@ def ensure_data_dir():
 
 def get_table_filepath(table_name: str) -> str:
     ensure_data_dir()
-    return os.path.join(DATA_DIR, f"{table_name}.json")
+    return storage.snapshot_path(table_name, get_table_meta(table_name))
 
 
 def load_metadata(filepath: str) -> dict:
@@ -21,31 +29,80 @@ def load_metadata(filepath: str) -> dict:
             return json.load(f)
     except FileNotFoundError:
         return {}
-    except json.JSONDecodeError:
-        return {}
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Файл метаданных {filepath} поврежден: {e}")
 
 
 def save_metadata(filepath: str, data: dict) -> None:
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    """Пишет метаданные во временный файл и атомарно подменяет им старый."""
+    dirname = os.path.dirname(filepath)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
     
-    with open(filepath, 'w', encoding='utf-8') as f:
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+    storage.replace_file(tmp_path, filepath)
+
+
+def get_table_meta(table_name: str) -> dict:
+    return load_metadata(DB_META_FILE).get(table_name, {})
 
 
 def load_table_data(table_name: str) -> list:
-    filepath = get_table_filepath(table_name)
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
-    except json.JSONDecodeError:
-        return []
+    meta = get_table_meta(table_name)
+    return list(storage.load_rows(table_name, meta).values())
 
 
 def save_table_data(table_name: str, data: list) -> None:
-    filepath = get_table_filepath(table_name)
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
\ No newline at end of file
+    ensure_data_dir()
+    storage.write_snapshot(table_name, data, get_table_meta(table_name))
+
+
+class FileLock:
+    """Повторно входимая рекомендательная блокировка fcntl.flock на файле.
+
+    Вложенные захваты в одном процессе используют один дескриптор:
+    эксклюзивный захват внутри разделяемого повышает блокировку,
+    а при выходе из него она возвращается к прежнему режиму.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._file = None
+        self._modes: List[bool] = []
+
+    @property
+    def held(self) -> bool:
+        return bool(self._modes)
+
+    def _flock(self, exclusive: bool) -> None:
+        if fcntl is not None:
+            operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            fcntl.flock(self._file.fileno(), operation)
+
+    def acquire(self, shared: bool = False) -> None:
+        exclusive = not shared or (self.held and self._modes[-1])
+        if self._file is None:
+            self._file = open(self.filepath, 'a')
+        if not self.held or exclusive != self._modes[-1]:
+            self._flock(exclusive)
+        self._modes.append(exclusive)
+
+    def release(self) -> None:
+        exclusive = self._modes.pop()
+        if not self._modes:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        elif self._modes[-1] != exclusive:
+            self._flock(self._modes[-1])
+
+    @contextmanager
+    def hold(self, shared: bool = False) -> Iterator[None]:
+        self.acquire(shared)
+        try:
+            yield
+        finally:
+            self.release()
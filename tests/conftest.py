@@ -0,0 +1,31 @@
+# tests/conftest.py
+
+import pytest
+
+from src.primitive_db import api, commands, core
+from src.primitive_db.database import Database as Session
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    """Сессия БД в пустом временном каталоге вместо общей core.db."""
+    monkeypatch.chdir(tmp_path)
+    db = Session()
+    monkeypatch.setattr(core, "db", db)
+    monkeypatch.setattr(api, "db", db)
+    core.select_cacher.invalidate()
+    core._table_versions.clear()
+    commands.prepared.clear()
+    commands.statement_cache.invalidate()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def database(session):
+    return api.Database(session)
+
+
+def reopen() -> api.Database:
+    """Новая сессия, как в другом процессе: все читается с диска."""
+    return api.Database(Session())
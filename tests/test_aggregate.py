@@ -0,0 +1,96 @@
+# tests/test_aggregate.py
+
+import re
+
+import pytest
+
+from src.primitive_db import aggregate, commands, core
+from src.primitive_db.aggregate import Aggregate, parse_select_item
+
+ROWS = [("a", 1, "true"), ("b", 5, "false"), ("a", 3, "true"), ("c", -2, "true")]
+
+
+def run(command: str) -> list:
+    result = commands.execute(command)
+    assert result["ok"], result["message"]
+    return result.get("rows")
+
+
+@pytest.fixture
+def table(session):
+    run("create_table t g:str n:int b:bool")
+    for g, n, b in ROWS:
+        run(f"insert t {g} {n} {b}")
+
+
+def test_whole_table_aggregates(table):
+    assert run("select count(*), sum(n), avg(n), min(n), max(g) from t") == [
+        {"count(*)": 4, "sum(n)": 7, "avg(n)": 1.75, "min(n)": -2, "max(g)": "c"}
+    ]
+    assert run("select sum(b), count(n) from t where n > 0") == [
+        {"sum(b)": 2, "count(n)": 3}
+    ]
+
+
+def test_empty_input_gives_count_zero_and_no_values(table):
+    assert run("select count(*), sum(n), avg(n), min(n) from t where n > 100") == [
+        {"count(*)": 0, "sum(n)": None, "avg(n)": None, "min(n)": None}
+    ]
+
+
+def test_group_by_with_order_and_limit(table):
+    assert run("select g, count(*), sum(n) from t group by g") == [
+        {"g": "a", "count(*)": 2, "sum(n)": 4},
+        {"g": "b", "count(*)": 1, "sum(n)": 5},
+        {"g": "c", "count(*)": 1, "sum(n)": -2},
+    ]
+    assert run(
+        "select g, sum(n) from t where n > 0 group by g order by sum(n) desc limit 1"
+    ) == [{"g": "b", "sum(n)": 5}]
+
+
+@pytest.mark.parametrize("kind", ["hash", "sorted"])
+def test_index_answers_match_full_scan(table, monkeypatch, kind):
+    queries = [
+        "select g, count(*) from t group by g",
+        "select count(*), min(g), max(g) from t",
+    ]
+    expected = [run(query) for query in queries]
+    assert core.create_index("t", "g", kind)[0]
+    scanned = []
+    hash_aggregate = aggregate.hash_aggregate
+    monkeypatch.setattr(
+        core, "hash_aggregate", lambda *args: scanned.append(1) or hash_aggregate(*args)
+    )
+
+    assert [run(query) for query in queries] == expected
+    assert len(scanned) == (0 if kind == "sorted" else 1)
+
+
+@pytest.mark.parametrize(
+    "command, message",
+    [
+        ("select g, count(*) from t", "должен быть в GROUP BY"),
+        ("select sum(g) from t", "применима только к столбцам int и bool"),
+        ("select count(*) from t group by x", "GROUP BY 'x' не существует"),
+        ("select max(x) from t", "'x' не существует"),
+    ],
+)
+def test_invalid_aggregates_are_rejected(table, command, message):
+    result = commands.execute(command)
+
+    assert not result["ok"]
+    assert message in result["message"]
+
+
+def test_parse_select_item():
+    assert parse_select_item("COUNT(*)") == Aggregate("count", None)
+    assert parse_select_item("avg( n )") == Aggregate("avg", "n")
+    assert parse_select_item("n") == "n"
+    for text, message in [
+        ("median(n)", "Неизвестная функция"),
+        ("sum(*)", "только в count(*)"),
+        ("a b", "Некорректный элемент"),
+    ]:
+        with pytest.raises(ValueError, match=re.escape(message)):
+            parse_select_item(text)
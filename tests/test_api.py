@@ -0,0 +1,90 @@
+# tests/test_api.py
+
+import pytest
+from conftest import reopen
+
+from src.primitive_db.api import DatabaseError, TableNotFoundError, ValidationError
+
+
+@pytest.fixture
+def users(database):
+    users = database.create_table("users", ["name:str", "age:int", "admin:bool"])
+    users.insert_many([
+        {"name": "Bob", "age": 30, "admin": True},
+        ("Ann", "25", "false"),
+        {"name": "Eve", "age": 17, "admin": False},
+    ])
+    return users
+
+
+def test_insert_accepts_mappings_and_sequences(users):
+    assert list(reopen()["users"]) == [
+        {"ID": 1, "name": "Bob", "age": 30, "admin": True},
+        {"ID": 2, "name": "Ann", "age": 25, "admin": False},
+        {"ID": 3, "name": "Eve", "age": 17, "admin": False},
+    ]
+    assert users.get(2)["name"] == "Ann"
+    assert users.get(99) is None
+    assert users.insert_many([]) == []
+
+
+@pytest.mark.parametrize("rows", [
+    [("A", 1, True), {"name": "B", "age": "x", "admin": True}],
+    [("A", 1, True), {"name": "B", "height": 2}],
+    [("A", 1, True), ("B", 2)],
+    [("A", 1, True), {"name": "B", "age": 2}],
+])
+def test_invalid_batch_inserts_nothing(users, rows):
+    with pytest.raises(ValidationError):
+        users.insert_many(rows)
+
+    assert len(reopen()["users"]) == 3
+    assert users.insert(("C", 1, False)) == 4
+
+
+def test_update_and_delete_return_counts(users):
+    assert users.update_where({"admin": False}, "admin != true") == 2
+    assert users.update_where({"age": 18}, {"name": "Eve"}) == 1
+    assert users.update_many({1: {"age": 31}, 99: {"age": 1}}) == 1
+    assert users.update_many([(2, {"name": "Anna"})]) == 1
+    assert users.delete_where("age < 20") == 1
+
+    assert list(reopen()["users"].scan(columns=["name", "age"])) == [
+        {"name": "Bob", "age": 31},
+        {"name": "Anna", "age": 25},
+    ]
+    assert users.count("admin = false") == 1
+    assert users.count() == 2
+
+
+def test_clear_and_drop_table(database, users):
+    users.clear()
+    assert len(users) == 0
+    assert users.insert(("New", 1, True)) == 4
+
+    database.drop_table("users")
+    assert database.tables() == []
+    with pytest.raises(TableNotFoundError):
+        users.insert(("Gone", 1, True))
+
+
+def test_errors_are_exceptions(database, users):
+    with pytest.raises(TableNotFoundError) as error:
+        database["missing"]
+    assert isinstance(error.value, KeyError)
+    assert str(error.value) == "Таблица 'missing' не существует"
+    with pytest.raises(DatabaseError, match="уже существует"):
+        database.create_table("users", {"x": "int"})
+    with pytest.raises(ValidationError, match="Некорректное определение"):
+        database.create_table("bad", ["x:float"])
+
+    for call in [
+        lambda: users.delete_where(None),
+        lambda: users.update_where({"ID": 5}),
+        lambda: users.update_where({"age": "old"}),
+        lambda: users.scan("height > 1"),
+        lambda: users.scan(order_by="height"),
+        lambda: users.scan(limit=-1),
+    ]:
+        with pytest.raises(ValidationError):
+            call()
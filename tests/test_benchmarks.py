@@ -0,0 +1,54 @@
+# tests/test_benchmarks.py
+
+import json
+
+import pytest
+
+from benchmarks import run
+from benchmarks.data import generate_rows, parse_schema
+
+
+def results(**p50_by_name) -> dict:
+    return {"results": {"1000": {
+        name: {"p50_ms": p50} for name, p50 in p50_by_name.items()
+    }}}
+
+
+def test_compare_reports_only_slowdowns_over_threshold():
+    baseline = results(insert=1.0, select=2.0, scan=0.0)
+    current = results(insert=1.2, select=3.0, scan=5.0, new=9.0)
+
+    regressions = run.compare(current, baseline, 0.25)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("1000 select: p50 2.000 -> 3.000")
+    assert "+50%" in regressions[0]
+    assert run.compare(current, baseline, 0.6) == []
+
+
+def test_generated_rows_are_reproducible():
+    schema = parse_schema(["name:str", "age:int", "ok:bool"])
+    first = list(generate_rows(schema, 20, 100, seed=3))
+
+    assert first == list(generate_rows(schema, 20, 100, seed=3))
+    assert first != list(generate_rows(schema, 20, 100, seed=4))
+    assert all(0 <= row["age"] < 100 for row in first)
+    with pytest.raises(ValueError):
+        parse_schema(["age:float"])
+
+
+def test_main_saves_baseline_and_detects_regression(session, tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    argv = ["--sizes", "50", "--ops", "3", "--baseline", str(baseline)]
+
+    assert run.main([*argv, "--save-baseline"]) == 0
+    saved = json.loads(baseline.read_text(encoding="utf-8"))
+    assert saved["meta"]["ops"] == 3
+    assert set(saved["results"]) == {"50"}
+
+    # База с почти нулевыми задержками: любой замер - регрессия
+    for summary in saved["results"]["50"].values():
+        summary["p50_ms"] = 1e-9
+    baseline.write_text(json.dumps(saved), encoding="utf-8")
+    assert run.main(argv) == 1
+    assert "Регрессии" in capsys.readouterr().out
@@ -0,0 +1,83 @@
+# tests/test_cache.py
+
+from conftest import reopen
+
+from src.decorators import create_cacher
+from src.primitive_db import commands, core
+
+
+def test_cacher_is_lru_bounded_by_entries():
+    cache = create_cacher(max_entries=2)
+    calls = []
+
+    def value(key):
+        return lambda: calls.append(key) or key * 10
+
+    assert cache(1, value(1)) == 10
+    assert cache(2, value(2)) == 20
+    assert cache(1, value(1)) == 10
+    cache(3, value(3))
+    assert cache(1, value(1)) == 10
+    assert cache(2, value(2)) == 20
+
+    assert calls == [1, 2, 3, 2]
+    assert cache.stats()["evictions"] == 2
+    assert cache.stats()["entries"] == 2
+
+
+def test_cacher_is_bounded_by_size():
+    cache = create_cacher(max_entries=10, max_size=5, size_of=len)
+
+    cache("a", lambda: [1, 2, 3])
+    cache("b", lambda: [1, 2])
+    cache("big", lambda: list(range(6)))
+    assert cache.stats() == {
+        "hits": 0, "misses": 3, "evictions": 0, "size": 5, "entries": 2
+    }
+    cache("c", lambda: [1])
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["size"] == 3
+
+
+def test_cacher_invalidate_by_predicate():
+    cache = create_cacher()
+    for key in [("t", 1), ("t", 2), ("u", 1)]:
+        cache(key, lambda: 0)
+
+    cache.invalidate(lambda key: key[0] == "t")
+
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["size"] == 1
+
+
+def select(where: str = "") -> list:
+    result = commands.execute(f"select * from t {where}".strip())
+    assert result["ok"], result["message"]
+    return [row["v"] for row in result["rows"]]
+
+
+def test_select_cache_hits_and_invalidation(session):
+    commands.execute("create_table t v:int")
+    commands.execute("insert t 1")
+
+    assert select("where v > 0") == [1]
+    hits = core.select_cacher.stats()["hits"]
+    assert select("where v > 0") == [1]
+    assert core.select_cacher.stats()["hits"] == hits + 1
+
+    commands.execute("insert t 2")
+    assert select("where v > 0") == [1, 2]
+    commands.execute("update t set v = 5 where v = 1")
+    assert select("where v > 0") == [5, 2]
+
+
+def test_select_cache_sees_writes_of_other_sessions(session):
+    commands.execute("create_table t v:int")
+    commands.execute("insert t 1")
+    assert select() == [1]
+
+    other = reopen()
+    other["t"].insert([2])
+    other.close()
+
+    assert select() == [1, 2]
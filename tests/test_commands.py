@@ -0,0 +1,113 @@
+# tests/test_commands.py
+
+import pytest
+
+from src.primitive_db import commands
+
+
+def run(command: str) -> dict:
+    result = commands.execute(command)
+    assert result["ok"], result["message"]
+    return result
+
+
+def names(command: str) -> list:
+    return [row["name"] for row in run(command)["rows"]]
+
+
+@pytest.fixture
+def table(session):
+    run("create_table t name:str n:int")
+
+
+def test_quoted_question_mark_is_insert_value(table):
+    run('insert t "?" 1')
+
+    assert names("select * from t") == ["?"]
+
+
+def test_bare_question_mark_outside_prepare_is_value(table):
+    run("insert t ? 1")
+
+    assert names("select * from t where name = ?") == ["?"]
+
+
+def test_quoted_question_mark_in_set_and_where(table):
+    run("insert t a 1")
+    run('update t set name = "?" where n = 1')
+
+    assert names('select * from t where name = "?"') == ["?"]
+
+
+def test_prepared_insert_counts_bare_placeholders(table):
+    result = run("prepare p as insert t ? ?")
+    assert "параметров: 2" in result["message"]
+
+    run('execute p ("x", 3)')
+    assert names("select * from t") == ["x"]
+
+
+def test_quoted_question_mark_in_prepared_template_is_literal(table):
+    run("insert t x 1")
+    run('prepare q as update t set name = "?", n = ? where name = ?')
+    assert commands.prepared["q"][1][False].params == 2
+
+    run('execute q (7, "x")')
+    rows = run("select * from t")["rows"]
+    assert [(row["name"], row["n"]) for row in rows] == [("?", 7)]
+
+
+def test_prepared_where_mixes_literal_and_parameter(table):
+    run('insert t "?" 1')
+    run('insert t "?" 2')
+    run('prepare r as select * from t where name = "?" and n = ?')
+
+    rows = run("execute r (2)")["rows"]
+    assert [row["n"] for row in rows] == [2]
+
+
+@pytest.fixture
+def typed(session):
+    run("create_table t name:str flag:bool n:int")
+    run("insert t a true 1")
+
+
+def row(command: str = "select * from t") -> dict:
+    return dict(run(command)["rows"][0])
+
+
+def test_set_number_into_str_column_is_stored_as_str(typed):
+    run("update t set name = 123 where n = 1")
+
+    assert row()["name"] == "123"
+
+
+@pytest.mark.parametrize("assignment", ["flag = 5", "n = true", "n = abc"])
+def test_set_value_of_wrong_type_is_rejected(typed, assignment):
+    result = commands.execute(f"update t set {assignment} where n = 1")
+
+    assert not result["ok"]
+    assert row() == {"ID": 1, "name": "a", "flag": True, "n": 1}
+
+
+def test_set_values_are_parsed_like_insert(typed):
+    run('update t set flag = 0, n = "7" where n = 1')
+
+    assert row() == {"ID": 1, "name": "a", "flag": False, "n": 7}
+
+
+def test_rows_stay_encodable_after_update(typed):
+    run("update t set name = 123 where n = 1")
+    run("convert_table t columnar")
+
+    assert row()["name"] == "123"
+
+
+def test_update_cannot_change_id(table):
+    run("insert t Bob 1")
+    result = commands.execute("update t set ID = 10 where name = Bob")
+
+    assert not result["ok"]
+    assert "ID" in result["message"]
+    assert names("select * from t where ID = 1") == ["Bob"]
+    assert names("select * from t where ID = 10") == []
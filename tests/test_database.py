@@ -0,0 +1,78 @@
+# tests/test_database.py
+
+from conftest import reopen
+
+from src.primitive_db import index
+from src.primitive_db.database import Database as Session
+
+
+def count_loads(monkeypatch) -> list:
+    loads = []
+    load_table = index.load_table
+
+    def counting(table_name, meta=None):
+        loads.append(table_name)
+        return load_table(table_name, meta)
+
+    monkeypatch.setattr(index, "load_table", counting)
+    return loads
+
+
+def test_table_stays_resident_between_commands(database, session, monkeypatch):
+    table = database.create_table("t", {"v": "int"})
+    loads = count_loads(monkeypatch)
+
+    for v in range(5):
+        table.insert([v])
+        assert table.count() == v + 1
+
+    assert loads == []
+    assert session.table("t") is session.table("t")
+
+
+def test_external_change_is_reloaded(database, session, monkeypatch):
+    table = database.create_table("t", {"v": "int"})
+    table.insert([1])
+    state = session.table("t")
+
+    other = reopen()
+    other["t"].insert([2])
+    other.close()
+    loads = count_loads(monkeypatch)
+
+    assert [row["v"] for row in table.scan(order_by="ID")] == [1, 2]
+    assert loads == ["t"]
+    assert session.table("t").generation > state.generation
+
+
+def test_metadata_is_cached_until_file_changes(database, session):
+    database.create_table("t", {"v": "int"})
+    metadata = session.metadata()
+    assert session.metadata() is metadata
+
+    other = Session()
+    other.metadata()["u"] = {"columns": ["ID:int"], "next_id": 1}
+    other.save_metadata()
+    other.close()
+
+    assert "u" in session.metadata()
+
+
+
+def test_ids_come_from_persisted_sequence(database):
+    table = database.create_table("t", {"v": "int"})
+    assert table.insert_many([{"v": 1}, {"v": 2}, {"v": 3}]) == [1, 2, 3]
+    table.delete_where("ID = 3")
+
+    reopened = reopen()["t"]
+    assert reopened.insert([4]) == 4
+    assert reopened.insert_many([{"v": 5}]) == [5]
+
+
+def test_sequence_is_derived_for_tables_without_counter(database, session):
+    table = database.create_table("t", {"v": "int"})
+    table.insert_many([{"v": 1}, {"v": 2}])
+    del session.metadata()["t"]["next_id"]
+    session.save_metadata()
+
+    assert reopen()["t"].insert([3]) == 3
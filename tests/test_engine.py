@@ -0,0 +1,88 @@
+# tests/test_engine.py
+
+import pytest
+
+from src.primitive_db import commands, engine
+
+
+@pytest.fixture
+def table(database):
+    table = database.create_table("t", {"n": "int"})
+    table.insert_many([{"n": i} for i in range(10)])
+    return table
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setitem(engine.settings, "page_size", 3)
+    monkeypatch.setitem(engine.settings, "pager", False)
+    monkeypatch.setitem(engine.settings, "output", "table")
+    return engine.settings
+
+
+def test_streaming_select_yields_same_rows_lazily(table):
+    query = "select n from t where n > 2 order by n desc limit 4"
+    listed = commands.execute(query)
+    streamed = commands.execute(query, stream=True)
+
+    assert not isinstance(streamed["rows"], list)
+    assert list(streamed["rows"]) == listed["rows"]
+
+    rows = commands.execute("select * from t", stream=True)["rows"]
+    assert next(rows) == {"ID": 1, "n": 0}
+    assert len(list(rows)) == 9
+
+
+def test_streaming_select_errors_are_not_deferred(table):
+    result = commands.execute("select x from t", stream=True)
+
+    assert not result["ok"]
+    assert list(result["rows"]) == []
+
+
+def test_render_rows_prints_pages(table, settings, capsys):
+    count = engine.render_rows(table.scan(order_by="ID"))
+
+    assert count == 10
+    assert capsys.readouterr().out.count("| ID | n |") == 4
+
+
+def test_pager_stops_when_asked(table, settings, monkeypatch, capsys):
+    settings["pager"] = True
+    answers = iter([True, False])
+    monkeypatch.setattr(engine, "ask_next_page", lambda: next(answers))
+    pulled = []
+    rows = (pulled.append(row) or row for row in table.scan(order_by="ID"))
+
+    assert engine.render_rows(rows) == 6
+    # Следующая страница набирается, но не выводится после отказа
+    assert len(pulled) == 9
+    assert capsys.readouterr().out.count("| ID | n |") == 2
+
+
+@pytest.mark.parametrize("output, expected", [
+    ("csv", "ID,n\r\n1,0\r\n2,1\r\n"),
+    ("jsonl", '{"ID": 1, "n": 0}\n{"ID": 2, "n": 1}\n'),
+])
+def test_render_rows_as_text_formats(table, settings, capsys, output, expected):
+    settings["output"] = output
+
+    assert engine.render_rows(table.scan(order_by="ID", limit=2)) == 2
+    assert capsys.readouterr().out == expected
+
+
+def test_render_empty_result(settings, capsys):
+    assert engine.render_rows(iter(())) == 0
+    assert capsys.readouterr().out == ""
+
+
+def test_repeated_unknown_command_gets_one_hint(session, monkeypatch, capsys):
+    answers = iter(["foo", "foo", "exit"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+
+    engine.run()
+
+    lines = [line for line in capsys.readouterr().out.splitlines() if "foo" in line]
+    assert len(lines) == 2
+    assert all(line.count("Введите 'help'") == 1 for line in lines)
+    assert commands.execute("foo") == commands.execute("foo")
@@ -0,0 +1,277 @@
+# tests/test_formats.py
+
+import json
+import os
+import zlib
+
+import pytest
+from conftest import reopen
+
+from src.primitive_db import core, formats, storage
+from src.primitive_db.formats import ColumnarFormat, JsonFormat, MappedTable
+
+SCHEMA = [("ID", "int"), ("n", "int"), ("g", "str"), ("s", "str"), ("b", "bool")]
+CODECS = ["none", *sorted(formats.CODECS)]
+
+
+def make_rows(count: int) -> list:
+    return [
+        {"ID": i, "n": i * 7 - 50, "g": f"g{i % 5}", "s": f"строка {i}", "b": not i % 3}
+        for i in range(1, count + 1)
+    ]
+
+
+def rows_of(table) -> list:
+    return list(table.scan(order_by="ID"))
+
+
+def create(database, rows: list):
+    table = database.create_table("t", dict(SCHEMA[1:]))
+    table.insert_many([{k: v for k, v in row.items() if k != "ID"} for row in rows])
+    return table
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(formats, "COMPRESSION_GROUP_ROWS", 100)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+@pytest.mark.parametrize("fmt", ["json", "columnar"])
+@pytest.mark.parametrize("count", [0, 1, 250])
+def test_snapshot_and_log_round_trip(database, small_blocks, fmt, codec, count):
+    rows = make_rows(count)
+    table = create(database, rows)
+    if fmt != "json":
+        assert core.convert_table("t", fmt)[0]
+    if codec != "none":
+        assert core.compress_table("t", codec)[0]
+    assert rows_of(reopen()["t"]) == rows
+
+    # Изменения после снимка живут в журнале поверх него
+    table.insert({"n": 1, "g": "g1", "s": "новая", "b": True})
+    table.update_where({"s": "изменена"}, "ID = 1")
+    table.delete_where("ID = 2")
+    expected = rows + [{"ID": count + 1, "n": 1, "g": "g1", "s": "новая", "b": True}]
+    expected[0]["s"] = "изменена"
+    expected = [row for row in expected if row["ID"] != 2]
+
+    assert rows_of(reopen()["t"]) == expected
+    assert rows_of(table) == expected
+
+
+@pytest.mark.parametrize("codec", CODECS)
+@pytest.mark.parametrize("fmt", [JsonFormat(), ColumnarFormat()])
+def test_format_read_write(tmp_path, small_blocks, fmt, codec):
+    path = str(tmp_path / f"t{fmt.extension}")
+    rows = make_rows(333)
+    fmt.write(path, rows, SCHEMA, codec)
+
+    assert [dict(row) for row in fmt.read(path, SCHEMA)] == rows
+    disk, raw = fmt.sizes(path)
+    assert disk > 0
+    assert (raw > disk) if codec != "none" else (raw == disk)
+
+
+@pytest.fixture
+def mapped(tmp_path, small_blocks):
+    path = str(tmp_path / "t.col")
+    rows = make_rows(1000)
+    ColumnarFormat().write(path, rows, SCHEMA, "zlib")
+    table = MappedTable(ColumnarFormat(), path)
+    yield table, rows
+    table.close()
+
+
+def test_compressed_column_is_split_into_blocks(mapped):
+    table, rows = mapped
+    header = table._header
+
+    assert header["block_rows"] == 100
+    assert all(len(column["blocks"]) == 10 for column in header["columns"])
+
+
+def test_point_lookup_decompresses_one_block(mapped):
+    table, rows = mapped
+
+    assert dict(table.row(550)) == rows[550]
+    for name in table.types:
+        assert set(table.column(name)._parts) == {5}
+
+
+def test_mapped_rows_id_lookup_touches_few_blocks(mapped):
+    table, rows = mapped
+    mapped_rows = storage.MappedRows(table)
+
+    assert dict(mapped_rows[777]) == rows[776]
+    assert len(table.column("ID")._parts) <= 5
+    assert mapped_rows.id_range(95, 104) == list(range(95, 105))
+
+
+def test_block_columns_scan_and_search(mapped):
+    table, rows = mapped
+
+    assert list(table.column("n")) == [row["n"] for row in rows]
+    assert list(table.column("b")) == [row["b"] for row in rows]
+    assert table.column("g").find_equal("g3") == [
+        i for i, row in enumerate(rows) if row["g"] == "g3"
+    ]
+    assert table.column("s").find_equal("строка 421") == [420]
+    assert table.column("n")[-1] == rows[-1]["n"]
+    assert table.column("ID")[10:13] == [11, 12, 13]
+
+
+def test_where_on_compressed_columnar_table(database, small_blocks):
+    rows = make_rows(1000)
+    create(database, rows)
+    assert core.convert_table("t", "columnar")[0]
+    assert core.compress_table("t", "lzma")[0]
+    table = reopen()["t"]
+
+    for where, check in [
+        ("g = g2", lambda row: row["g"] == "g2"),
+        ("g in (g1, g4) and n > 3000", lambda row: row["g"] in ("g1", "g4")
+         and row["n"] > 3000),
+        ("b = true and s like '%7'", lambda row: row["b"] and row["s"].endswith("7")),
+        ("ID between 420 and 430", lambda row: 420 <= row["ID"] <= 430),
+    ]:
+        expected = [row for row in rows if check(row)]
+        assert list(table.scan(where, order_by="ID")) == expected
+        # Без ORDER BY и с LIMIT строки отбираются лениво (iter_filter)
+        assert list(table.scan(where, limit=3)) == expected[:3]
+
+
+def test_whole_column_compressed_snapshot_still_reads(tmp_path):
+    """Снимок версии 3: каждый столбец сжат одним блоком."""
+    rows = make_rows(50)
+    columns, blocks, offset = [], [], 0
+    for name, col_type in SCHEMA:
+        values = [row[name] for row in rows]
+        raw = formats.encode_column(col_type, values)
+        block = zlib.compress(raw)
+        columns.append({
+            "name": name, "type": col_type, "offset": offset,
+            "length": len(block), "raw_length": len(raw),
+        })
+        block += b"\0" * (-len(block) % 8)
+        blocks.append(block)
+        offset += len(block)
+    header = json.dumps({"rows": 50, "columns": columns, "codec": "zlib"}).encode()
+    header += b" " * (-(formats._HEADER.size + len(header)) % 8)
+    path = str(tmp_path / "t.col")
+    with open(path, "wb") as f:
+        f.write(formats._HEADER.pack(formats.COLUMNAR_MAGIC, 3, len(header)))
+        f.write(header)
+        f.write(b"".join(blocks))
+
+    assert [dict(row) for row in ColumnarFormat().read(path, SCHEMA)] == rows
+    table = MappedTable(ColumnarFormat(), path)
+    try:
+        assert dict(table.row(42)) == rows[42]
+        assert table.column("s").find_equal("строка 7") == [6]
+    finally:
+        table.close()
+
+
+@pytest.mark.parametrize("target", ["columnar", "json"])
+def test_convert_table_between_formats(session, database, target):
+    rows = make_rows(20)
+    create(database, rows)
+    if target == "json":
+        assert core.convert_table("t", "columnar")[0]
+    old_path = storage.snapshot_path("t", session.table_meta("t"))
+
+    assert core.convert_table("t", target)[0]
+
+    meta = session.table_meta("t")
+    assert meta.get("format", "json") == target
+    assert not os.path.exists(old_path)
+    assert os.path.exists(storage.snapshot_path("t", meta))
+    assert rows_of(reopen()["t"]) == rows
+
+
+def test_convert_table_rejects_unknown_and_same_format(database):
+    create(database, make_rows(1))
+
+    ok, message = core.convert_table("t", "parquet")
+    assert not ok
+    assert "parquet" in message
+    assert not core.convert_table("t", "json")[0]
+
+
+def test_columnar_file_header(tmp_path):
+    path = str(tmp_path / "t.col")
+    ColumnarFormat().write(path, make_rows(3), SCHEMA)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    header, body_start = ColumnarFormat().read_header(data)
+    assert data[:4] == formats.COLUMNAR_MAGIC
+    assert header["rows"] == 3
+    assert [column["name"] for column in header["columns"]] == [n for n, _ in SCHEMA]
+    assert body_start % 8 == 0
+    with pytest.raises(ValueError):
+        ColumnarFormat().read_header(b"XXXX" + data[4:])
+
+
+def test_build_dictionary_only_for_repeated_strings(monkeypatch):
+    assert formats.build_dictionary(["b", "a", "b", "a"]) == ["a", "b"]
+    assert formats.build_dictionary(["a", "b", "c"]) is None
+    assert formats.build_dictionary([]) == []
+    monkeypatch.setattr(formats, "DICT_MAX_VALUES", 2)
+    assert formats.build_dictionary(["a", "b", "c"] * 5) is None
+
+
+def test_json_snapshot_stores_codes(tmp_path):
+    path = tmp_path / "t.json"
+    rows = make_rows(20)
+    JsonFormat().write(str(path), rows, SCHEMA)
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["dictionaries"] == {"g": ["g0", "g1", "g2", "g3", "g4"]}
+    assert [row[2] for row in data["rows"][:6]] == [1, 2, 3, 4, 0, 1]
+    read = JsonFormat().read(str(path), SCHEMA)
+    assert [dict(row) for row in read] == rows
+    # Значения словаря общие для всех строк (пул класса строк)
+    assert read[0]["g"] is read[5]["g"]
+
+
+@pytest.mark.parametrize("codec", ["none", "zlib"])
+@pytest.mark.parametrize("distinct, typecode", [(5, "B"), (300, "H")])
+def test_columnar_dictionary_columns_compare_codes(
+    tmp_path, small_blocks, codec, distinct, typecode
+):
+    path = str(tmp_path / "t.col")
+    rows = make_rows(1000)
+    for row in rows:
+        row["g"] = f"g{row['ID'] % distinct}"
+    ColumnarFormat().write(path, rows, SCHEMA, codec)
+    table = MappedTable(ColumnarFormat(), path)
+    try:
+        column = table.column("g")
+        assert len(column.dictionary) == distinct
+        assert "dictionary" not in table._header["columns"][3]
+        assert column.code("g1") == column.dictionary.index("g1")
+        assert column.code("missing") == -1
+        assert column.codes[0] == column.code("g1")
+        assert column.find_equal("g2") == [
+            i for i, row in enumerate(rows) if row["g"] == "g2"
+        ]
+        if codec == "none":
+            assert column.codes.format == typecode
+    finally:
+        table.close()
+
+
+def test_where_on_dictionary_column_with_unknown_values(database):
+    rows = make_rows(100)
+    create(database, rows)
+    assert core.convert_table("t", "columnar")[0]
+    table = reopen()["t"]
+
+    assert list(table.scan("g = missing")) == []
+    assert table.count("g != missing") == 100
+    assert [row["ID"] for row in table.scan("g in (g1, missing) and ID < 12")] == [
+        1, 6, 11
+    ]
+    assert table.count("g not in (g0, g1)") == 60
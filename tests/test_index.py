@@ -0,0 +1,92 @@
+# tests/test_index.py
+
+import pytest
+from conftest import reopen
+
+from src.primitive_db import core, storage
+from src.primitive_db.index import HashIndex, SortedIndex, build_index, load_table
+
+
+def index_state(index) -> dict:
+    """Индекс как {значение: множество ID} для сравнения с перестроенным."""
+    result: dict = {}
+    for value, record_id in (
+        [(value, i) for value, ids in index.entries.items() for i in ids]
+        if isinstance(index, HashIndex)
+        else index.entries
+    ):
+        result.setdefault(value, set()).add(record_id)
+    return result
+
+
+@pytest.fixture
+def table(database):
+    table = database.create_table("t", {"v": "int", "g": "str"})
+    table.insert_many([{"v": i, "g": f"g{i % 3}"} for i in range(30)])
+    assert core.create_index("t", "g", "hash")[0]
+    assert core.create_index("t", "v", "sorted")[0]
+    return table
+
+
+def test_sorted_index_ranges():
+    index = SortedIndex("v")
+    for record_id, value in enumerate([5, 1, 3, 3, 9], start=1):
+        index.add(value, record_id)
+
+    assert index.lookup(3) == {3, 4}
+    assert index.range(3, 9, include_high=False) == {1, 3, 4}
+    assert index.range(low=3, include_low=False) == {1, 5}
+    assert index.count_range(high=3) == 3
+    index.remove(3, 3)
+    assert index.lookup(3) == {4}
+
+
+def test_indexes_follow_writes(session, table):
+    table.update_where({"g": "new"}, "v < 5")
+    table.delete_where("v >= 25")
+    table.insert({"v": 100, "g": "g1"})
+
+    state = session.table("t")
+    for column, index in state.indexes.items():
+        rebuilt = build_index(column, index.kind, state.rows)
+        assert index_state(index) == index_state(rebuilt)
+    assert state.indexes["g"].lookup("new") == {1, 2, 3, 4, 5}
+
+
+def test_indexes_survive_reopen_and_compaction(session, table, monkeypatch):
+    table.update_where({"g": "new"}, "v < 5")
+    meta = session.table_meta("t")
+    rows, indexes = load_table("t", meta)
+    assert set(indexes) == {"g", "v"}
+    assert indexes["g"].lookup("new") == {1, 2, 3, 4, 5}
+
+    monkeypatch.setattr(storage, "LOG_COMPACT_MIN_BYTES", 0)
+    table.insert({"v": 50, "g": "new"})
+    assert not storage.read_log("t")
+    rows, indexes = load_table("t", session.table_meta("t"))
+    assert indexes["g"].lookup("new") == {1, 2, 3, 4, 5, 31}
+    assert indexes["v"].range(low=30) == {31}
+
+
+@pytest.mark.parametrize(
+    "where, check",
+    [
+        ("g = g1", lambda row: row["g"] == "g1"),
+        ("v between 3 and 7", lambda row: 3 <= row["v"] <= 7),
+        ("v > 27 or g = g2", lambda row: row["v"] > 27 or row["g"] == "g2"),
+    ],
+)
+def test_index_lookups_match_full_scan(table, where, check):
+    table.update_where({"g": "g2"}, "v = 4")
+    reopened = reopen()["t"]
+    expected = [row for row in reopened.scan(order_by="ID") if check(row)]
+
+    assert expected
+    assert list(reopened.scan(where, order_by="ID")) == expected
+
+
+def test_unknown_index_kind_is_rejected(table):
+    ok, message = core.create_index("t", "v", "btree")
+
+    assert not ok
+    assert "btree" in message
@@ -0,0 +1,75 @@
+# tests/test_locking.py
+
+import fcntl
+import threading
+
+import pytest
+from conftest import reopen
+
+from src.primitive_db import core
+from src.primitive_db.utils import FileLock
+
+
+def can_lock(path: str, shared: bool) -> bool:
+    """Пробует захватить блокировку через отдельный дескриптор, не ожидая."""
+    with open(path, "a") as f:
+        operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        try:
+            fcntl.flock(f.fileno(), operation | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return True
+
+
+@pytest.fixture
+def lock(tmp_path):
+    return FileLock(str(tmp_path / "db.lock"))
+
+
+def test_nested_exclusive_upgrades_and_restores_shared(lock):
+    path = lock.filepath
+    with lock.hold(shared=True):
+        assert can_lock(path, shared=True)
+        assert not can_lock(path, shared=False)
+        with lock.hold():
+            assert not can_lock(path, shared=True)
+            # Разделяемый захват внутри эксклюзивного его не ослабляет
+            with lock.hold(shared=True):
+                assert not can_lock(path, shared=True)
+        assert can_lock(path, shared=True)
+    assert not lock.held
+    assert can_lock(path, shared=False)
+
+
+def test_release_on_error(lock):
+    with pytest.raises(RuntimeError):
+        with lock.hold():
+            raise RuntimeError
+
+    assert not lock.held
+    assert can_lock(lock.filepath, shared=False)
+
+
+def test_writer_waits_for_open_transaction(database):
+    table = database.create_table("t", {"v": "int"})
+    assert core.begin_transaction()[0]
+    table.insert([1])
+    other = reopen()
+    done = threading.Event()
+
+    def write():
+        other["t"].insert([2])
+        done.set()
+
+    thread = threading.Thread(target=write, daemon=True)
+    thread.start()
+    # Второй писатель ждет, но читатели не блокируются
+    assert not done.wait(0.3)
+    assert list(reopen()["t"].scan()) == []
+
+    assert core.commit_transaction()[0]
+    assert done.wait(5)
+    thread.join(5)
+    other.close()
+    assert [row["v"] for row in reopen()["t"].scan(order_by="ID")] == [1, 2]
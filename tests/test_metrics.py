@@ -0,0 +1,41 @@
+# tests/test_metrics.py
+
+import pytest
+
+from src.primitive_db import commands
+from src.primitive_db.metrics import metrics
+
+
+@pytest.fixture
+def fresh_metrics(session):
+    metrics.reset()
+    yield metrics
+    metrics.reset()
+
+
+def calls(name: str) -> int:
+    timer = metrics.timers.get(name)
+    return timer.count if timer is not None else 0
+
+
+def test_select_times_each_phase_once(fresh_metrics):
+    commands.execute("create_table t v:int")
+    commands.execute("insert t 1")
+    metrics.reset()
+
+    assert commands.execute("select * from t where v = 1")["ok"]
+
+    assert calls("select") == 1
+    assert calls("plan") == 1
+    assert calls("filter") == 1
+    assert calls("query") == 1
+    assert metrics.counters["rows.returned"] == 1
+
+
+def test_commands_and_errors_are_counted(fresh_metrics):
+    commands.execute("create_table t v:int")
+    commands.execute("select * from missing")
+
+    assert metrics.counters["commands"] == 2
+    assert metrics.counters["errors"] == 1
+    assert set(metrics.snapshot()) == {"uptime_s", "timers", "counters"}
@@ -0,0 +1,88 @@
+# tests/test_planner.py
+
+import pytest
+
+from src.primitive_db import core, storage
+from src.primitive_db.parser import parse_where_clause
+from src.primitive_db.planner import (
+    FullScan,
+    IndexIntersection,
+    IndexLookup,
+    KeyLookup,
+    KeyRange,
+    RangeScan,
+    plan_query,
+)
+
+
+def plan(session, where: str):
+    expr = core.bind_where("t", parse_where_clause(where))
+    return plan_query(session.table("t"), expr)
+
+
+def ids(session, where: str) -> list:
+    expr = core.bind_where("t", parse_where_clause(where))
+    return [row["ID"] for row in core.find_records(session.table("t"), expr)]
+
+
+@pytest.fixture(params=["json", "columnar"])
+def table(request, session, database):
+    table = database.create_table("t", {"v": "int", "g": "str"})
+    table.insert_many([{"v": i, "g": f"g{i % 10}"} for i in range(1, 1001)])
+    if request.param == "columnar":
+        assert core.convert_table("t", "columnar")[0]
+        assert isinstance(session.table("t").rows, storage.MappedRows)
+    return table
+
+
+@pytest.mark.parametrize(
+    "where, kind, expected",
+    [
+        ("ID = 5", KeyLookup, [5]),
+        ("ID = 5000", KeyLookup, []),
+        ("ID in (3, 1, 2000, 7)", KeyLookup, [1, 3, 7]),
+        ("ID > 997", KeyRange, [998, 999, 1000]),
+        ("ID <= 2", KeyRange, [1, 2]),
+        ("ID between 10 and 12", KeyRange, [10, 11, 12]),
+        ("ID = 5 and v = 5", KeyLookup, [5]),
+        ("ID = 5 and v = 6", KeyLookup, []),
+    ],
+)
+def test_id_conditions_use_primary_key(session, table, where, kind, expected):
+    assert isinstance(plan(session, where).path, kind)
+    assert ids(session, where) == expected
+
+
+def test_wide_id_range_and_negation_are_full_scans(session, table):
+    assert isinstance(plan(session, "ID > 0").path, FullScan)
+    assert isinstance(plan(session, "ID != 5").path, FullScan)
+    assert len(ids(session, "ID != 5")) == 999
+
+
+def test_primary_key_sees_uncompacted_changes(session, table):
+    new_id = table.insert({"v": 0, "g": "new"})
+    table.delete_where("ID = 2")
+    table.update_where({"v": -3}, "ID = 3")
+
+    assert ids(session, f"ID in (2, 3, {new_id})") == [3, new_id]
+    assert ids(session, f"ID >= {new_id - 1}") == [new_id - 1, new_id]
+    assert ids(session, "ID = 3 and v = -3") == [3]
+
+
+def test_index_paths(session, table):
+    assert core.create_index("t", "g", "hash")[0]
+    assert core.create_index("t", "v", "sorted")[0]
+
+    assert isinstance(plan(session, "g = g1").path, IndexLookup)
+    assert isinstance(plan(session, "v < 5").path, RangeScan)
+    assert isinstance(plan(session, "v > 5").path, FullScan)
+    path = plan(session, "v < 50 and g = g1").path
+    assert isinstance(path, (RangeScan, IndexIntersection))
+    assert ids(session, "v < 50 and g = g1") == [1, 11, 21, 31, 41]
+
+
+def test_explain_names_primary_key(session, table):
+    ok, text = core.explain("t", parse_where_clause("ID = 5"))
+
+    assert ok
+    assert "первичному ключу ID" in text
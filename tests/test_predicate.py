@@ -0,0 +1,145 @@
+# tests/test_predicate.py
+
+import re
+
+import pytest
+
+from src.primitive_db.core import parse_value
+from src.primitive_db.predicate import (
+    And,
+    Between,
+    Compare,
+    In,
+    Like,
+    Literal,
+    Not,
+    Or,
+    bind,
+    compile_positional,
+    compile_predicate,
+    parse_predicate,
+)
+
+SCHEMA = {"ID": "int", "v": "int", "s": "str", "b": "bool"}
+ROWS = [
+    {"ID": i, "v": v, "s": s, "b": b}
+    for i, (v, s, b) in enumerate(
+        [
+            (1, "alpha", True),
+            (5, "beta", False),
+            (10, "a b", True),
+            (-3, "gamma", False),
+            (7, "50%", True),
+        ],
+        start=1,
+    )
+]
+
+
+def matching(where: str) -> list:
+    expr = bind(parse_predicate(where), SCHEMA, parse_value)
+    check = compile_predicate(expr)
+    return [row["ID"] for row in ROWS if check(row)]
+
+
+def test_grammar_builds_expression_tree():
+    expr = parse_predicate("v > 1 and not (s = 'a b' or b = true)")
+
+    assert expr == And((
+        Compare("v", ">", Literal(1, "1")),
+        Not(Or((
+            Compare("s", "=", Literal("a b", "a b")),
+            Compare("b", "=", Literal(True, "true")),
+        ))),
+    ))
+    assert parse_predicate("v NOT IN (1, 2)") == In(
+        "v", (Literal(1, "1"), Literal(2, "2")), True
+    )
+    assert parse_predicate("v between 1 AND 3") == Between(
+        "v", Literal(1, "1"), Literal(3, "3")
+    )
+    assert parse_predicate("s not like 'a%'") == Like("s", Literal("a%", "a%"), True)
+    assert parse_predicate("v <> 1") == Compare("v", "!=", Literal(1, "1"))
+    assert parse_predicate("   ") is None
+
+
+def test_and_binds_tighter_than_or():
+    expr = parse_predicate("v = 1 or v = 5 and b = true")
+
+    assert isinstance(expr, Or)
+    assert isinstance(expr.items[1], And)
+    assert matching("v = 1 or v = 5 and b = true") == [1]
+    assert matching("(v = 1 or v = 5) and b = false") == [2]
+
+
+@pytest.mark.parametrize(
+    "where, expected",
+    [
+        ("v >= 5", [2, 3, 5]),
+        ("v != 5", [1, 3, 4, 5]),
+        ("v in (1, 10, 99)", [1, 3]),
+        ("v not in (1, 10)", [2, 4, 5]),
+        ("v between -3 and 5", [1, 2, 4]),
+        ("v not between -3 and 5", [3, 5]),
+        ("s like 'a%'", [1, 3]),
+        ("s like '_eta'", [2]),
+        ("s like '50%'", [5]),
+        ("s not like '%a'", [3, 5]),
+        ("s = 'a b'", [3]),
+        ("b = true", [1, 3, 5]),
+        ("not b = true and v > 0", [2]),
+        ("s > beta", [4]),
+    ],
+)
+def test_conditions_select_expected_rows(where, expected):
+    assert matching(where) == expected
+
+
+@pytest.mark.parametrize(
+    "where, expected",
+    [
+        ("v between 1 and 10 or s like 'g%'", [1, 2, 3, 4, 5]),
+        ("s in (alpha, gamma) and not v < 0", [1]),
+        ("b = false or s = '50%'", [2, 4, 5]),
+    ],
+)
+def test_positional_predicate_matches_row_predicate(where, expected):
+    expr = bind(parse_predicate(where), SCHEMA, parse_value)
+    columns = {name: [row[name] for row in ROWS] for name in SCHEMA}
+    check = compile_positional(expr, columns)
+
+    assert [ROWS[i]["ID"] for i in range(len(ROWS)) if check(i)] == expected
+    assert matching(where) == expected
+
+
+@pytest.mark.parametrize(
+    "where, message",
+    [
+        ("v >", "Неожиданный конец"),
+        ("v = 1 and", "Неожиданный конец"),
+        ("(v = 1", "Ожидалось ')'"),
+        ("v = 1)", "Лишний текст"),
+        ("v 1", "оператор сравнения"),
+        ("v not = 1", "После NOT"),
+        ("v in 1, 2", "Ожидалось '('"),
+        ("v between 1 or 2", "Ожидалось 'and'"),
+        ("= 1", "имя поля"),
+    ],
+)
+def test_syntax_errors(where, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        parse_predicate(where)
+
+
+@pytest.mark.parametrize(
+    "where, message",
+    [
+        ("missing = 1", "не существует"),
+        ("v like '1%'", "LIKE применим только к str"),
+        ("b > true", "не применим к bool"),
+        ("v = abc", "Невозможно преобразовать 'abc' в int"),
+    ],
+)
+def test_binding_errors(where, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        bind(parse_predicate(where), SCHEMA, parse_value)
@@ -0,0 +1,100 @@
+# tests/test_rows.py
+
+import pickle
+
+import pytest
+
+from src.primitive_db.rows import (
+    Row,
+    ValuePool,
+    column_getter,
+    row_type,
+    schema_row_type,
+    to_dict,
+    tuple_getter,
+    updated,
+)
+
+SCHEMA = [("ID", "int"), ("name", "str"), ("age", "int")]
+
+
+@pytest.fixture
+def kind():
+    return schema_row_type(SCHEMA)
+
+
+def test_row_is_read_only_mapping(kind):
+    row = kind.from_mapping({"ID": 1, "name": "Ann", "age": 30})
+
+    assert isinstance(row, Row)
+    assert row["name"] == "Ann"
+    assert row.get("missing", 0) == 0
+    assert list(row) == ["ID", "name", "age"]
+    assert len(row) == 3 and "age" in row and "x" not in row
+    assert dict(row) == row.to_dict() == {"ID": 1, "name": "Ann", "age": 30}
+    assert row == {"ID": 1, "name": "Ann", "age": 30}
+    with pytest.raises(KeyError):
+        row["missing"]
+    with pytest.raises(TypeError):
+        row["age"] = 31
+    with pytest.raises(AttributeError):
+        row.extra = 1
+
+
+def test_replace_returns_new_row(kind):
+    row = kind.from_mapping({"ID": 1, "name": "Ann", "age": 30})
+    changed = updated(row, {"age": 31})
+
+    assert type(changed) is kind
+    assert changed.to_dict() == {"ID": 1, "name": "Ann", "age": 31}
+    assert row["age"] == 30
+    assert updated({"a": 1}, {"a": 2}) == {"a": 2}
+
+
+def test_row_types_are_shared_per_schema(kind):
+    assert schema_row_type(SCHEMA) is kind
+    assert kind.interned == ("name",)
+    assert row_type(("ID",))(5).values_tuple() == (5,)
+    assert row_type(("ID", "v")) is not row_type(("ID", "w"))
+
+
+def test_rows_survive_pickling(kind):
+    row = kind.from_mapping({"ID": 1, "name": "Ann", "age": 30})
+    restored = pickle.loads(pickle.dumps(row))
+
+    assert type(restored) is kind
+    assert restored == row
+
+
+def test_equal_strings_share_one_object(kind):
+    first = kind.from_mapping({"ID": 1, "name": "".join(["An", "n"]), "age": 1})
+    second = kind.from_mapping({"ID": 2, "name": "".join(["A", "nn"]), "age": 2})
+    third = first.replace({"name": "".join(["Ann", ""])})
+
+    assert first["name"] is second["name"] is third["name"]
+    assert kind.pool("name") is not None
+    assert kind.pool("age") is None
+
+
+def test_value_pool_stops_growing_at_limit():
+    pool = ValuePool(limit=2)
+    for value in ["a", "b", "c"]:
+        pool.intern(value)
+
+    assert set(pool.values) == {"a", "b"}
+    assert pool.intern(7) == 7
+    assert pool.intern("".join(["c", ""])) == "c"
+
+
+def test_getters_work_for_rows_and_dicts(kind):
+    row = kind(1, "Ann", 30)
+    plain = {"ID": 2, "name": "Bob", "age": 40}
+
+    assert column_getter("age", kind)(row) == 30
+    assert column_getter("age")(plain) == 40
+    values = tuple_getter(["ID", "name", "age"])
+    assert values(row) == (1, "Ann", 30)
+    assert values(plain) == (2, "Bob", 40)
+    assert tuple_getter(["age"])(plain) == (40,)
+    assert to_dict(row) == {"ID": 1, "name": "Ann", "age": 30}
+    assert to_dict(plain) is not plain
@@ -0,0 +1,71 @@
+# tests/test_scan.py
+
+import pytest
+
+from src.primitive_db import core, scan
+from src.primitive_db.parser import parse_where_clause
+
+CONDITIONS = ["v > 3", "g = g1 or v > 990", "g like 'g1%' and v < 500", "v < 0"]
+
+
+def find(session, where: str, workers: int) -> list:
+    state = session.table("t")
+    expr = core.bind_where("t", parse_where_clause(where))
+    if workers > 1:
+        assert scan.scan_workers(state.rows, expr) == workers
+        rows = scan.parallel_filter(state.rows, expr, workers, state.row_type)
+    else:
+        rows = core.find_records(state, expr)
+    return [dict(row) for row in rows]
+
+
+def fill(table, count: int) -> None:
+    table.insert_many([{"v": i, "g": f"g{i % 7}"} for i in range(count)])
+
+
+@pytest.fixture(autouse=True)
+def parallel(monkeypatch):
+    monkeypatch.setitem(scan.settings, "workers", 3)
+    monkeypatch.setitem(scan.settings, "min_rows", 0)
+
+
+@pytest.fixture(params=["json", "columnar"])
+def make_table(request, database):
+    """Таблица с count строками в снимке формата из параметра."""
+
+    def make(count: int):
+        table = database.create_table("t", {"v": "int", "g": "str"})
+        fill(table, count)
+        if request.param != "json":
+            assert core.convert_table("t", request.param)[0]
+        return table
+
+    return make
+
+
+@pytest.mark.parametrize("count", [0, 1, 5, 1000])
+@pytest.mark.parametrize("where", CONDITIONS)
+def test_parallel_scan_matches_serial(session, make_table, count, where):
+    make_table(count)
+
+    assert find(session, where, 3) == find(session, where, 1)
+
+
+@pytest.mark.parametrize("count", [0, 1000])
+def test_parallel_scan_sees_uncompacted_changes(session, make_table, count):
+    table = make_table(count)
+    table.delete_where("v < 10")
+    table.update_where({"v": 2000}, "v = 500")
+    fill(table, 3)
+
+    for where in CONDITIONS:
+        assert find(session, where, 3) == find(session, where, 1)
+
+
+def test_empty_table_is_scanned_without_error(session, make_table):
+    make_table(0)
+    state = session.table("t")
+    expr = core.bind_where("t", parse_where_clause("v > 3"))
+
+    assert scan.parallel_filter(state.rows, expr, 3, state.row_type) == []
+    assert core.find_records(state, expr) == []
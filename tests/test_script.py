@@ -0,0 +1,69 @@
+# tests/test_script.py
+
+import pytest
+from conftest import reopen
+
+from src.primitive_db import script
+
+
+@pytest.fixture
+def run(session, monkeypatch):
+    monkeypatch.setattr(script, "db", session)
+    return lambda text, **kwargs: script.run_script(text.splitlines(), **kwargs)
+
+
+def values() -> list:
+    return [row["v"] for row in reopen()["t"].scan(order_by="ID")]
+
+
+def test_script_skips_comments_and_semicolons(run, capsys):
+    code = run(
+        "-- создание\n"
+        "create_table t v:int;\n"
+        "\n"
+        "# вставка\n"
+        "insert t 1\n"
+        "insert t 2 ;\n"
+        "select * from t where v > 1\n"
+    )
+
+    assert code == 0
+    assert values() == [1, 2]
+    out = capsys.readouterr().out
+    assert "Выполнено команд: 4" in out
+    assert "Запись успешно добавлена" not in out
+
+
+def test_script_stops_at_first_error_and_keeps_done_work(run, capsys):
+    code = run("create_table t v:int\ninsert t 1\ninsert t x\ninsert t 3\n")
+
+    assert code == 1
+    assert values() == [1]
+    assert "Строка 3:" in capsys.readouterr().out
+
+
+def test_destructive_commands_need_yes(run, capsys):
+    text = "create_table t v:int\ninsert t 1\ndelete t where v = 1\n"
+
+    assert run(text) == 1
+    assert "--yes" in capsys.readouterr().out
+    assert values() == [1]
+
+    assert run("delete t where v = 1\ninsert t 2\n", assume_yes=True) == 0
+    assert values() == [2]
+
+
+def test_unfinished_transaction_is_rolled_back(run):
+    code = run(
+        "create_table t v:int\n"
+        "begin\ninsert t 1\ncommit\n"
+        "begin\ninsert t 2\n"
+    )
+
+    assert code == 0
+    assert values() == [1]
+
+
+def test_exit_ends_script(run):
+    assert run("create_table t v:int\ninsert t 1\nexit\ninsert t 2\n") == 0
+    assert values() == [1]
@@ -0,0 +1,65 @@
+# tests/test_select.py
+
+import pytest
+
+from src.primitive_db import commands, core
+
+
+def run(command: str):
+    result = commands.execute(command)
+    assert result["ok"], result["message"]
+    return result.get("rows")
+
+
+@pytest.fixture(params=["json", "columnar"])
+def table(request, database):
+    table = database.create_table("t", {"n": "int", "s": "str"})
+    table.insert_many([{"n": (i * 7) % 10, "s": f"s{i}"} for i in range(1, 11)])
+    if request.param != "json":
+        assert core.convert_table("t", request.param)[0]
+    return table
+
+
+def test_projection_keeps_requested_column_order(table):
+    rows = run("select s, ID from t where n < 3")
+
+    assert rows == [{"s": "s3", "ID": 3}, {"s": "s6", "ID": 6}, {"s": "s10", "ID": 10}]
+    assert list(rows[0]) == ["s", "ID"]
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("limit, offset", [(None, 0), (3, 0), (3, 4), (20, 8), (0, 0)])
+def test_order_limit_offset_match_sorted_slice(table, descending, limit, offset):
+    expected = sorted(table.scan(), key=lambda row: row["n"], reverse=descending)
+    stop = None if limit is None else offset + limit
+
+    rows = list(table.scan(
+        order_by="n", descending=descending, limit=limit, offset=offset
+    ))
+    assert rows == expected[offset:stop]
+
+
+def test_select_command_options(table):
+    assert [row["n"] for row in run("select n from t order by n desc limit 2")] == [
+        9, 8
+    ]
+    assert [row["ID"] for row in run("select ID from t limit 2 offset 3")] == [4, 5]
+    assert [row["s"] for row in run(
+        "select s from t where n > 4 order by n asc offset 3"
+    )] == ["s4", "s7"]
+
+
+@pytest.mark.parametrize(
+    "command, message",
+    [
+        ("select x from t", "Столбец 'x' не существует"),
+        ("select * from t order by x", "ORDER BY 'x' не существует"),
+        ("select * from t limit -1", "LIMIT не может быть отрицательным"),
+        ("select * from t offset -2", "OFFSET не может быть отрицательным"),
+    ],
+)
+def test_invalid_select_options(table, command, message):
+    result = commands.execute(command)
+
+    assert not result["ok"]
+    assert message in result["message"]
@@ -0,0 +1,93 @@
+# tests/test_server.py
+
+import asyncio
+import os
+import threading
+
+import pytest
+
+from src.primitive_db import scan
+from src.primitive_db import server as server_module
+from src.primitive_db.client import Client
+
+
+@pytest.fixture
+def serve(session, tmp_path, monkeypatch):
+    """Запускает Server в отдельном потоке; возвращает фабрику клиентов."""
+    monkeypatch.setattr(server_module, "db", session)
+    socket_path = str(tmp_path / "db.sock")
+    loop = asyncio.new_event_loop()
+    servers = []
+
+    def start(transaction_timeout=None):
+        server = server_module.Server(transaction_timeout)
+        servers.append(server)
+        asyncio.run_coroutine_threadsafe(
+            server.start(socket_path=socket_path), loop
+        ).result(5)
+        return lambda: Client(socket_path=socket_path, timeout=5)
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield start
+    for server in servers:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def test_commands_return_json_results(serve):
+    connect = serve()
+    with connect() as client:
+        client.check("create_table t v:int")
+        client.check("insert t 1")
+
+        assert client.select("* from t") == [{"ID": 1, "v": 1}]
+        assert not client.execute("select * from missing")["ok"]
+
+
+def test_idle_transaction_is_rolled_back_and_releases_session(serve):
+    connect = serve(transaction_timeout=0.2)
+    with connect() as owner, connect() as other:
+        owner.check("create_table t v:int")
+        owner.check("begin")
+        owner.check("insert t 1")
+
+        # Ждет, пока транзакция владельца не будет отменена по таймауту
+        assert other.select("* from t") == []
+
+        result = owner.execute("commit")
+        assert not result["ok"]
+        assert "Транзакция отменена" in result["message"]
+        owner.check("insert t 2")
+        assert [row["v"] for row in other.select("* from t")] == [2]
+
+
+def test_active_transaction_keeps_session(serve):
+    connect = serve(transaction_timeout=5)
+    with connect() as owner:
+        owner.check("create_table t v:int")
+        owner.check("begin")
+        owner.check("insert t 1")
+        owner.check("commit")
+
+        assert [row["v"] for row in owner.select("* from t")] == [1]
+
+
+def test_serve_turns_parallel_scan_off(session, tmp_path, monkeypatch):
+    monkeypatch.setattr(server_module, "db", session)
+    monkeypatch.setitem(scan.settings, "workers", 4)
+    socket_path = str(tmp_path / "db.sock")
+
+    async def start_and_stop():
+        task = asyncio.ensure_future(server_module.serve(socket_path=socket_path))
+        while not os.path.exists(socket_path):
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(asyncio.wait_for(start_and_stop(), 5))
+    assert scan.settings["workers"] == 1
+    assert not os.path.exists(socket_path)
@@ -0,0 +1,167 @@
+# tests/test_storage.py
+
+import json
+import os
+
+import pytest
+from conftest import reopen
+
+from src.primitive_db import core, storage
+from src.primitive_db.parser import parse_where_clause
+
+
+def values(table) -> list:
+    return [row["v"] for row in table.scan(order_by="ID")]
+
+
+def test_log_replayed_by_new_session(database):
+    table = database.create_table("t", {"v": "int"})
+    table.insert_many([{"v": 1}, {"v": 2}])
+    table.update_where({"v": 20}, "v = 2")
+    table.delete_where("v = 1")
+
+    assert values(reopen()["t"]) == [20]
+
+
+def test_torn_log_tail_does_not_hide_later_commits(database):
+    table = database.create_table("t", {"v": "int"})
+    table.insert_many([{"v": 1}, {"v": 2}])
+    # Недописанная строка: сбой посреди дописывания журнала
+    with open(storage.log_path("t"), "a", encoding="utf-8") as f:
+        f.write('{"op":"insert","row":{"ID":3,"v"')
+    table.insert_many([{"v": 3}, {"v": 4}])
+
+    assert values(reopen()["t"]) == [1, 2, 3, 4]
+
+
+def test_torn_tail_is_dropped_on_read(database):
+    table = database.create_table("t", {"v": "int"})
+    table.insert([1])
+    with open(storage.log_path("t"), "a", encoding="utf-8") as f:
+        f.write('{"op":"insert","row":{"ID":2,"v"')
+
+    assert values(reopen()["t"]) == [1]
+
+
+def test_corrupt_line_in_the_middle_is_an_error(database):
+    table = database.create_table("t", {"v": "int"})
+    table.insert([1])
+    with open(storage.log_path("t"), "a", encoding="utf-8") as f:
+        f.write('{"op":"insert","row"\n')
+        f.write('{"op":"insert","row":{"ID":3,"v":3}}\n')
+
+    with pytest.raises(ValueError, match="поврежден"):
+        storage.read_log("t")
+
+
+def test_truncate_torn_tail(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tmp_path.joinpath("data").mkdir()
+    path = tmp_path / storage.log_path("t")
+    path.write_bytes(b'{"op":"clear"}\n{"op":"ins')
+
+    storage.truncate_torn_tail("t")
+    assert path.read_bytes() == b'{"op":"clear"}\n'
+    storage.truncate_torn_tail("t")
+    assert path.read_bytes() == b'{"op":"clear"}\n'
+
+
+def test_recover_replays_journal_after_crash(database, session):
+    table = database.create_table("t", {"v": "int"})
+    table.insert([1])
+    # Сбой после записи журнала транзакции, посреди дописывания журнала таблицы
+    record = {"op": "insert", "row": {"ID": 2, "v": 2}}
+    lines = storage.encode_records([record])
+    header = {"metadata": None, "reset": []}
+    storage.write_journal(session.journal_file, header, {"t": lines})
+    with open(storage.log_path("t"), "a", encoding="utf-8") as f:
+        f.write(lines[0][:10])
+
+    assert values(reopen()["t"]) == [1, 2]
+    assert values(reopen()["t"]) == [1, 2]
+
+
+def log_lines(table_name: str) -> list:
+    with open(storage.log_path(table_name), encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_write_appends_to_log_without_rewriting_snapshot(database, session):
+    table = database.create_table("t", {"v": "int"})
+    table.insert([1])
+    table.insert([2])
+    table.update_where({"v": 20}, "v = 2")
+
+    assert not os.path.exists(storage.snapshot_path("t", session.table_meta("t")))
+    assert [json.loads(line)["op"] for line in log_lines("t")] == [
+        "insert_many", "insert_many", "update"
+    ]
+
+
+def test_log_is_compacted_into_snapshot(database, session, monkeypatch):
+    monkeypatch.setattr(storage, "LOG_COMPACT_MIN_BYTES", 200)
+    table = database.create_table("t", {"v": "int"})
+    for v in range(20):
+        table.insert([v])
+
+    meta = session.table_meta("t")
+    assert not storage.needs_compaction("t", meta)
+    assert len(storage.read_log("t")) < 20
+    assert [dict(row)["v"] for row in storage.read_snapshot("t", meta)]
+    assert values(reopen()["t"]) == list(range(20))
+
+
+@pytest.fixture
+def mapped(database, session):
+    table = database.create_table("t", {"v": "int", "g": "str"})
+    table.insert_many([{"v": i * 10, "g": f"g{i % 2}"} for i in range(1, 7)])
+    assert core.convert_table("t", "columnar")[0]
+    rows = session.table("t").rows
+    assert isinstance(rows, storage.MappedRows)
+    return table, session
+
+
+def test_mapped_rows_mapping_protocol(mapped):
+    table, session = mapped
+    rows = session.table("t").rows
+
+    assert len(rows) == 6
+    assert list(rows) == [1, 2, 3, 4, 5, 6]
+    assert rows[3]["v"] == 30
+    assert 6 in rows and 7 not in rows
+    with pytest.raises(KeyError):
+        rows[7]
+
+
+def test_mapped_rows_overlay_log_changes(mapped):
+    table, session = mapped
+    table.delete_where("ID = 2")
+    table.update_where({"v": 31}, "ID = 3")
+    table.insert({"v": 70, "g": "g1"})
+    rows = session.table("t").rows
+
+    assert len(rows) == 6
+    assert list(rows) == [1, 3, 4, 5, 6, 7]
+    assert 2 not in rows
+    assert rows[3]["v"] == 31
+    assert dict(rows.column_items("v")) == {1: 10, 3: 31, 4: 40, 5: 50, 6: 60, 7: 70}
+    assert values(reopen()["t"]) == [10, 31, 40, 50, 60, 70]
+
+
+def test_mapped_filter_builds_only_matching_rows(mapped, monkeypatch):
+    table, session = mapped
+    table.update_where({"g": "g1"}, "ID = 2")
+    rows = session.table("t").rows
+    built = []
+    gather = rows._table.rows
+
+    def rows_at(positions):
+        built.extend(positions)
+        return gather(positions)
+
+    monkeypatch.setattr(rows._table, "rows", rows_at)
+    expr = core.bind_where("t", parse_where_clause("g = g1"))
+
+    assert [row["ID"] for row in rows.filter(expr)] == [1, 2, 3, 5]
+    assert built == [0, 2, 4]
+    assert [row["ID"] for row in rows.iter_filter(expr)] == [1, 2, 3, 5]
@@ -0,0 +1,79 @@
+# tests/test_transaction.py
+
+import pytest
+from conftest import reopen
+
+from src.primitive_db import core
+
+
+@pytest.fixture
+def tables(database):
+    a = database.create_table("a", {"v": "int"})
+    b = database.create_table("b", {"v": "int"})
+    a.insert([1])
+    return a, b
+
+
+def values(name: str) -> list:
+    return [row["v"] for row in reopen()[name].scan(order_by="ID")]
+
+
+def test_commit_makes_all_changes_visible_at_once(tables):
+    a, b = tables
+    assert core.begin_transaction()[0]
+    a.insert([2])
+    b.insert([10])
+    a.update_where({"v": 0}, "v = 1")
+
+    # До фиксации другой сеанс видит только данные на диске
+    assert values("a") == [1]
+    assert values("b") == []
+
+    assert core.commit_transaction() == (True, "Транзакция зафиксирована")
+    assert values("a") == [0, 2]
+    assert values("b") == [10]
+
+
+def test_rollback_discards_changes_and_reserved_ids(session, tables):
+    a, b = tables
+    assert core.begin_transaction()[0]
+    a.insert([2])
+    a.delete_where("v = 1")
+    b.insert([10])
+    assert [row["v"] for row in a.scan()] == [2]
+
+    assert core.rollback_transaction() == (True, "Транзакция отменена")
+    assert [row["v"] for row in a.scan()] == [1]
+    assert list(b.scan()) == []
+    assert a.insert([3]) == 2
+    assert values("a") == [1, 3]
+
+
+def test_transaction_context_rolls_back_on_error(database, tables):
+    a, _ = tables
+    with database.transaction():
+        a.insert([2])
+    with pytest.raises(RuntimeError):
+        with database.transaction():
+            a.insert([3])
+            raise RuntimeError
+
+    assert values("a") == [1, 2]
+
+
+def test_transaction_state_errors(tables):
+    assert core.commit_transaction() == (False, "Нет открытой транзакции")
+    assert core.rollback_transaction() == (False, "Нет открытой транзакции")
+
+    assert core.begin_transaction()[0]
+    ok, message = core.begin_transaction()
+    assert not ok
+    assert "уже открыта" in message
+    for ok, message in [
+        core.create_index("a", "v"),
+        core.convert_table("a", "columnar"),
+        core.compress_table("a", "zlib"),
+    ]:
+        assert not ok
+        assert message == "Команда недоступна внутри транзакции"
+    assert core.rollback_transaction()[0]
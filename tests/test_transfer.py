@@ -0,0 +1,84 @@
+# tests/test_transfer.py
+
+import json
+
+import pytest
+from conftest import reopen
+
+from src.primitive_db import core
+
+ROWS = [
+    {"ID": 1, "n": 10, "s": "обычная", "b": True},
+    {"ID": 2, "n": -3, "s": 'с запятой, "кавычками"', "b": False},
+    {"ID": 3, "n": 0, "s": "", "b": True},
+]
+
+
+@pytest.fixture
+def table(database):
+    table = database.create_table("t", {"n": "int", "s": "str", "b": "bool"})
+    table.insert_many([{k: v for k, v in row.items() if k != "ID"} for row in ROWS])
+    return table
+
+
+@pytest.mark.parametrize("extension", ["csv", "jsonl"])
+def test_export_import_round_trip(tmp_path, database, table, monkeypatch, extension):
+    monkeypatch.setattr(core, "IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(core, "EXPORT_BATCH_SIZE", 2)
+    path = str(tmp_path / f"t.{extension}")
+
+    ok, message = core.export_table("t", path)
+    assert ok, message
+    assert "3" in message
+
+    database.create_table("copy", {"n": "int", "s": "str", "b": "bool"})
+    ok, message = core.import_table("copy", path)
+    assert ok, message
+    assert list(reopen()["copy"].scan(order_by="ID")) == ROWS
+
+
+def test_jsonl_round_trip_keeps_quoted_strings(tmp_path, database):
+    table = database.create_table("q", {"s": "str"})
+    values = ["'q'", '"двойные"', "'", "x'"]
+    table.insert_many([{"s": value} for value in values])
+    path = str(tmp_path / "q.jsonl")
+    assert core.export_table("q", path)[0]
+
+    database.create_table("copy", {"s": "str"})
+    assert core.import_table("copy", path)[0]
+    assert [row["s"] for row in reopen()["copy"].scan(order_by="ID")] == values
+
+
+def test_jsonl_export_is_one_object_per_line(tmp_path, table):
+    path = tmp_path / "t.jsonl"
+    assert core.export_table("t", str(path))[0]
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == ROWS
+
+
+def test_import_stops_at_bad_row_and_keeps_earlier_batches(
+    tmp_path, database, table, monkeypatch
+):
+    monkeypatch.setattr(core, "IMPORT_BATCH_SIZE", 2)
+    path = tmp_path / "bad.csv"
+    path.write_text("n,s,b\n1,a,true\n2,b,false\n3,c,false\nx,d,true\n")
+
+    ok, message = core.import_table("t", str(path))
+
+    assert not ok
+    assert "Строка 5" in message
+    assert '"n"' in message
+    assert "Загружено записей до ошибки: 2" in message
+    assert [row["n"] for row in reopen()["t"].scan(order_by="ID")][3:] == [1, 2]
+
+
+def test_import_rejects_unknown_file_kind_and_table(tmp_path, table):
+    path = tmp_path / "t.txt"
+    path.write_text("n\n1\n")
+
+    ok, message = core.import_table("t", str(path))
+    assert not ok
+    assert ".csv или .jsonl" in message
+    assert not core.import_table("missing", str(tmp_path / "t.csv"))[0]
+    assert not core.export_table("missing", str(tmp_path / "t.csv"))[0]